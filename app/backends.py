@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Optional, Union
+
+import numpy as np
+
+BACKEND_SYNTHETIC = "synthetic"
+BACKEND_NROM = "nrom"
+BACKENDS = (BACKEND_SYNTHETIC, BACKEND_NROM)
+FRAME_WIDTH = 256
+FRAME_HEIGHT = 240
+
+
+class EmulatorBackend(ABC):
+    name = ""
+
+    def __init__(self) -> None:
+        self.frame_count = 0
+
+    @abstractmethod
+    def reset(self) -> None:
+        ...
+
+    @abstractmethod
+    def run_frame(self, buttons: int) -> None:
+        ...
+
+    @abstractmethod
+    def read_memory(self, address: int) -> int:
+        ...
+
+    @property
+    @abstractmethod
+    def state_size(self) -> int:
+        ...
+
+    @abstractmethod
+    def save_state(self, buffer: Union[bytearray, memoryview]) -> None:
+        ...
+
+    @abstractmethod
+    def load_state(self, buffer: Union[bytearray, memoryview]) -> None:
+        ...
+
+    @abstractmethod
+    def render_frame(self, out: np.ndarray) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+def create_backend(name: str, rom_path: str) -> Optional[EmulatorBackend]:
+    if name == BACKEND_SYNTHETIC:
+        return None
+    if name == BACKEND_NROM:
+        from nes import NROMBackend
+
+        return NROMBackend(rom_path)
+    raise ValueError(f"Backend de emulación desconocido: {name}")
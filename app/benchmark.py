@@ -0,0 +1,675 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from random import Random
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from backends import BACKEND_NROM
+from bots import BotGenome, BotPopulation, genomes_to_matrix
+from emulation import FRAMES_PER_SECOND, EmulatorSession
+from islands import TOPOLOGIES, TOPOLOGY_RING, IslandModel
+from nes import NROMBackend, build_nrom_image
+from optimizers import OPTIMIZERS, make_optimizer
+from parallel import ParallelEvaluator
+from presets import ControlPreset, PresetLibrary
+
+RESULTS_VERSION = 1
+DEFAULT_SIZES = [500, 10_000, 100_000, 1_000_000]
+DEFAULT_WORKERS = [1, 2]
+HIGHER_IS_BETTER = {"bots_per_second"}
+LOWER_IS_BETTER = {
+    "p50_seconds",
+    "p99_seconds",
+    "peak_rss_bytes",
+    "bytes_per_bot",
+    "seconds_per_call",
+}
+WALKER_PROGRAM = bytes.fromhex("A9 80 8D 00 20 A2 00 BD 00 03 69 01 9D 00 03 E8 D0 F5 4C 05 C0")
+WALKER_NMI = bytes.fromhex(
+    "A9 01 8D 16 40 A9 00 8D 16 40 AD 16 40 29 01 85 10 AD 16 40 29 01 85 11"
+    " A2 05 AD 16 40 CA D0 FA AD 16 40 29 01 F0 14 A5 11 18 69 01 0A 0A 0A 18"
+    " 65 86 85 86 90 05 E6 6D EE 5E 07 40"
+)
+
+Measurement = Dict[str, object]
+
+
+def write_synthetic_rom(path: Path, prg_banks: int = 2, chr_banks: int = 1) -> Path:
+    header = b"NES\x1a" + bytes([prg_banks, chr_banks]) + bytes(10)
+    body = bytes(prg_banks * 16384 + chr_banks * 8192)
+    path.write_bytes(header + body)
+    return path
+
+
+def write_walker_rom(path: Path) -> Path:
+    path.write_bytes(build_nrom_image(WALKER_PROGRAM, WALKER_NMI))
+    return path
+
+
+def peak_rss_bytes(who: int = resource.RUSAGE_SELF) -> int:
+    peak = resource.getrusage(who).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def benchmark_evaluation(rom_path: Path, bot_count: int) -> Dict[str, float]:
+    preset = PresetLibrary.default_super_mario_bros()
+    session = EmulatorSession(str(rom_path), preset)
+    rng = Random(42)
+    genomes = [BotGenome.random(rng) for _ in range(bot_count)]
+
+    started = time.perf_counter()
+    for index, genome in enumerate(genomes):
+        session.evaluate_bot(genome, session.bot_stream(1, index), preset)
+    loop_seconds = time.perf_counter() - started
+
+    genes = genomes_to_matrix(genomes)
+    session.evaluate_population(genes[:1], 0, preset)
+    started = time.perf_counter()
+    session.evaluate_population(genes, 1, preset)
+    vectorized_seconds = time.perf_counter() - started
+
+    return {
+        "bots": bot_count,
+        "loop_bots_per_second": bot_count / loop_seconds,
+        "vectorized_bots_per_second": bot_count / vectorized_seconds,
+        "speedup": loop_seconds / vectorized_seconds,
+    }
+
+
+def benchmark_backend(frames: int, episodes: int) -> Dict[str, float]:
+    preset = PresetLibrary.default_super_mario_bros()
+    with tempfile.TemporaryDirectory() as workdir:
+        rom_path = str(write_walker_rom(Path(workdir) / "walker.nes"))
+        backend = NROMBackend(rom_path)
+        started = time.perf_counter()
+        for frame in range(frames):
+            backend.run_frame(0x82 if frame % 2 else 0x80)
+        frame_seconds = time.perf_counter() - started
+        cycles = backend.cpu.cycles
+        backend.close()
+        genes = genomes_to_matrix([BotGenome.random(Random(index)) for index in range(episodes)])
+        sessions = {
+            snapshots: EmulatorSession(
+                rom_path, preset, backend=BACKEND_NROM, snapshots=snapshots
+            )
+            for snapshots in (False, True)
+        }
+        episode_seconds: Dict[bool, float] = {}
+        for snapshots, session in sessions.items():
+            started = time.perf_counter()
+            batch = session.evaluate_population(genes, 1, preset)
+            session.evaluate_population(genes, 2, preset)
+            episode_seconds[snapshots] = time.perf_counter() - started
+        stats = sessions[True].snapshot_stats
+        for session in sessions.values():
+            session.close()
+    return {
+        "frames": frames,
+        "frames_per_second": frames / frame_seconds,
+        "realtime_factor": frames / frame_seconds / FRAMES_PER_SECOND,
+        "cycles_per_second": cycles / frame_seconds,
+        "episodes_per_second": 2 * episodes / episode_seconds[False],
+        "episodes_per_second_snapshots": 2 * episodes / episode_seconds[True],
+        "snapshot_speedup": episode_seconds[False] / episode_seconds[True],
+        "frames_restored_ratio": stats.speedup,
+        "snapshot_prefix_hits": stats.prefix_hits,
+        "episode_frames_per_second": 2 * float(batch.frames().sum()) / episode_seconds[False],
+    }
+
+
+def measure_generations(
+    rom_path: str, bot_count: int, workers: int, generations: int, pipelined: bool = False
+) -> Measurement:
+    preset = PresetLibrary.default_super_mario_bros()
+    session = EmulatorSession(rom_path, preset)
+    baseline_rss = peak_rss_bytes()
+    evaluator = ParallelEvaluator(rom_path, preset, workers=workers) if workers > 1 else None
+    try:
+        population = BotPopulation(
+            bot_count=bot_count,
+            preset=preset,
+            vectorized=True,
+            evaluator=evaluator,
+            pipelined=pipelined,
+        )
+        population.run_generation(session, 1)
+        started = time.perf_counter()
+        results = [
+            population.run_generation(session, generation)
+            for generation in range(2, generations + 2)
+        ]
+        elapsed = time.perf_counter() - started
+        latencies = [result.timings.total_seconds for result in results]
+        peak_rss = peak_rss_bytes()
+    finally:
+        if evaluator:
+            evaluator.close()
+    return {
+        "benchmark": "run_generation_pipelined" if pipelined else "run_generation",
+        "bots": bot_count,
+        "workers": workers,
+        "generations": generations,
+        "generations_per_second": generations / elapsed,
+        "bots_prefetched": sum(
+            result.timings.counters.get("bots_prefetched", 0) for result in results
+        ),
+        "bots_per_second": bot_count * len(latencies) / sum(latencies),
+        "p50_seconds": float(np.percentile(latencies, 50)),
+        "p99_seconds": float(np.percentile(latencies, 99)),
+        "peak_rss_bytes": peak_rss,
+        "worker_peak_rss_bytes": peak_rss_bytes(resource.RUSAGE_CHILDREN),
+        "bytes_per_bot": max(0, peak_rss - baseline_rss) / bot_count,
+    }
+
+
+def measure_time_to_goal(
+    session: EmulatorSession,
+    population: Union[BotPopulation, IslandModel],
+    max_generations: int,
+    success_target: Optional[float] = None,
+) -> Measurement:
+    started = time.perf_counter()
+    generation = 0
+    reached = False
+    while generation < max_generations and not reached:
+        generation += 1
+        result = population.run_generation(session, generation)
+        reached = (
+            result.goal_reached
+            if success_target is None
+            else result.success_rate >= success_target
+        )
+    optimizer = getattr(population, "optimizer", None)
+    return {
+        "benchmark": "time_to_goal",
+        "bots": population.bot_count,
+        "workers": getattr(population, "island_count", 1),
+        "optimizer": optimizer.name if optimizer is not None else "ga",
+        "goal_reached": reached,
+        "generations": generation,
+        "evaluations": generation * population.bot_count,
+        "seconds_to_goal": time.perf_counter() - started,
+    }
+
+
+def compare_islands(
+    bot_count: int,
+    island_count: int,
+    migration_interval: int,
+    migrant_count: int,
+    topology: str,
+    max_generations: int,
+    seed: int,
+) -> List[Measurement]:
+    preset = PresetLibrary.default_super_mario_bros()
+    with tempfile.TemporaryDirectory() as workdir:
+        rom_path = str(write_synthetic_rom(Path(workdir) / "synthetic.nes"))
+        session = EmulatorSession(rom_path, preset)
+        baseline = BotPopulation(bot_count=bot_count, preset=preset, vectorized=True, seed=seed)
+        rows = [measure_time_to_goal(session, baseline, max_generations)]
+        with IslandModel(
+            rom_path,
+            preset,
+            island_count,
+            bot_count,
+            migration_interval=migration_interval,
+            migrant_count=migrant_count,
+            topology=topology,
+            seed=seed,
+        ) as islands:
+            rows.append(measure_time_to_goal(session, islands, max_generations))
+    return rows
+
+
+def compare_optimizers(
+    bot_counts: List[int],
+    optimizers: List[str],
+    success_target: float,
+    max_generations: int,
+    seeds: List[int],
+) -> List[Measurement]:
+    preset = PresetLibrary.default_super_mario_bros()
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        rom_path = str(write_synthetic_rom(Path(workdir) / "synthetic.nes"))
+        session = EmulatorSession(rom_path, preset)
+        for bot_count in bot_counts:
+            for name in optimizers:
+                for seed in seeds:
+                    population = BotPopulation(
+                        bot_count=bot_count,
+                        preset=preset,
+                        vectorized=True,
+                        seed=seed,
+                        optimizer=make_optimizer(name),
+                    )
+                    measurement = measure_time_to_goal(
+                        session, population, max_generations, success_target
+                    )
+                    measurement["seed"] = seed
+                    print(format_measurement(measurement), flush=True)
+                    rows.append(measurement)
+    return rows
+
+
+def _time_calls(name: str, function: Callable[[], object], calls: int) -> Measurement:
+    function()
+    started = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return {
+        "benchmark": name,
+        "calls": calls,
+        "seconds_per_call": (time.perf_counter() - started) / calls,
+    }
+
+
+def measure_micro(rom_path: Path, calls: int) -> List[Measurement]:
+    preset = PresetLibrary.default_super_mario_bros()
+    session = EmulatorSession(str(rom_path), preset)
+    rng = Random(42)
+    first, second = BotGenome.random(rng), BotGenome.random(rng)
+    preset_path = rom_path.with_name("preset.json")
+    PresetLibrary.save(str(preset_path), preset)
+    payload = preset.to_dict()
+    return [
+        _time_calls(
+            "evaluate_bot",
+            lambda: session.evaluate_bot(first, session.bot_stream(1, 0), preset),
+            calls,
+        ),
+        _time_calls("mutate", lambda: first.mutate(rng), calls),
+        _time_calls("crossover", lambda: first.crossover(rng, second), calls),
+        _time_calls("preset_from_dict", lambda: ControlPreset.from_dict(payload), calls),
+        _time_calls(
+            "preset_load",
+            lambda: ControlPreset.from_dict(PresetLibrary.load_from_path(str(preset_path))),
+            calls,
+        ),
+    ]
+
+
+def run_suite(
+    sizes: List[int], worker_counts: List[int], generations: int, calls: int
+) -> Dict[str, object]:
+    results: List[Measurement] = []
+    context = get_context("spawn")
+    with tempfile.TemporaryDirectory() as workdir:
+        rom_path = write_synthetic_rom(Path(workdir) / "synthetic.nes")
+        for measurement in measure_micro(rom_path, calls):
+            print(format_measurement(measurement), flush=True)
+            results.append(measurement)
+        for workers in worker_counts:
+            for bot_count in sizes:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as isolated:
+                    measurement = isolated.submit(
+                        measure_generations, str(rom_path), bot_count, workers, generations
+                    ).result()
+                print(format_measurement(measurement), flush=True)
+                results.append(measurement)
+    return {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+
+
+def measurement_key(measurement: Measurement) -> Tuple[object, ...]:
+    return (
+        measurement["benchmark"],
+        measurement.get("bots"),
+        measurement.get("workers"),
+    )
+
+
+def format_measurement(measurement: Measurement) -> str:
+    if measurement["benchmark"] == "time_to_goal":
+        outcome = "objetivo" if measurement["goal_reached"] else "sin objetivo"
+        return (
+            f"{'time_to_goal':<18} "
+            f"{measurement['bots']:>9} bots "
+            f"{measurement['workers']:>3} islas "
+            f"{measurement.get('optimizer', 'ga'):>6} "
+            f"{measurement['generations']:>5} generaciones "
+            f"{measurement.get('evaluations', 0):>12,} evaluaciones "
+            f"{measurement['seconds_to_goal']:>9.2f} s ({outcome})"
+        )
+    if measurement["benchmark"] != "run_generation":
+        return (
+            f"{measurement['benchmark']:<18} "
+            f"{measurement['seconds_per_call'] * 1e6:>12.2f} µs/llamada"
+        )
+    return (
+        f"{'run_generation':<18} "
+        f"{measurement['bots']:>9} bots "
+        f"{measurement['workers']:>3} procesos "
+        f"{measurement['bots_per_second']:>14,.0f} bots/s "
+        f"p50 {measurement['p50_seconds'] * 1000:>10.1f} ms "
+        f"p99 {measurement['p99_seconds'] * 1000:>10.1f} ms "
+        f"RSS {measurement['peak_rss_bytes'] / 2**20:>8.1f} MiB "
+        f"{measurement['bytes_per_bot']:>8.1f} B/bot"
+    )
+
+
+def compare_results(
+    current: Dict[str, object], baseline: Dict[str, object], tolerance: float
+) -> List[str]:
+    reference = {measurement_key(entry): entry for entry in baseline["results"]}
+    regressions: List[str] = []
+    for entry in current["results"]:
+        previous = reference.get(measurement_key(entry))
+        if previous is None:
+            continue
+        for metric, value in entry.items():
+            if metric not in HIGHER_IS_BETTER and metric not in LOWER_IS_BETTER:
+                continue
+            old = previous.get(metric)
+            if not old:
+                continue
+            change = (value - old) / old
+            if metric in HIGHER_IS_BETTER:
+                change = -change
+            if change > tolerance:
+                label = " ".join(str(part) for part in measurement_key(entry) if part is not None)
+                regressions.append(
+                    f"{label}: {metric} empeoró {change:.1%} ({old:.6g} → {value:.6g})"
+                )
+    return regressions
+
+
+def load_results(path: str) -> Dict[str, object]:
+    with open(path, "r", encoding="utf-8") as handle:
+        data = json.load(handle)
+    if data.get("version") != RESULTS_VERSION:
+        raise ValueError(f"Resultados de benchmark con versión no soportada: {path}")
+    return data
+
+
+def report_regressions(regressions: List[str], tolerance: float) -> int:
+    if not regressions:
+        print(f"Sin regresiones por encima del {tolerance:.0%}.")
+        return 0
+    print(f"Regresiones por encima del {tolerance:.0%}:")
+    for line in regressions:
+        print(f"  {line}")
+    return 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks de evaluación, generaciones y memoria sobre ROMs sintéticas."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    evaluation = commands.add_parser(
+        "evaluation", help="Compara la evaluación bot a bot con la evaluación vectorizada."
+    )
+    evaluation.add_argument(
+        "--bots", type=int, nargs="+", default=[500, 10_000, 100_000],
+        help="Tamaños de población a medir.",
+    )
+
+    backend = commands.add_parser(
+        "backend", help="Mide frames por segundo del intérprete 6502 (NROM)."
+    )
+    backend.add_argument("--frames", type=int, default=600, help="Frames a emular.")
+    backend.add_argument(
+        "--episodes", type=int, default=4, help="Episodios completos de bots a evaluar."
+    )
+
+    suite = commands.add_parser(
+        "suite", help="Mide bots/s, latencia p50/p99, RSS pico y bytes por bot."
+    )
+    suite.add_argument(
+        "--bots", type=int, nargs="+", default=DEFAULT_SIZES,
+        help="Tamaños de población a medir.",
+    )
+    suite.add_argument(
+        "--workers", type=int, nargs="+", default=DEFAULT_WORKERS,
+        help="Números de procesos de evaluación a medir.",
+    )
+    suite.add_argument(
+        "--generations", type=int, default=5, help="Generaciones medidas por configuración."
+    )
+    suite.add_argument(
+        "--calls", type=int, default=2000, help="Llamadas por microbenchmark."
+    )
+    suite.add_argument(
+        "--output", default="benchmark.json", help="Archivo JSON de resultados."
+    )
+    suite.add_argument("--baseline", help="Resultados de referencia para detectar regresiones.")
+    suite.add_argument(
+        "--tolerance", type=float, default=0.10,
+        help="Empeoramiento relativo tolerado antes de marcar una regresión.",
+    )
+
+    pipeline = commands.add_parser(
+        "pipeline", help="Compara generaciones por segundo con y sin generaciones solapadas."
+    )
+    pipeline.add_argument(
+        "--bots", type=int, nargs="+", default=[100_000, 1_000_000], help="Bots por generación."
+    )
+    pipeline.add_argument(
+        "--workers", type=int, default=4, help="Procesos de evaluación (1 = en el mismo proceso)."
+    )
+    pipeline.add_argument(
+        "--generations", type=int, default=5, help="Generaciones medidas por configuración."
+    )
+
+    islands = commands.add_parser(
+        "islands", help="Compara el tiempo hasta el objetivo de una población única y de islas."
+    )
+    islands.add_argument("--bots", type=int, default=10_000, help="Bots totales por generación.")
+    islands.add_argument("--islands", type=int, default=4, help="Número de islas.")
+    islands.add_argument(
+        "--migration-interval", type=int, default=5, help="Generaciones entre migraciones."
+    )
+    islands.add_argument("--migrants", type=int, default=5, help="Élites que emigra cada isla.")
+    islands.add_argument("--topology", choices=TOPOLOGIES, default=TOPOLOGY_RING)
+    islands.add_argument(
+        "--max-generations", type=int, default=200, help="Límite de generaciones por ejecución."
+    )
+    islands.add_argument("--seed", type=int, default=42, help="Semilla de las poblaciones.")
+
+    optimizers = commands.add_parser(
+        "optimizers",
+        help="Compara evaluaciones y tiempo hasta el objetivo de cada optimizador.",
+    )
+    optimizers.add_argument(
+        "--bots", type=int, nargs="+", default=[2_000, 20_000], help="Bots por generación."
+    )
+    optimizers.add_argument(
+        "--optimizers", nargs="+", choices=OPTIMIZERS, default=list(OPTIMIZERS)
+    )
+    optimizers.add_argument(
+        "--success-rate",
+        type=float,
+        default=0.95,
+        help="Tasa de éxito de la población que cuenta como objetivo alcanzado.",
+    )
+    optimizers.add_argument(
+        "--max-generations", type=int, default=200, help="Límite de generaciones por ejecución."
+    )
+    optimizers.add_argument(
+        "--seeds", type=int, nargs="+", default=[42, 7, 1234], help="Semillas a promediar."
+    )
+    optimizers.add_argument("--output", help="Archivo JSON opcional con los resultados.")
+
+    compare = commands.add_parser(
+        "compare", help="Compara dos archivos de resultados y marca regresiones."
+    )
+    compare.add_argument("current", help="Resultados a evaluar.")
+    compare.add_argument("baseline", help="Resultados de referencia.")
+    compare.add_argument(
+        "--tolerance", type=float, default=0.10,
+        help="Empeoramiento relativo tolerado antes de marcar una regresión.",
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command in ("suite", "compare") and args.tolerance < 0:
+        parser.error("La tolerancia no puede ser negativa.")
+
+    if args.command == "evaluation":
+        if any(bot_count <= 0 for bot_count in args.bots):
+            parser.error("El número de bots debe ser mayor a 0.")
+        with tempfile.TemporaryDirectory() as workdir:
+            rom_path = write_synthetic_rom(Path(workdir) / "synthetic.nes")
+            rows: List[Dict[str, float]] = [
+                benchmark_evaluation(rom_path, bot_count) for bot_count in args.bots
+            ]
+        print(f"{'bots':>10} {'bucle bots/s':>16} {'vectorizado bots/s':>20} {'aceleración':>12}")
+        for row in rows:
+            print(
+                f"{row['bots']:>10} "
+                f"{row['loop_bots_per_second']:>16,.0f} "
+                f"{row['vectorized_bots_per_second']:>20,.0f} "
+                f"{row['speedup']:>11.1f}x"
+            )
+        return 0
+
+    if args.command == "backend":
+        if args.frames <= 0 or args.episodes <= 0:
+            parser.error("Los frames y episodios deben ser mayores a 0.")
+        row = benchmark_backend(args.frames, args.episodes)
+        print(
+            f"{row['frames']} frames: {row['frames_per_second']:,.1f} frames/s "
+            f"({row['realtime_factor']:.2f}x tiempo real, "
+            f"{row['cycles_per_second'] / 1e6:.2f} M ciclos/s)"
+        )
+        print(
+            f"episodios: {row['episodes_per_second']:.2f}/s "
+            f"({row['episode_frames_per_second']:,.1f} frames de juego/s)"
+        )
+        print(
+            f"con snapshots: {row['episodes_per_second_snapshots']:.2f}/s "
+            f"({row['snapshot_speedup']:.2f}x, {row['frames_restored_ratio']:.2f}x frames "
+            f"restaurados, {row['snapshot_prefix_hits']} prefijos reutilizados)"
+        )
+        return 0
+
+    if args.command == "pipeline":
+        if any(bot_count < 8 for bot_count in args.bots):
+            parser.error("Se necesitan al menos 8 bots por generación.")
+        if args.workers <= 0 or args.generations <= 0:
+            parser.error("Los procesos y las generaciones deben ser mayores a 0.")
+        with tempfile.TemporaryDirectory() as workdir:
+            rom_path = write_synthetic_rom(Path(workdir) / "synthetic.nes")
+            print(f"{'bots':>10} {'secuencial gen/s':>18} {'solapado gen/s':>16} {'ganancia':>10}")
+            for bot_count in args.bots:
+                sequential, pipelined = (
+                    measure_generations(
+                        rom_path, bot_count, args.workers, args.generations, pipelined
+                    )
+                    for pipelined in (False, True)
+                )
+                gain = pipelined["generations_per_second"] / sequential["generations_per_second"]
+                print(
+                    f"{bot_count:>10} "
+                    f"{sequential['generations_per_second']:>18.2f} "
+                    f"{pipelined['generations_per_second']:>16.2f} "
+                    f"{gain:>9.2f}x"
+                )
+        return 0
+
+    if args.command == "islands":
+        if args.islands <= 1 or args.bots < 2 * args.islands:
+            parser.error("Se necesitan al menos 2 islas con 2 bots cada una.")
+        if args.migration_interval <= 0 or args.max_generations <= 0:
+            parser.error("El intervalo de migración y el límite deben ser mayores a 0.")
+        for measurement in compare_islands(
+            args.bots,
+            args.islands,
+            args.migration_interval,
+            args.migrants,
+            args.topology,
+            args.max_generations,
+            args.seed,
+        ):
+            print(format_measurement(measurement))
+        return 0
+
+    if args.command == "optimizers":
+        if any(bot_count < 2 for bot_count in args.bots):
+            parser.error("Se necesitan al menos 2 bots por generación.")
+        if not 0 < args.success_rate <= 1 or args.max_generations <= 0:
+            parser.error("La tasa de éxito debe estar en (0, 1] y el límite ser mayor a 0.")
+        rows = compare_optimizers(
+            args.bots, args.optimizers, args.success_rate, args.max_generations, args.seeds
+        )
+        print(
+            f"{'bots':>10} {'optimizador':>12} {'generaciones':>13} "
+            f"{'evaluaciones':>14} {'segundos':>9}"
+        )
+        for bot_count in args.bots:
+            for name in args.optimizers:
+                runs = [
+                    row for row in rows if row["bots"] == bot_count and row["optimizer"] == name
+                ]
+                print(
+                    f"{bot_count:>10} {name:>12} "
+                    f"{np.mean([row['generations'] for row in runs]):>13.1f} "
+                    f"{np.mean([row['evaluations'] for row in runs]):>14,.0f} "
+                    f"{np.mean([row['seconds_to_goal'] for row in runs]):>9.2f}"
+                )
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as handle:
+                json.dump(
+                    {
+                        "version": RESULTS_VERSION,
+                        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                        "results": rows,
+                    },
+                    handle,
+                    ensure_ascii=False,
+                    indent=2,
+                )
+        return 0
+
+    if args.command == "compare":
+        try:
+            current = load_results(args.current)
+            baseline = load_results(args.baseline)
+        except (OSError, ValueError) as exc:
+            parser.error(str(exc))
+        return report_regressions(compare_results(current, baseline, args.tolerance), args.tolerance)
+
+    if any(bot_count <= 0 for bot_count in args.bots):
+        parser.error("El número de bots debe ser mayor a 0.")
+    if any(workers <= 0 for workers in args.workers):
+        parser.error("El número de procesos debe ser mayor a 0.")
+    if args.generations <= 0 or args.calls <= 0:
+        parser.error("Las generaciones y llamadas deben ser mayores a 0.")
+    baseline = None
+    if args.baseline:
+        try:
+            baseline = load_results(args.baseline)
+        except (OSError, ValueError) as exc:
+            parser.error(str(exc))
+
+    results = run_suite(args.bots, args.workers, args.generations, args.calls)
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(results, handle, ensure_ascii=False, indent=2)
+    if baseline is None:
+        return 0
+    return report_regressions(compare_results(results, baseline, args.tolerance), args.tolerance)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
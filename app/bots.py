@@ -1,11 +1,62 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import heapq
+import math
+import threading
+import time
+from dataclasses import dataclass, field
 from random import Random
-from typing import Dict, List
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TYPE_CHECKING
 
-from emulation import EmulatorSession, EpisodeResult
+import numpy as np
+
+from emulation import (
+    ACTION_KEYS,
+    GENE_COUNT,
+    GENE_NAMES,
+    JUMP_TIMING,
+    REACTION_TIME,
+    RISK_TOLERANCE,
+    EmulatorSession,
+    EpisodeBatch,
+    EpisodeResult,
+)
+from optimizers import GeneticOptimizer, Optimizer
 from presets import ControlPreset
+from profiling import (
+    PHASE_BREEDING,
+    PHASE_EVALUATION,
+    PHASE_RANKING,
+    GenerationProfiler,
+    GenerationTimings,
+    PhaseTimer,
+)
+from streams import (
+    PURPOSE_BREED,
+    PURPOSE_EVALUATE,
+    PURPOSE_INIT,
+    CounterRandom,
+    stream_keys,
+    stream_uniforms,
+)
+
+if TYPE_CHECKING:
+    from fitness_cache import CacheStats, EvaluationCache
+    from parallel import ParallelEvaluator
+
+GENE_INIT_RANGES = (
+    (0.4, 1.0),
+    (0.4, 1.0),
+    (0.0, 0.6),
+    (0.0, 0.8),
+    (0.1, 0.6),
+    (0.2, 0.9),
+    (0.2, 0.9),
+)
+ELITE_REPORT_SIZE = 5
+PIPELINE_OVERLAP = 0.25
+MUTATION_DELTAS = (0.12, 0.12, 0.12, 0.12, 0.08, 0.12, 0.12)
+BREED_DRAWS = 2 + 2 * GENE_COUNT
 
 
 @dataclass
@@ -17,18 +68,24 @@ class BotGenome:
 
     @classmethod
     def random(cls, rng: Random) -> "BotGenome":
+        return cls.from_vector([rng.uniform(low, high) for low, high in GENE_INIT_RANGES])
+
+    @classmethod
+    def from_vector(cls, values: List[float]) -> "BotGenome":
         return cls(
-            action_biases={
-                "RUN": rng.uniform(0.4, 1.0),
-                "JUMP": rng.uniform(0.4, 1.0),
-                "DUCK": rng.uniform(0.0, 0.6),
-                "FIRE": rng.uniform(0.0, 0.8),
-            },
-            reaction_time=rng.uniform(0.1, 0.6),
-            risk_tolerance=rng.uniform(0.2, 0.9),
-            jump_timing=rng.uniform(0.2, 0.9),
+            action_biases={key: float(values[index]) for index, key in enumerate(ACTION_KEYS)},
+            reaction_time=float(values[len(ACTION_KEYS)]),
+            risk_tolerance=float(values[len(ACTION_KEYS) + 1]),
+            jump_timing=float(values[len(ACTION_KEYS) + 2]),
         )
 
+    def as_vector(self) -> List[float]:
+        return [self.action_biases[key] for key in ACTION_KEYS] + [
+            self.reaction_time,
+            self.risk_tolerance,
+            self.jump_timing,
+        ]
+
     def mutate(self, rng: Random) -> "BotGenome":
         def tweak(value: float, delta: float = 0.12) -> float:
             return min(1.0, max(0.0, value + rng.uniform(-delta, delta)))
@@ -53,6 +110,157 @@ class BotGenome:
         )
 
 
+def genomes_to_matrix(genomes: List[BotGenome]) -> np.ndarray:
+    return np.array([genome.as_vector() for genome in genomes], dtype=np.float64)
+
+
+def random_genome_matrix(seed: int, count: int) -> np.ndarray:
+    lows = np.array([low for low, _ in GENE_INIT_RANGES])
+    highs = np.array([high for _, high in GENE_INIT_RANGES])
+    uniforms = stream_uniforms(seed, 0, np.arange(count), PURPOSE_INIT, len(GENE_INIT_RANGES))
+    return lows + (highs - lows) * uniforms
+
+
+class GenomeView:
+    __slots__ = ("_pool", "index")
+
+    def __init__(self, pool: "GenomePool", index: int) -> None:
+        self._pool = pool
+        self.index = index
+
+    @property
+    def action_biases(self) -> Dict[str, float]:
+        return {
+            key: float(self._pool.genes[column, self.index])
+            for column, key in enumerate(ACTION_KEYS)
+        }
+
+    @property
+    def reaction_time(self) -> float:
+        return float(self._pool.genes[REACTION_TIME, self.index])
+
+    @property
+    def risk_tolerance(self) -> float:
+        return float(self._pool.genes[RISK_TOLERANCE, self.index])
+
+    @property
+    def jump_timing(self) -> float:
+        return float(self._pool.genes[JUMP_TIMING, self.index])
+
+    def as_vector(self) -> List[float]:
+        return [float(value) for value in self._pool.genes[:, self.index]]
+
+    def to_genome(self) -> BotGenome:
+        return BotGenome.from_vector(self.as_vector())
+
+    def mutate(self, rng: Random) -> BotGenome:
+        return self.to_genome().mutate(rng)
+
+    def crossover(self, rng: Random, other: BotGenome) -> BotGenome:
+        return self.to_genome().crossover(rng, other)
+
+
+class GenomePool:
+    def __init__(self, genes: np.ndarray) -> None:
+        self.genes = np.ascontiguousarray(genes, dtype=np.float32)
+        self._spare = np.empty_like(self.genes)
+
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray) -> "GenomePool":
+        return cls(np.asarray(matrix).T)
+
+    @classmethod
+    def from_genomes(cls, genomes: List[BotGenome]) -> "GenomePool":
+        return cls.from_matrix(genomes_to_matrix(genomes))
+
+    def __len__(self) -> int:
+        return self.genes.shape[1]
+
+    def __getitem__(self, index: int) -> GenomeView:
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        return GenomeView(self, index % len(self))
+
+    def __iter__(self) -> Iterator[GenomeView]:
+        return (GenomeView(self, index) for index in range(len(self)))
+
+    @property
+    def nbytes(self) -> int:
+        return self.genes.nbytes + self._spare.nbytes
+
+    def column(self, name: str) -> np.ndarray:
+        return self.genes[GENE_NAMES.index(name)]
+
+    def matrix(self) -> np.ndarray:
+        return self.genes.T
+
+    def genome(self, index: int) -> BotGenome:
+        return self[index].to_genome()
+
+    def breed(
+        self,
+        elite_indices: np.ndarray,
+        seed: int,
+        generation: int,
+        chunk_size: int = 65536,
+        prebred: int = 0,
+    ) -> None:
+        elite_indices = np.asarray(elite_indices, dtype=np.int64)
+        elite_count = len(elite_indices)
+        elites = self.genes[:, elite_indices].astype(np.float64)
+        self._spare[:, :elite_count] = elites
+        self._breed_offspring(
+            elites, seed, generation, elite_count + prebred, len(self), chunk_size
+        )
+        self._spare, self.genes = self.genes, self._spare
+
+    def breed_early(
+        self,
+        elite_indices: np.ndarray,
+        seed: int,
+        generation: int,
+        count: int,
+        chunk_size: int = 65536,
+    ) -> Tuple[int, np.ndarray]:
+        elite_indices = np.asarray(elite_indices, dtype=np.int64)
+        start = len(elite_indices)
+        stop = min(len(self), start + count)
+        elites = self.genes[:, elite_indices].astype(np.float64)
+        self._breed_offspring(elites, seed, generation, start, stop, chunk_size)
+        return start, self._spare[:, start:stop].T.copy()
+
+    def _breed_offspring(
+        self,
+        elites: np.ndarray,
+        seed: int,
+        generation: int,
+        first: int,
+        last: int,
+        chunk_size: int,
+    ) -> None:
+        elite_count = elites.shape[1]
+        deltas = np.array(MUTATION_DELTAS)[:, None]
+        action_count = len(ACTION_KEYS)
+        for start in range(first, last, max(1, chunk_size)):
+            stop = min(last, start + chunk_size)
+            draws = stream_uniforms(
+                seed, generation, np.arange(start, stop), PURPOSE_BREED, BREED_DRAWS
+            )
+            parent_a = elites[:, (draws[:, 0] * elite_count).astype(np.int64)]
+            parent_b = elites[:, (draws[:, 1] * elite_count).astype(np.int64)]
+            take_a = np.concatenate(
+                [
+                    draws[:, 2 : 2 + action_count] > 0.5,
+                    draws[:, 2 + action_count : 2 + GENE_COUNT] < 0.5,
+                ],
+                axis=1,
+            ).T
+            children = np.where(take_a, parent_a, parent_b)
+            children += -deltas + (deltas - -deltas) * draws[:, 2 + GENE_COUNT :].T
+            np.clip(children, 0.0, 1.0, out=children)
+            self._spare[:, start:stop] = children
+
+
 @dataclass
 class BotState:
     distance: float
@@ -63,6 +271,62 @@ class BotState:
     genome: BotGenome
 
 
+@dataclass
+class HalvingSchedule:
+    episode_fractions: Tuple[float, ...] = (0.25, 0.5)
+    keep_fraction: float = 0.25
+
+
+@dataclass
+class HalvingStats:
+    episode_frames: int
+    frame_budgets: List[int]
+    rung_sizes: List[int]
+    frames_simulated: int
+    frames_full_estimate: int
+    compute_saved: float
+
+
+class _Prefetch:
+    def __init__(
+        self,
+        generation: int,
+        start_index: int,
+        count: int,
+        evaluate: Callable[[], EpisodeBatch],
+        background: bool,
+    ) -> None:
+        self.generation = generation
+        self.start_index = start_index
+        self.count = count
+        self._evaluate = evaluate
+        self._batch: Optional[EpisodeBatch] = None
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+        if background:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            self._batch = self._evaluate()
+        except BaseException as error:
+            self._error = error
+
+    def wait(self) -> None:
+        if self._thread is not None:
+            self._thread.join()
+
+    def result(self) -> EpisodeBatch:
+        if self._thread is None:
+            self._run()
+        else:
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._batch
+
+
 @dataclass
 class GenerationResult:
     generation: int
@@ -74,45 +338,540 @@ class GenerationResult:
     leader_state: BotState
     elite_states: List[BotState]
     goal_reached: bool
+    cache_stats: Optional[CacheStats] = field(default=None, compare=False)
+    timings: Optional[GenerationTimings] = field(default=None, compare=False)
+    halving_stats: Optional[HalvingStats] = field(default=None, compare=False)
+
+
+def top_k_positions(
+    distance: np.ndarray, time_seconds: np.ndarray, indices: np.ndarray, k: int
+) -> np.ndarray:
+    candidates = np.arange(len(distance))
+    if len(distance) > k:
+        threshold = np.partition(distance, len(distance) - k)[len(distance) - k]
+        better = np.flatnonzero(distance > threshold)
+        tied = np.flatnonzero(distance == threshold)
+        needed = k - len(better)
+        if len(tied) > needed:
+            tied_times = time_seconds[tied]
+            time_threshold = np.partition(tied_times, needed - 1)[needed - 1]
+            faster = tied[tied_times < time_threshold]
+            same = tied[tied_times == time_threshold]
+            same = same[np.argsort(indices[same], kind="stable")[: needed - len(faster)]]
+            tied = np.concatenate([faster, same])
+        candidates = np.concatenate([better, tied])
+    order = np.lexsort(
+        (indices[candidates], time_seconds[candidates], -distance[candidates])
+    )
+    return candidates[order]
+
+
+class GenerationAggregator:
+    def __init__(self, goal_distance: float, top_k: int) -> None:
+        self.goal_distance = goal_distance
+        self.top_k = max(1, top_k)
+        self.count = 0
+        self.evaluated = 0
+        self.distance_total = 0.0
+        self.time_total = 0.0
+        self.successes = 0
+        self._heap: List[Tuple[float, float, int, BotState]] = []
+        self.top_indices = np.empty(0, dtype=np.int64)
+        self._top_batch: Optional[EpisodeBatch] = None
+
+    @property
+    def average_distance(self) -> float:
+        return self.distance_total / max(1, self.count)
+
+    @property
+    def average_time(self) -> float:
+        return self.time_total / max(1, self.count)
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / max(1, self.count)
+
+    def add_state(self, index: int, state: BotState) -> None:
+        self.count += 1
+        self.evaluated += 1
+        self.distance_total += state.distance
+        self.time_total += state.time_seconds
+        if state.distance >= self.goal_distance:
+            self.successes += 1
+        entry = (state.distance, -state.time_seconds, -index, state)
+        if len(self._heap) < self.top_k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:3] > self._heap[0][:3]:
+            heapq.heapreplace(self._heap, entry)
+
+    def add_batch(
+        self, start_index: int, batch: EpisodeBatch, full: Optional[np.ndarray] = None
+    ) -> None:
+        complete = batch if full is None else batch.take(full)
+        self.count += len(complete)
+        self.evaluated += len(batch)
+        self.distance_total += float(complete.distance.sum())
+        self.time_total += float(complete.time_seconds.sum())
+        self.successes += int(np.count_nonzero(complete.distance >= self.goal_distance))
+        indices = np.arange(start_index, start_index + len(batch), dtype=np.int64)
+        if self._top_batch is not None:
+            batch = EpisodeBatch.concatenate([self._top_batch, batch])
+            indices = np.concatenate([self.top_indices, indices])
+        keep = top_k_positions(batch.distance, batch.time_seconds, indices, self.top_k)
+        self._top_batch = batch.take(keep)
+        self.top_indices = indices[keep]
+
+    @property
+    def leader_index(self) -> int:
+        if len(self.top_indices):
+            return int(self.top_indices[0])
+        return -max(self._heap, key=lambda entry: entry[:3])[2]
+
+    def ranked_states(self) -> List[BotState]:
+        return [entry[3] for entry in sorted(self._heap, key=lambda entry: entry[:3], reverse=True)]
+
+    def ranked_episodes(self, limit: int) -> List[Tuple[int, EpisodeResult]]:
+        if self._top_batch is None:
+            return []
+        return [
+            (int(self.top_indices[position]), self._top_batch.episode(position))
+            for position in range(min(limit, len(self._top_batch)))
+        ]
 
 
 class BotPopulation:
     def __init__(
-        self, bot_count: int, preset: ControlPreset, elite_fraction: float = 0.15
+        self,
+        bot_count: int,
+        preset: ControlPreset,
+        elite_fraction: float = 0.15,
+        vectorized: bool = False,
+        evaluator: Optional[ParallelEvaluator] = None,
+        seed: int = 42,
+        chunk_size: int = 65536,
+        cache: Optional[EvaluationCache] = None,
+        profiler: Optional[GenerationProfiler] = None,
+        halving: Optional[HalvingSchedule] = None,
+        optimizer: Optional[Optimizer] = None,
+        pipelined: bool = False,
+        pipeline_overlap: float = PIPELINE_OVERLAP,
     ) -> None:
+        if halving is not None and cache is not None:
+            raise ValueError("La evaluación por etapas no es compatible con la caché.")
+        if pipelined and (halving is not None or cache is not None):
+            raise ValueError(
+                "Las generaciones solapadas no son compatibles con la caché ni con la "
+                "evaluación por etapas."
+            )
+        if pipelined and optimizer is not None and not isinstance(optimizer, GeneticOptimizer):
+            raise ValueError("Las generaciones solapadas requieren el optimizador genético.")
         self.bot_count = bot_count
         self.preset = preset
         self.elite_fraction = max(0.05, min(0.4, elite_fraction))
-        rng = Random(42)
-        self.genomes = [BotGenome.random(rng) for _ in range(bot_count)]
+        self.optimizer = optimizer or GeneticOptimizer()
+        self.vectorized = (
+            vectorized
+            or evaluator is not None
+            or cache is not None
+            or halving is not None
+            or not isinstance(self.optimizer, GeneticOptimizer)
+            or pipelined
+        )
+        self.pipelined = pipelined
+        self.pipeline_overlap = max(0.05, min(0.5, pipeline_overlap))
+        self._prefetch: Optional[_Prefetch] = None
+        self.evaluator = evaluator
+        self.cache = cache
+        self.profiler = profiler
+        self.halving = halving
+        self.observers: List[Callable[[GenerationTimings], None]] = []
+        self.seed = seed
+        self.chunk_size = max(1, chunk_size)
+        initial_genes = random_genome_matrix(seed, bot_count)
+        self.pool: Optional[GenomePool] = None
+        self._genomes: List[BotGenome] = []
+        if self.vectorized:
+            self.pool = GenomePool.from_matrix(initial_genes)
+        else:
+            self._genomes = [BotGenome.from_vector(row) for row in initial_genes]
+
+    @property
+    def genomes(self) -> Sequence[BotGenome]:
+        if self.pool is not None:
+            return self.pool
+        return self._genomes
+
+    @genomes.setter
+    def genomes(self, genomes: Sequence[BotGenome]) -> None:
+        if self.pool is not None:
+            self.pool = GenomePool.from_genomes(list(genomes))
+            self.optimizer.reset()
+            self._prefetch = None
+        else:
+            self._genomes = list(genomes)
+
+    def genome_matrix(self) -> np.ndarray:
+        if self.pool is not None:
+            return self.pool.matrix()
+        return genomes_to_matrix(self._genomes)
+
+    def load_genome_matrix(self, matrix: np.ndarray) -> None:
+        self.bot_count = len(matrix)
+        if self.pool is not None:
+            self.pool = GenomePool.from_matrix(matrix)
+            self.optimizer.reset()
+            self._prefetch = None
+        else:
+            self._genomes = [BotGenome.from_vector(row) for row in matrix]
+
+    def drain_prefetch(self) -> None:
+        prefetch, self._prefetch = self._prefetch, None
+        if prefetch is not None:
+            prefetch.wait()
+
+    def add_observer(self, observer: Callable[[GenerationTimings], None]) -> None:
+        self.observers.append(observer)
+
+    def remove_observer(self, observer: Callable[[GenerationTimings], None]) -> None:
+        if observer in self.observers:
+            self.observers.remove(observer)
 
     def run_generation(
         self, session: EmulatorSession, generation: int
     ) -> GenerationResult:
-        rng = Random(session.seed + generation * 17)
-        results = [self._simulate_bot(session, genome, rng) for genome in self.genomes]
-        results.sort(key=lambda state: (-state.distance, state.time_seconds))
-        leader_state = results[0]
-        avg_distance = sum(state.distance for state in results) / len(results)
-        avg_time = sum(state.time_seconds for state in results) / len(results)
-        success_rate = sum(1 for state in results if state.distance >= session.goal_distance) / len(
-            results
-        )
-        goal_reached = leader_state.distance >= session.goal_distance
-        elite_count = max(2, int(len(results) * self.elite_fraction))
-        elite_states = results[: min(5, elite_count)]
-        self.genomes = self._next_generation(results, elite_count, rng)
+        if self.profiler is not None:
+            self.profiler.begin(generation)
+        try:
+            result = self._run_generation(session, generation)
+        finally:
+            if self.profiler is not None:
+                self.profiler.end(generation)
+        for observer in list(self.observers):
+            observer(result.timings)
+        return result
+
+    def _run_generation(
+        self, session: EmulatorSession, generation: int
+    ) -> GenerationResult:
+        timer = PhaseTimer()
+        elite_count = max(2, int(self.bot_count * self.elite_fraction))
+        aggregator = GenerationAggregator(session.goal_distance, elite_count)
+        cache_stats = None
+        halving_stats = None
+        if self.cache is not None:
+            cache_stats = self.cache.begin_generation(session.seed, self.preset)
+        snapshot_stats = session.snapshot_stats.copy()
+        if self.vectorized:
+            genes = self.genome_matrix()
+            prefetch = self._prefetch
+            self._prefetch = None
+            if prefetch is not None and prefetch.generation != generation:
+                prefetch = None
+            prefetch_count = (
+                math.ceil(self.bot_count * self.pipeline_overlap) if self.pipelined else 0
+            )
+            if self.pipelined:
+                chunks = self._pipelined_chunks(
+                    session, genes, generation, prefetch, max(1, prefetch_count)
+                )
+                if prefetch is not None:
+                    timer.count("bots_prefetched", prefetch.count)
+            elif self.halving is not None:
+                with timer.phase(PHASE_EVALUATION):
+                    batch, full, halving_stats = self._evaluate_halving(
+                        session, genes, generation, elite_count
+                    )
+                chunks = iter([(0, batch, full)])
+                timer.count("frames_simulated", halving_stats.frames_simulated)
+            else:
+                chunks = self._evaluate_chunks(session, genes, generation)
+            while True:
+                with timer.phase(PHASE_EVALUATION):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                with timer.phase(PHASE_RANKING):
+                    aggregator.add_batch(*chunk)
+                timer.count("chunks")
+                if (
+                    self.pipelined
+                    and self._prefetch is None
+                    and aggregator.evaluated >= self.bot_count - prefetch_count
+                    and len(aggregator.top_indices) == elite_count
+                    and elite_count + prefetch_count <= self.bot_count
+                ):
+                    with timer.phase(PHASE_BREEDING):
+                        self._prefetch = self._breed_early(
+                            session, aggregator.top_indices, generation, prefetch_count
+                        )
+            with timer.phase(PHASE_RANKING):
+                ranked = [
+                    self._state_from_episode(index, episode)
+                    for index, episode in aggregator.ranked_episodes(ELITE_REPORT_SIZE)
+                ]
+            with timer.phase(PHASE_BREEDING):
+                if self._prefetch is not None:
+                    self.pool.breed(
+                        aggregator.top_indices,
+                        self.seed,
+                        generation,
+                        self.chunk_size,
+                        prebred=self._prefetch.count,
+                    )
+                else:
+                    self.optimizer.breed(
+                        self.pool, aggregator.top_indices, self.seed, generation, self.chunk_size
+                    )
+        else:
+            evaluation_seconds = 0.0
+            ranking_seconds = 0.0
+            for index, genome in enumerate(self.genomes):
+                started = time.perf_counter()
+                state = self._simulate_bot(session, genome, session.bot_stream(generation, index))
+                evaluated = time.perf_counter()
+                aggregator.add_state(index, state)
+                evaluation_seconds += evaluated - started
+                ranking_seconds += time.perf_counter() - evaluated
+            timer.add(PHASE_EVALUATION, evaluation_seconds)
+            with timer.phase(PHASE_RANKING):
+                elite_states = aggregator.ranked_states()
+            timer.add(PHASE_RANKING, ranking_seconds)
+            ranked = elite_states[:ELITE_REPORT_SIZE]
+            with timer.phase(PHASE_BREEDING):
+                self.genomes = self._next_generation(elite_states, elite_count, generation)
+        timer.count("bots_evaluated", aggregator.evaluated)
+        if cache_stats is not None:
+            timer.count("cache_hits", cache_stats.hits)
+        snapshot_stats = session.snapshot_stats.since(snapshot_stats)
+        if snapshot_stats.episodes:
+            timer.count("frames_emulated", snapshot_stats.frames_emulated)
+            timer.count("frames_restored", snapshot_stats.frames_restored)
+            timer.count("snapshot_prefix_hits", snapshot_stats.prefix_hits)
 
+        leader_state = ranked[0]
+        leader_genes = leader_state.genome.as_vector()
+        with timer.phase(PHASE_RANKING):
+            session.record_leader(
+                leader_genes,
+                generation,
+                aggregator.leader_index,
+                leader_state.time_seconds,
+                self.preset,
+                None if self.cache is None else int(self.cache.keys(np.array([leader_genes]))[0]),
+            )
         return GenerationResult(
             generation=generation,
             best_distance=leader_state.distance,
             best_time=leader_state.time_seconds,
-            avg_distance=round(avg_distance, 2),
-            avg_time=round(avg_time, 2),
-            success_rate=success_rate,
+            avg_distance=round(aggregator.average_distance, 2),
+            avg_time=round(aggregator.average_time, 2),
+            success_rate=aggregator.success_rate,
             leader_state=leader_state,
-            elite_states=elite_states,
-            goal_reached=goal_reached,
+            elite_states=ranked,
+            goal_reached=leader_state.distance >= session.goal_distance,
+            cache_stats=cache_stats,
+            timings=timer.finish(generation),
+            halving_stats=halving_stats,
+        )
+
+    def _evaluate_chunks(
+        self, session: EmulatorSession, genes: np.ndarray, generation: int
+    ) -> Iterator[Tuple[int, EpisodeBatch]]:
+        if self.cache is not None:
+            for start_index in range(0, len(genes), self.chunk_size):
+                chunk = genes[start_index : start_index + self.chunk_size]
+                yield start_index, self.cache.evaluate(
+                    chunk,
+                    lambda subset, keys: self._evaluate_keyed(session, subset, generation, keys),
+                )
+            return
+        if self.evaluator is not None:
+            yield from self.evaluator.evaluate_chunks(genes, generation)
+            return
+        for start_index in range(0, len(genes), self.chunk_size):
+            chunk = genes[start_index : start_index + self.chunk_size]
+            yield start_index, session.evaluate_population(
+                chunk, generation, self.preset, start_index=start_index
+            )
+
+    def _pipelined_chunks(
+        self,
+        session: EmulatorSession,
+        genes: np.ndarray,
+        generation: int,
+        prefetch: Optional[_Prefetch],
+        chunk_size: int,
+    ) -> Iterator[Tuple[int, EpisodeBatch]]:
+        ranges = [(0, len(genes))]
+        if prefetch is not None:
+            ranges = [
+                (0, prefetch.start_index),
+                (prefetch.start_index + prefetch.count, len(genes)),
+            ]
+        for start, stop in ranges:
+            if stop > start:
+                yield from self._evaluate_block(
+                    session, genes[start:stop], generation, start, chunk_size
+                )
+        if prefetch is not None:
+            yield prefetch.start_index, prefetch.result()
+
+    def _evaluate_block(
+        self,
+        session: EmulatorSession,
+        genes: np.ndarray,
+        generation: int,
+        start_index: int,
+        chunk_size: int,
+    ) -> Iterator[Tuple[int, EpisodeBatch]]:
+        if self.evaluator is not None:
+            noise_keys = stream_keys(
+                session.seed,
+                generation,
+                np.arange(start_index, start_index + len(genes)),
+                PURPOSE_EVALUATE,
+            )
+            for offset, batch in self.evaluator.evaluate_chunks(genes, generation, noise_keys):
+                yield start_index + offset, batch
+            return
+        for offset in range(0, len(genes), chunk_size):
+            yield start_index + offset, session.evaluate_population(
+                genes[offset : offset + chunk_size],
+                generation,
+                self.preset,
+                start_index=start_index + offset,
+            )
+
+    def _breed_early(
+        self,
+        session: EmulatorSession,
+        elite_indices: np.ndarray,
+        generation: int,
+        count: int,
+    ) -> _Prefetch:
+        start, genes = self.pool.breed_early(
+            elite_indices, self.seed, generation, count, self.chunk_size
+        )
+        next_generation = generation + 1
+        background = (
+            getattr(self.evaluator, "concurrent", False)
+            if self.evaluator is not None
+            else session.backend is None
+        )
+        return _Prefetch(
+            next_generation,
+            start,
+            len(genes),
+            lambda: EpisodeBatch.concatenate(
+                [
+                    batch
+                    for _, batch in self._evaluate_block(
+                        session, genes, next_generation, start, self.chunk_size
+                    )
+                ]
+            ),
+            background,
+        )
+
+    def _evaluate_halving(
+        self, session: EmulatorSession, genes: np.ndarray, generation: int, elite_count: int
+    ) -> Tuple[EpisodeBatch, np.ndarray, HalvingStats]:
+        count = len(genes)
+        results = EpisodeBatch(
+            distance=np.empty(count),
+            time_seconds=np.empty(count),
+            mistakes=np.empty(count, dtype=np.int32),
+            coins=np.empty(count, dtype=np.int32),
+            powerups=np.empty(count, dtype=np.int32),
+        )
+        full = np.zeros(count, dtype=bool)
+        frames_simulated = 0
+        full_frames = 0
+
+        def evaluate(survivors: np.ndarray, budget: Optional[int]) -> int:
+            frames = 0
+            for start in range(0, len(survivors), self.chunk_size):
+                indices = survivors[start : start + self.chunk_size]
+                batch = self._evaluate_indices(session, genes[indices], generation, indices, budget)
+                results.distance[indices] = batch.distance
+                results.time_seconds[indices] = batch.time_seconds
+                results.mistakes[indices] = batch.mistakes
+                results.coins[indices] = batch.coins
+                results.powerups[indices] = batch.powerups
+                frames += int(batch.frames().sum())
+            if budget is None:
+                full[survivors] = True
+            return frames
+
+        probe = np.arange(min(count, elite_count), dtype=np.int64)
+        full_frames = frames_simulated = evaluate(probe, None)
+        episode_frames = max(1, int(np.median(results.take(probe).frames())))
+        budgets = sorted(
+            {max(1, round(episode_frames * fraction)) for fraction in self.halving.episode_fractions}
+        )
+        survivors = np.arange(len(probe), count, dtype=np.int64)
+        rung_sizes: List[int] = []
+        for budget in [*budgets, None]:
+            rung_sizes.append(len(survivors))
+            frames = evaluate(survivors, budget)
+            frames_simulated += frames
+            if budget is None:
+                full_frames += frames
+                break
+            keep = max(elite_count, math.ceil(len(survivors) * self.halving.keep_fraction))
+            if keep < len(survivors):
+                positions = top_k_positions(
+                    results.distance[survivors], results.time_seconds[survivors], survivors, keep
+                )
+                survivors = np.sort(survivors[positions])
+        frames_full_estimate = round(full_frames / max(1, int(full.sum())) * count)
+        return results, full, HalvingStats(
+            episode_frames=episode_frames,
+            frame_budgets=budgets,
+            rung_sizes=rung_sizes,
+            frames_simulated=frames_simulated,
+            frames_full_estimate=frames_full_estimate,
+            compute_saved=max(0.0, 1.0 - frames_simulated / max(1, frames_full_estimate)),
+        )
+
+    def _evaluate_indices(
+        self,
+        session: EmulatorSession,
+        genes: np.ndarray,
+        generation: int,
+        indices: np.ndarray,
+        frame_budget: Optional[int],
+    ) -> EpisodeBatch:
+        noise_keys = stream_keys(session.seed, generation, indices, PURPOSE_EVALUATE)
+        if self.evaluator is not None:
+            return self.evaluator.evaluate(
+                genes, generation, noise_keys=noise_keys, frame_budget=frame_budget
+            )
+        return session.evaluate_population(
+            genes, generation, self.preset, noise_keys=noise_keys, frame_budget=frame_budget
+        )
+
+    def _evaluate_keyed(
+        self,
+        session: EmulatorSession,
+        genes: np.ndarray,
+        generation: int,
+        noise_keys: np.ndarray,
+    ) -> EpisodeBatch:
+        if self.evaluator is not None:
+            return self.evaluator.evaluate(genes, generation, noise_keys=noise_keys)
+        return session.evaluate_population(
+            genes, generation, self.preset, noise_keys=noise_keys
+        )
+
+    def _state_from_episode(self, index: int, episode: EpisodeResult) -> BotState:
+        return BotState(
+            distance=episode.distance,
+            time_seconds=episode.time_seconds,
+            mistakes=episode.mistakes,
+            coins=episode.coins,
+            powerups=episode.powerups,
+            genome=self.pool.genome(index),
         )
 
     def _simulate_bot(
@@ -129,11 +888,12 @@ class BotPopulation:
         )
 
     def _next_generation(
-        self, ranked: List[BotState], elite_count: int, rng: Random
+        self, ranked: List[BotState], elite_count: int, generation: int
     ) -> List[BotGenome]:
         elites = [state.genome for state in ranked[:elite_count]]
         next_gen = elites.copy()
         while len(next_gen) < self.bot_count:
+            rng = CounterRandom(self.seed, generation, len(next_gen), PURPOSE_BREED)
             parent_a = rng.choice(elites)
             parent_b = rng.choice(elites)
             child = parent_a.crossover(rng, parent_b).mutate(rng)
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import math
+import os
+import struct
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from bots import BotGenome, BotPopulation, GenerationResult
+from emulation import GENE_COUNT
+from optimizers import OPTIMIZER_CMAES, OPTIMIZER_GA
+
+CHECKPOINT_MAGIC = b"BLCK"
+CHECKPOINT_VERSION = 3
+SUPPORTED_VERSIONS = (1, 2, 3)
+_HEADER = struct.Struct("<4sHBBIIQqqddd")
+_OPTIMIZER = struct.Struct("<B")
+_OPTIMIZER_CODES = {OPTIMIZER_GA: 1, OPTIMIZER_CMAES: 2}
+_OPTIMIZER_NAMES = {code: name for name, code in _OPTIMIZER_CODES.items()}
+_DTYPES = {0: np.dtype("<f4"), 1: np.dtype("<f8")}
+_STATE_LENGTH = struct.Struct("<I")
+
+
+@dataclass
+class Checkpoint:
+    generation: int
+    population_seed: int
+    session_seed: int
+    elite_fraction: float
+    genes: np.ndarray
+    best_distance: float = 0.0
+    best_time: float = 0.0
+    best_generation: int = 0
+    leader_genome: Optional[BotGenome] = None
+    optimizer_state: np.ndarray = field(default_factory=lambda: np.empty(0))
+    optimizer: Optional[str] = OPTIMIZER_GA
+
+    @property
+    def bot_count(self) -> int:
+        return self.genes.shape[1]
+
+
+def save_checkpoint(path: str, checkpoint: Checkpoint) -> None:
+    dtype_code = 0 if checkpoint.genes.dtype == np.float32 else 1
+    genes = np.ascontiguousarray(checkpoint.genes, dtype=_DTYPES[dtype_code])
+    if checkpoint.optimizer not in _OPTIMIZER_CODES:
+        raise ValueError(f"Optimizador desconocido: {checkpoint.optimizer}.")
+    leader = (
+        checkpoint.leader_genome.as_vector()
+        if checkpoint.leader_genome is not None
+        else [math.nan] * GENE_COUNT
+    )
+    header = _HEADER.pack(
+        CHECKPOINT_MAGIC,
+        CHECKPOINT_VERSION,
+        dtype_code,
+        genes.shape[0],
+        checkpoint.generation,
+        checkpoint.best_generation,
+        genes.shape[1],
+        checkpoint.population_seed,
+        checkpoint.session_seed,
+        checkpoint.elite_fraction,
+        checkpoint.best_distance,
+        checkpoint.best_time,
+    )
+    destination = Path(path)
+    temporary = destination.with_name(f".{destination.name}.tmp")
+    with open(temporary, "wb") as handle:
+        handle.write(header)
+        handle.write(_OPTIMIZER.pack(_OPTIMIZER_CODES[checkpoint.optimizer]))
+        handle.write(np.asarray(leader, dtype="<f8").tobytes())
+        handle.write(memoryview(genes).cast("B"))
+        state = np.ascontiguousarray(checkpoint.optimizer_state, dtype="<f8")
+        handle.write(_STATE_LENGTH.pack(len(state)))
+        handle.write(state.tobytes())
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, destination)
+
+
+def load_checkpoint(path: str) -> Checkpoint:
+    with open(path, "rb") as handle:
+        raw_header = handle.read(_HEADER.size)
+        if len(raw_header) < _HEADER.size:
+            raise ValueError("Checkpoint inválido: cabecera incompleta.")
+        (
+            magic,
+            version,
+            dtype_code,
+            gene_count,
+            generation,
+            best_generation,
+            bot_count,
+            population_seed,
+            session_seed,
+            elite_fraction,
+            best_distance,
+            best_time,
+        ) = _HEADER.unpack(raw_header)
+        if magic != CHECKPOINT_MAGIC:
+            raise ValueError("Checkpoint inválido: firma desconocida.")
+        if version not in SUPPORTED_VERSIONS or dtype_code not in _DTYPES:
+            raise ValueError(f"Checkpoint inválido: versión {version} no soportada.")
+        if gene_count != GENE_COUNT:
+            raise ValueError("Checkpoint inválido: número de genes incompatible.")
+        optimizer = None
+        if version >= 3:
+            raw_optimizer = handle.read(_OPTIMIZER.size)
+            if len(raw_optimizer) < _OPTIMIZER.size:
+                raise ValueError("Checkpoint inválido: cabecera incompleta.")
+            (optimizer_code,) = _OPTIMIZER.unpack(raw_optimizer)
+            if optimizer_code not in _OPTIMIZER_NAMES:
+                raise ValueError("Checkpoint inválido: optimizador desconocido.")
+            optimizer = _OPTIMIZER_NAMES[optimizer_code]
+        leader = np.frombuffer(handle.read(8 * gene_count), dtype="<f8")
+        dtype = _DTYPES[dtype_code]
+        genes = np.fromfile(handle, dtype=dtype, count=gene_count * bot_count)
+        state = np.empty(0)
+        if version >= 2:
+            raw_length = handle.read(_STATE_LENGTH.size)
+            if len(raw_length) < _STATE_LENGTH.size:
+                raise ValueError("Checkpoint inválido: archivo truncado.")
+            (state_length,) = _STATE_LENGTH.unpack(raw_length)
+            state = np.frombuffer(handle.read(8 * state_length), dtype="<f8")
+            if len(state) != state_length:
+                raise ValueError("Checkpoint inválido: archivo truncado.")
+    if len(leader) != gene_count or len(genes) != gene_count * bot_count:
+        raise ValueError("Checkpoint inválido: archivo truncado.")
+    return Checkpoint(
+        generation=generation,
+        population_seed=population_seed,
+        session_seed=session_seed,
+        elite_fraction=elite_fraction,
+        genes=genes.reshape(gene_count, bot_count),
+        best_distance=best_distance,
+        best_time=best_time,
+        best_generation=best_generation,
+        leader_genome=None if np.isnan(leader).any() else BotGenome.from_vector(leader),
+        optimizer_state=state,
+        optimizer=optimizer,
+    )
+
+
+class CheckpointManager:
+    def __init__(self, path: str, interval: int = 10) -> None:
+        self.path = path
+        self.interval = max(1, interval)
+        self.best_distance = 0.0
+        self.best_time = 0.0
+        self.best_generation = 0
+        self.leader_genome: Optional[BotGenome] = None
+        self.last_saved_generation = 0
+
+    def exists(self) -> bool:
+        return Path(self.path).exists()
+
+    def restore(self, population: BotPopulation, session_seed: int) -> int:
+        checkpoint = load_checkpoint(self.path)
+        if checkpoint.session_seed != session_seed:
+            raise ValueError(
+                "El checkpoint se creó con otra ROM: la semilla de la sesión no coincide."
+            )
+        if checkpoint.optimizer is not None and checkpoint.optimizer != population.optimizer.name:
+            raise ValueError(
+                f"El checkpoint se creó con el optimizador {checkpoint.optimizer}, "
+                f"no con {population.optimizer.name}."
+            )
+        population.seed = checkpoint.population_seed
+        population.elite_fraction = checkpoint.elite_fraction
+        population.load_genome_matrix(checkpoint.genes.T)
+        population.optimizer.load_state(checkpoint.optimizer_state)
+        self.best_distance = checkpoint.best_distance
+        self.best_time = checkpoint.best_time
+        self.best_generation = checkpoint.best_generation
+        self.leader_genome = checkpoint.leader_genome
+        self.last_saved_generation = checkpoint.generation
+        return checkpoint.generation + 1
+
+    def observe(
+        self, population: BotPopulation, session_seed: int, result: GenerationResult
+    ) -> bool:
+        leader = result.leader_state
+        if self.leader_genome is None or (leader.distance, -leader.time_seconds) > (
+            self.best_distance,
+            -self.best_time,
+        ):
+            self.best_distance = leader.distance
+            self.best_time = leader.time_seconds
+            self.best_generation = result.generation
+            self.leader_genome = leader.genome
+        if result.generation - self.last_saved_generation < self.interval:
+            return False
+        self.save(population, session_seed, result.generation)
+        return True
+
+    def save(self, population: BotPopulation, session_seed: int, generation: int) -> None:
+        population.drain_prefetch()
+        if population.pool is not None:
+            genes = population.pool.genes
+        else:
+            genes = population.genome_matrix().T
+        save_checkpoint(
+            self.path,
+            Checkpoint(
+                generation=generation,
+                population_seed=population.seed,
+                session_seed=session_seed,
+                elite_fraction=population.elite_fraction,
+                genes=genes,
+                best_distance=self.best_distance,
+                best_time=self.best_time,
+                best_generation=self.best_generation,
+                leader_genome=self.leader_genome,
+                optimizer_state=population.optimizer.state(),
+                optimizer=population.optimizer.name,
+            ),
+        )
+        self.last_saved_generation = generation
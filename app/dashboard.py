@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from collections import deque
+from dataclasses import asdict
+from typing import Deque, Dict, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from bots import GenerationResult
+
+DASHBOARD_HOST = "127.0.0.1"
+CLIENT_BUFFER = 4
+KEEPALIVE_SECONDS = 15.0
+REQUEST_TIMEOUT = 10.0
+RETRY_MILLISECONDS = 2000
+
+STATUS_TEXT = {
+    200: "OK",
+    204: "No Content",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+}
+
+DASHBOARD_PAGE = """<!doctype html>
+<html lang="es">
+<head><meta charset="utf-8"><title>Bots Learn NES</title>
+<style>
+body{background:#0f111a;color:#e6e6e6;font-family:Helvetica,sans-serif;margin:24px}
+h1{font-size:20px}td,th{padding:4px 12px;text-align:right}pre{color:#9cf5ff}
+</style></head>
+<body><h1>Bots Learn NES</h1>
+<table><thead><tr><th>Generación</th><th>Mejor distancia</th><th>Tiempo</th>
+<th>Promedio</th><th>Éxito</th><th>Segundos</th></tr></thead><tbody id="rows"></tbody></table>
+<h2>Bot líder</h2><pre id="leader">Esperando la primera generación...</pre>
+<script>
+const rows = document.getElementById("rows");
+new EventSource("/events").addEventListener("generation", (event) => {
+  const data = JSON.parse(event.data);
+  const row = rows.insertRow(0);
+  for (const value of [data.generation, data.best_distance, data.best_time, data.avg_distance,
+    Math.round(data.success_rate * 100) + "%", data.elapsed_seconds ?? "-"]) {
+    row.insertCell().textContent = value;
+  }
+  while (rows.rows.length > 50) rows.deleteRow(-1);
+  document.getElementById("leader").textContent =
+    JSON.stringify({leader: data.leader, elite: data.elite}, null, 2);
+});
+</script></body></html>
+""".encode("utf-8")
+
+
+def generation_summary(
+    result: GenerationResult, elapsed_seconds: Optional[float] = None
+) -> Dict[str, object]:
+    summary: Dict[str, object] = {
+        "generation": result.generation,
+        "best_distance": result.best_distance,
+        "best_time": result.best_time,
+        "avg_distance": result.avg_distance,
+        "avg_time": result.avg_time,
+        "success_rate": result.success_rate,
+        "goal_reached": result.goal_reached,
+        "elite_count": len(result.elite_states),
+    }
+    if elapsed_seconds is not None:
+        summary["elapsed_seconds"] = round(elapsed_seconds, 6)
+    if result.timings is not None:
+        summary["timings"] = asdict(result.timings)
+    return summary
+
+
+def _encode(payload: Dict[str, object]) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class _Client:
+    def __init__(self, buffer: int) -> None:
+        self.events: Deque[bytes] = deque(maxlen=buffer)
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, event: bytes) -> None:
+        if len(self.events) == self.events.maxlen:
+            self.dropped += 1
+        self.events.append(event)
+        self.ready.set()
+
+
+class DashboardServer:
+    def __init__(
+        self,
+        host: str = DASHBOARD_HOST,
+        port: int = 0,
+        client_buffer: int = CLIENT_BUFFER,
+    ) -> None:
+        if not 0 <= port <= 65535:
+            raise ValueError("El puerto del panel debe estar entre 0 y 65535.")
+        if client_buffer < 1:
+            raise ValueError("El búfer por cliente debe admitir al menos una generación.")
+        self.host = host
+        self.port = port
+        self.client_buffer = client_buffer
+        self.published = 0
+        self.dropped = 0
+        self._clients: Set[_Client] = set()
+        self._writers: Set[asyncio.StreamWriter] = set()
+        self._closing = False
+        self._lock = threading.Lock()
+        self._event: Optional[bytes] = None
+        self._snapshot: Optional[bytes] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._error: Optional[OSError] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.host, self.port
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/"
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    def start(self) -> "DashboardServer":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            self._thread.join()
+            raise self._error
+        return self
+
+    def publish(self, result: GenerationResult, elapsed_seconds: Optional[float] = None) -> None:
+        summary = generation_summary(result, elapsed_seconds)
+        snapshot = _encode(summary)
+        summary["leader"] = asdict(result.leader_state)
+        summary["elite"] = [asdict(state) for state in result.elite_states]
+        event = (
+            f"id: {result.generation}\nevent: generation\n".encode("ascii")
+            + b"data: "
+            + _encode(summary)
+            + b"\n\n"
+        )
+        with self._lock:
+            self._snapshot = snapshot
+            self._event = event
+            self.published += 1
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._broadcast, event)
+            except RuntimeError:
+                pass
+
+    def close(self) -> None:
+        loop, thread = self._loop, self._thread
+        if loop is None or thread is None:
+            return
+        try:
+            loop.call_soon_threadsafe(loop.stop)
+        except RuntimeError:
+            pass
+        thread.join()
+        self._thread = None
+
+    def __enter__(self) -> "DashboardServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        try:
+            self._server = loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port)
+            )
+        except OSError as error:
+            self._error = error
+            loop.close()
+            self._ready.set()
+            return
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._loop = None
+            loop.run_until_complete(self._shutdown())
+            loop.close()
+
+    async def _shutdown(self) -> None:
+        self._closing = True
+        self._server.close()
+        for client in self._clients:
+            client.ready.set()
+        for writer in self._writers:
+            writer.transport.abort()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        if tasks:
+            await asyncio.wait(tasks)
+        await self._server.wait_closed()
+
+    def _broadcast(self, event: bytes) -> None:
+        for client in self._clients:
+            client.push(event)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), REQUEST_TIMEOUT)
+            parts = request.split(b"\r\n", 1)[0].decode("latin-1").split(" ")
+            if len(parts) != 3:
+                await self._respond(writer, 400, "text/plain", "Petición inválida.\n".encode())
+                return
+            method, target, _ = parts
+            path = urlsplit(target).path
+            if method != "GET":
+                await self._respond(writer, 405, "text/plain", "Solo se admite GET.\n".encode())
+            elif path == "/events":
+                await self._stream(writer)
+            elif path == "/snapshot":
+                with self._lock:
+                    snapshot = self._snapshot
+                if snapshot is None:
+                    await self._respond(writer, 204, "application/json", b"")
+                else:
+                    await self._respond(writer, 200, "application/json", snapshot)
+            elif path == "/":
+                await self._respond(writer, 200, "text/html; charset=utf-8", DASHBOARD_PAGE)
+            else:
+                await self._respond(writer, 404, "text/plain", "No encontrado.\n".encode())
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+            pass
+        except ConnectionError:
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _respond(
+        self, writer: asyncio.StreamWriter, status: int, content_type: str, body: bytes
+    ) -> None:
+        writer.write(
+            (
+                f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Cache-Control: no-store\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode("ascii")
+            + body
+        )
+        await writer.drain()
+
+    async def _stream(self, writer: asyncio.StreamWriter) -> None:
+        client = _Client(self.client_buffer)
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream; charset=utf-8\r\n"
+            b"Cache-Control: no-store\r\n"
+            b"Connection: keep-alive\r\n\r\n"
+            + f"retry: {RETRY_MILLISECONDS}\n\n".encode("ascii")
+        )
+        with self._lock:
+            latest = self._event
+        if latest is not None:
+            client.push(latest)
+        self._clients.add(client)
+        try:
+            while not self._closing:
+                try:
+                    await asyncio.wait_for(client.ready.wait(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    writer.write(b": ping\n\n")
+                client.ready.clear()
+                while client.events:
+                    writer.write(client.events.popleft())
+                await writer.drain()
+        finally:
+            self._clients.discard(client)
+            self.dropped += client.dropped
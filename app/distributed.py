@@ -0,0 +1,563 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from backends import BACKEND_SYNTHETIC
+from emulation import GENE_COUNT, EmulatorSession, EpisodeBatch
+from parallel import preset_payload, worker_session
+from presets import ControlPreset
+from roms import rom_registry
+
+PROTOCOL_VERSION = 2
+MESSAGE_HELLO = 1
+MESSAGE_SETUP = 2
+MESSAGE_BATCH = 3
+MESSAGE_RESULT = 4
+MESSAGE_ERROR = 5
+MESSAGE_SHUTDOWN = 6
+MESSAGE_HEARTBEAT = 7
+HEARTBEAT_SECONDS = 2.0
+DEADLINE_SLACK = 4.0
+
+_FRAME = struct.Struct("<BI")
+_HELLO = struct.Struct("<H")
+_SETUP = struct.Struct("<I")
+_BATCH = struct.Struct("<QIqIBI")
+_RESULT = struct.Struct("<QId")
+
+EPISODE_RECORD = np.dtype(
+    [
+        ("distance", "<f8"),
+        ("time_seconds", "<f8"),
+        ("mistakes", "<i4"),
+        ("coins", "<i4"),
+        ("powerups", "<i4"),
+    ]
+)
+
+
+def encode_episodes(batch: EpisodeBatch) -> bytes:
+    records = np.empty(len(batch), dtype=EPISODE_RECORD)
+    records["distance"] = batch.distance
+    records["time_seconds"] = batch.time_seconds
+    records["mistakes"] = batch.mistakes
+    records["coins"] = batch.coins
+    records["powerups"] = batch.powerups
+    return records.tobytes()
+
+
+def decode_episodes(data: bytes) -> EpisodeBatch:
+    records = np.frombuffer(data, dtype=EPISODE_RECORD)
+    return EpisodeBatch(
+        distance=records["distance"].astype(np.float64),
+        time_seconds=records["time_seconds"].astype(np.float64),
+        mistakes=records["mistakes"].astype(np.int32),
+        coins=records["coins"].astype(np.int32),
+        powerups=records["powerups"].astype(np.int32),
+    )
+
+
+def send_frame(connection: socket.socket, kind: int, *parts: bytes) -> None:
+    body = b"".join(parts)
+    connection.sendall(_FRAME.pack(kind, len(body)) + body)
+
+
+def _receive_exact(connection: socket.socket, size: int) -> bytearray:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = connection.recv_into(view[received:], size - received)
+        if not count:
+            raise ConnectionError("Conexión cerrada por el otro extremo.")
+        received += count
+    return buffer
+
+
+def receive_frame(connection: socket.socket) -> Tuple[int, bytearray]:
+    kind, length = _FRAME.unpack(_receive_exact(connection, _FRAME.size))
+    return kind, _receive_exact(connection, length)
+
+
+@dataclass
+class _Job:
+    job_id: int
+    genes: np.ndarray
+    generation: int
+    noise_keys: Optional[np.ndarray]
+    frame_budget: int = 0
+    cursor: int = 0
+    retry: Deque[Tuple[int, int]] = field(default_factory=deque)
+    results: Dict[int, EpisodeBatch] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def take(self, size: int) -> Optional[Tuple[int, int]]:
+        if self.retry:
+            start, stop = self.retry.popleft()
+            if stop - start > size:
+                self.retry.appendleft((start + size, stop))
+                stop = start + size
+            return start, stop
+        if self.cursor >= len(self.genes):
+            return None
+        start = self.cursor
+        self.cursor = min(len(self.genes), start + size)
+        return start, self.cursor
+
+
+@dataclass
+class WorkerStats:
+    address: str
+    batch_size: int
+    batches: int = 0
+    bots: int = 0
+    bots_per_second: float = 0.0
+
+
+class DistributedEvaluator:
+    def __init__(
+        self,
+        rom_path: str,
+        preset: ControlPreset,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        min_batch_size: int = 256,
+        max_batch_size: int = 65536,
+        target_batch_seconds: float = 0.25,
+        pipeline_depth: int = 2,
+        worker_timeout: float = 15.0,
+        backend: str = BACKEND_SYNTHETIC,
+    ) -> None:
+        rom_entry = rom_registry().entry(rom_path)
+        rom_bytes = Path(rom_path).read_bytes()
+        setup = json.dumps(
+            {
+                "rom_name": Path(rom_path).name,
+                "rom_sha256": rom_entry.sha256,
+                "preset": preset_payload(preset),
+                "backend": backend,
+            }
+        ).encode("utf-8")
+        self._setup = _SETUP.pack(len(setup)) + setup + rom_bytes
+        self.min_batch_size = max(1, min_batch_size)
+        self.max_batch_size = max(self.min_batch_size, max_batch_size)
+        self.target_batch_seconds = target_batch_seconds
+        self.pipeline_depth = max(1, pipeline_depth)
+        self.worker_timeout = worker_timeout
+        self.requeued_bots = 0
+        self.stats: Dict[int, WorkerStats] = {}
+        self._condition = threading.Condition()
+        self._job: Optional[_Job] = None
+        self._next_job_id = 0
+        self._next_worker_id = 0
+        self._connections: Dict[int, socket.socket] = {}
+        self._local_workers = []
+        self._closed = False
+        self._orphaned_since = time.monotonic()
+        self._listener = socket.create_server((host, port))
+        self.address: Tuple[str, int] = self._listener.getsockname()[:2]
+        self._accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self._accept_thread.start()
+
+    @property
+    def workers(self) -> int:
+        with self._condition:
+            return len(self._connections)
+
+    def wait_for_workers(self, count: int, timeout: Optional[float] = None) -> bool:
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: len(self._connections) >= count or self._closed, timeout
+            ) and not self._closed
+
+    def start_local_workers(self, count: int) -> None:
+        context = get_context("spawn")
+        host, port = self.address
+        for _ in range(count):
+            process = context.Process(target=run_worker, args=(host, port), daemon=True)
+            process.start()
+            self._local_workers.append(process)
+
+    def evaluate(
+        self,
+        genes: np.ndarray,
+        generation: int,
+        noise_keys: Optional[np.ndarray] = None,
+        frame_budget: Optional[int] = None,
+    ) -> EpisodeBatch:
+        return EpisodeBatch.concatenate(
+            [
+                batch
+                for _, batch in self.evaluate_chunks(genes, generation, noise_keys, frame_budget)
+            ]
+        )
+
+    def evaluate_chunks(
+        self,
+        genes: np.ndarray,
+        generation: int,
+        noise_keys: Optional[np.ndarray] = None,
+        frame_budget: Optional[int] = None,
+    ) -> Iterator[Tuple[int, EpisodeBatch]]:
+        with self._condition:
+            self._next_job_id += 1
+            job = _Job(
+                job_id=self._next_job_id,
+                genes=np.ascontiguousarray(genes, dtype=np.float64),
+                generation=generation,
+                noise_keys=None
+                if noise_keys is None
+                else np.ascontiguousarray(noise_keys, dtype=np.uint64),
+                frame_budget=frame_budget or 0,
+            )
+            self._job = job
+            self._condition.notify_all()
+        next_start = 0
+        try:
+            while next_start < len(job.genes):
+                with self._condition:
+                    while not self._condition.wait_for(
+                        lambda: next_start in job.results or job.error or self._closed,
+                        self.worker_timeout,
+                    ):
+                        if (
+                            not self._connections
+                            and time.monotonic() - self._orphaned_since >= self.worker_timeout
+                        ):
+                            raise RuntimeError(
+                                "No quedan workers conectados para terminar la evaluación."
+                            )
+                    if job.error:
+                        raise RuntimeError(f"Error en un worker remoto: {job.error}")
+                    if self._closed:
+                        raise RuntimeError("El coordinador se cerró durante la evaluación.")
+                    batch = job.results.pop(next_start)
+                yield next_start, batch
+                next_start += len(batch)
+        finally:
+            with self._condition:
+                if self._job is job:
+                    self._job = None
+
+    def _accept_loop(self) -> None:
+        while True:
+            try:
+                connection, address = self._listener.accept()
+            except OSError:
+                return
+            with self._condition:
+                if self._closed:
+                    connection.close()
+                    return
+                self._next_worker_id += 1
+                worker_id = self._next_worker_id
+            threading.Thread(
+                target=self._serve_worker,
+                args=(worker_id, connection, f"{address[0]}:{address[1]}"),
+                daemon=True,
+            ).start()
+
+    def _serve_worker(self, worker_id: int, connection: socket.socket, address: str) -> None:
+        outstanding: Deque[Tuple[_Job, int, int]] = deque()
+        stats = WorkerStats(address=address, batch_size=self.min_batch_size)
+        try:
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connection.settimeout(self.worker_timeout)
+            kind, body = receive_frame(connection)
+            if kind != MESSAGE_HELLO or _HELLO.unpack(body)[0] != PROTOCOL_VERSION:
+                raise ConnectionError("Worker con protocolo incompatible.")
+            send_frame(connection, MESSAGE_SETUP, self._setup)
+            with self._condition:
+                self._connections[worker_id] = connection
+                self.stats[worker_id] = stats
+                self._condition.notify_all()
+            while True:
+                with self._condition:
+                    self._condition.wait_for(
+                        lambda: self._closed
+                        or outstanding
+                        or (self._job is not None and self._job.error is None
+                            and (self._job.retry or self._job.cursor < len(self._job.genes)))
+                    )
+                    if self._closed:
+                        return
+                    job = self._job
+                    sent = len(outstanding)
+                    while job is not None and len(outstanding) < self.pipeline_depth:
+                        span = job.take(stats.batch_size)
+                        if span is None:
+                            break
+                        outstanding.append((job, *span))
+                for pending_job, start, stop in list(outstanding)[sent:]:
+                    self._send_batch(connection, pending_job, start, stop)
+                if not outstanding:
+                    continue
+                self._receive_result(connection, outstanding, stats)
+        except (OSError, ConnectionError, struct.error):
+            pass
+        finally:
+            with self._condition:
+                self._connections.pop(worker_id, None)
+                if not self._connections:
+                    self._orphaned_since = time.monotonic()
+                for job, start, stop in outstanding:
+                    if job is self._job:
+                        job.retry.append((start, stop))
+                        self.requeued_bots += stop - start
+                self._condition.notify_all()
+            connection.close()
+
+    def _send_batch(self, connection: socket.socket, job: _Job, start: int, stop: int) -> None:
+        keys = b"" if job.noise_keys is None else job.noise_keys[start:stop].tobytes()
+        send_frame(
+            connection,
+            MESSAGE_BATCH,
+            _BATCH.pack(
+                job.job_id,
+                job.generation,
+                start,
+                stop - start,
+                job.noise_keys is not None,
+                job.frame_budget,
+            ),
+            job.genes[start:stop].tobytes(),
+            keys,
+        )
+
+    def _receive_result(
+        self,
+        connection: socket.socket,
+        outstanding: Deque[Tuple[_Job, int, int]],
+        stats: WorkerStats,
+    ) -> None:
+        job, start, stop = outstanding[0]
+        deadline = self._batch_deadline(stop - start, stats)
+        kind, body = receive_frame(connection)
+        while kind == MESSAGE_HEARTBEAT:
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError("El worker superó el plazo del lote.")
+            kind, body = receive_frame(connection)
+        if kind == MESSAGE_ERROR:
+            with self._condition:
+                job.error = body.decode("utf-8", "replace")
+                outstanding.clear()
+                self._condition.notify_all()
+            return
+        if kind != MESSAGE_RESULT:
+            raise ConnectionError("Mensaje inesperado del worker.")
+        job_id, count, seconds = _RESULT.unpack_from(body)
+        if job_id != job.job_id or count != stop - start:
+            raise ConnectionError("Resultado fuera de orden.")
+        batch = decode_episodes(memoryview(body)[_RESULT.size :])
+        outstanding.popleft()
+        rate = count / max(seconds, 1e-6)
+        stats.bots_per_second = (
+            rate if not stats.batches else 0.7 * stats.bots_per_second + 0.3 * rate
+        )
+        stats.batches += 1
+        stats.bots += count
+        stats.batch_size = int(
+            min(
+                self.max_batch_size,
+                max(self.min_batch_size, stats.bots_per_second * self.target_batch_seconds),
+            )
+        )
+        with self._condition:
+            job.results[start] = batch
+            self._condition.notify_all()
+
+    def _batch_deadline(self, count: int, stats: WorkerStats) -> Optional[float]:
+        rate = stats.bots_per_second
+        if not stats.batches:
+            with self._condition:
+                rates = [other.bots_per_second for other in self.stats.values() if other.batches]
+            if not rates:
+                return None
+            rate = min(rates)
+        return time.monotonic() + self.worker_timeout + DEADLINE_SLACK * count / rate
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            connections = list(self._connections.values())
+            self._condition.notify_all()
+        self._listener.close()
+        for connection in connections:
+            try:
+                send_frame(connection, MESSAGE_SHUTDOWN)
+            except OSError:
+                pass
+        for process in self._local_workers:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._local_workers = []
+
+    def __enter__(self) -> "DistributedEvaluator":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def _prepare_session(body: bytearray, cache_dir: Path) -> EmulatorSession:
+    (length,) = _SETUP.unpack_from(body)
+    setup = json.loads(bytes(body[_SETUP.size : _SETUP.size + length]).decode("utf-8"))
+    rom_bytes = memoryview(body)[_SETUP.size + length :]
+    if hashlib.sha256(rom_bytes).hexdigest() != setup["rom_sha256"]:
+        raise ConnectionError("La ROM recibida no coincide con su huella.")
+    rom_path = cache_dir / setup["rom_sha256"] / Path(setup["rom_name"]).name
+    if not rom_path.exists():
+        rom_path.parent.mkdir(parents=True, exist_ok=True)
+        rom_path.write_bytes(rom_bytes)
+    return worker_session(
+        str(rom_path), setup["preset"], setup.get("backend", BACKEND_SYNTHETIC)
+    )
+
+
+def _evaluate_batch(session: EmulatorSession, body: bytearray) -> bytes:
+    job_id, generation, start, count, has_keys, frame_budget = _BATCH.unpack_from(body)
+    offset = _BATCH.size
+    genes = np.frombuffer(body, dtype="<f8", count=count * GENE_COUNT, offset=offset)
+    offset += genes.nbytes
+    noise_keys = (
+        np.frombuffer(body, dtype="<u8", count=count, offset=offset) if has_keys else None
+    )
+    started = time.perf_counter()
+    batch = session.evaluate_population(
+        genes.reshape(count, GENE_COUNT),
+        generation,
+        start_index=start,
+        noise_keys=noise_keys,
+        frame_budget=frame_budget or None,
+    )
+    seconds = time.perf_counter() - started
+    return _RESULT.pack(job_id, count, seconds) + encode_episodes(batch)
+
+
+def _send_heartbeats(
+    connection: socket.socket,
+    lock: threading.Lock,
+    busy: threading.Event,
+    stopped: threading.Event,
+    interval: float,
+) -> None:
+    while not stopped.wait(interval):
+        if not busy.is_set():
+            continue
+        try:
+            with lock:
+                send_frame(connection, MESSAGE_HEARTBEAT)
+        except OSError:
+            return
+
+
+def run_worker(
+    host: str,
+    port: int,
+    cache_dir: Optional[str] = None,
+    connect_timeout: float = 30.0,
+    heartbeat_seconds: float = HEARTBEAT_SECONDS,
+) -> None:
+    directory = Path(cache_dir or Path(tempfile.gettempdir()) / "bots_learn_roms")
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            connection = socket.create_connection((host, port))
+            break
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.2)
+    lock = threading.Lock()
+    busy = threading.Event()
+    stopped = threading.Event()
+    heartbeat = threading.Thread(
+        target=_send_heartbeats,
+        args=(connection, lock, busy, stopped, heartbeat_seconds),
+        daemon=True,
+    )
+    with connection:
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        send_frame(connection, MESSAGE_HELLO, _HELLO.pack(PROTOCOL_VERSION))
+        heartbeat.start()
+        session: Optional[EmulatorSession] = None
+        try:
+            while True:
+                try:
+                    kind, body = receive_frame(connection)
+                except (OSError, ConnectionError):
+                    return
+                if kind == MESSAGE_SHUTDOWN:
+                    return
+                if kind == MESSAGE_SETUP:
+                    session = _prepare_session(body, directory)
+                elif kind == MESSAGE_BATCH and session is not None:
+                    busy.set()
+                    try:
+                        kind, payload = MESSAGE_RESULT, _evaluate_batch(session, body)
+                    except Exception as error:
+                        kind, payload = MESSAGE_ERROR, str(error).encode("utf-8")
+                    finally:
+                        busy.clear()
+                    try:
+                        with lock:
+                            send_frame(connection, kind, payload)
+                    except OSError:
+                        return
+        finally:
+            stopped.set()
+            heartbeat.join()
+
+
+def parse_address(value: str) -> Tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Worker de evaluación distribuida: se conecta a un coordinador por TCP."
+    )
+    parser.add_argument("coordinator", help="Dirección del coordinador (HOST:PUERTO).")
+    parser.add_argument(
+        "--cache-dir", help="Directorio donde guardar las ROMs recibidas del coordinador."
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        default=30.0,
+        help="Segundos de reintento hasta conectar con el coordinador.",
+    )
+    args = parser.parse_args(argv)
+    try:
+        host, port = parse_address(args.coordinator)
+    except ValueError:
+        parser.error("La dirección debe tener el formato HOST:PUERTO.")
+    try:
+        run_worker(host, port, args.cache_dir, args.connect_timeout)
+    except OSError as error:
+        print(f"No se pudo conectar con el coordinador: {error}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,72 @@
 from __future__ import annotations
 
+import struct
 from dataclasses import dataclass
+from itertools import chain, islice
+from multiprocessing import parent_process
 from pathlib import Path
 from random import Random
-from typing import List, Optional, TYPE_CHECKING
+from typing import Iterator, List, Optional, Sequence, TYPE_CHECKING
 
-from presets import ControlPreset
+import numpy as np
+
+from backends import BACKEND_SYNTHETIC, EmulatorBackend, create_backend
+from input_log import InputLog, button_names
+from presets import NES_BUTTON_BITS, CompiledPreset, ControlPreset
+from roms import MISSING_ROM_SEED, RomEntry, rom_registry
+from savestates import SNAPSHOT_CAPACITY, SNAPSHOT_INTERVAL, SnapshotCache, SnapshotStats
+from streams import (
+    PURPOSE_EVALUATE,
+    CounterRandom,
+    stream_key,
+    stream_keys,
+    stream_uniform,
+    stream_uniforms,
+    uniforms_from_keys,
+)
 
 if TYPE_CHECKING:
     from bots import BotGenome
 
+ACTION_KEYS = ("RUN", "JUMP", "DUCK", "FIRE")
+GENE_NAMES = ACTION_KEYS + ("reaction_time", "risk_tolerance", "jump_timing")
+GENE_COUNT = len(GENE_NAMES)
+REACTION_TIME, RISK_TOLERANCE, JUMP_TIMING = range(len(ACTION_KEYS), GENE_COUNT)
+
+FRAMES_PER_SECOND = 60
+JUMP_FRAMES = 32
+JUMP_HEIGHT = 48.0
+SCREEN_WIDTH = 256
+
+EPISODE_NOISE_LOWS = np.array([-3.0, -6.0, -2.0, -5.0, -1.0])
+EPISODE_NOISE_HIGHS = np.array([4.0, 8.0, 3.0, 5.0, 2.0])
+
+EPISODE_FRAMES = 320 * FRAMES_PER_SECOND
+STALL_FRAMES = 10 * FRAMES_PER_SECOND
+PIXELS_PER_DISTANCE = 32
+PLAYER_PAGE_ADDRESS = 0x006D
+PLAYER_X_ADDRESS = 0x0086
+COINS_ADDRESS = 0x075E
+POWERUP_ADDRESS = 0x0756
+BOOT_SEQUENCE = bytes(60) + bytes((NES_BUTTON_BITS["START"],)) * 4 + bytes(120)
+
 
 @dataclass
 class FrameSnapshot:
     frame_index: int
     viewport: str
     inputs: List[str]
+    position: float = 0.0
+    height: float = 0.0
+    obstacle: int = 0
+
+
+@dataclass
+class LeaderRecording:
+    generation: int
+    bot_index: int
+    key: int
+    log: InputLog
 
 
 @dataclass
@@ -25,6 +76,11 @@ class RomInfo:
     valid_header: bool
     prg_banks: int
     chr_banks: int
+    sha256: str = ""
+    format: str = ""
+    mapper: int = 0
+    mirroring: str = ""
+    has_trainer: bool = False
 
 
 @dataclass
@@ -36,32 +92,158 @@ class EpisodeResult:
     powerups: int
 
 
+@dataclass
+class EpisodeBatch:
+    distance: np.ndarray
+    time_seconds: np.ndarray
+    mistakes: np.ndarray
+    coins: np.ndarray
+    powerups: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.distance)
+
+    @classmethod
+    def concatenate(cls, batches: List["EpisodeBatch"]) -> "EpisodeBatch":
+        return cls(
+            distance=np.concatenate([batch.distance for batch in batches]),
+            time_seconds=np.concatenate([batch.time_seconds for batch in batches]),
+            mistakes=np.concatenate([batch.mistakes for batch in batches]),
+            coins=np.concatenate([batch.coins for batch in batches]),
+            powerups=np.concatenate([batch.powerups for batch in batches]),
+        )
+
+    def take(self, indices: np.ndarray) -> "EpisodeBatch":
+        return EpisodeBatch(
+            distance=self.distance[indices],
+            time_seconds=self.time_seconds[indices],
+            mistakes=self.mistakes[indices],
+            coins=self.coins[indices],
+            powerups=self.powerups[indices],
+        )
+
+    def frames(self) -> np.ndarray:
+        return np.ceil(np.round(self.time_seconds * FRAMES_PER_SECOND, 6)).astype(np.int64)
+
+    def truncated(self, frame_budget: int) -> "EpisodeBatch":
+        budget_seconds = frame_budget / FRAMES_PER_SECOND
+        fraction = np.minimum(1.0, budget_seconds / np.maximum(self.time_seconds, 1e-9))
+        partial = fraction < 1.0
+        return EpisodeBatch(
+            distance=np.where(partial, np.round(self.distance * fraction, 2), self.distance),
+            time_seconds=np.where(partial, round(budget_seconds, 2), self.time_seconds),
+            mistakes=(self.mistakes * fraction).astype(np.int32),
+            coins=(self.coins * fraction).astype(np.int32),
+            powerups=(self.powerups * fraction).astype(np.int32),
+        )
+
+    def episode(self, index: int) -> EpisodeResult:
+        return EpisodeResult(
+            distance=float(self.distance[index]),
+            time_seconds=float(self.time_seconds[index]),
+            mistakes=int(self.mistakes[index]),
+            coins=int(self.coins[index]),
+            powerups=int(self.powerups[index]),
+        )
+
+
+def policy_inputs(
+    genes: Sequence[float], rng: Random, compiled: CompiledPreset
+) -> Iterator[bytes]:
+    hold = compiled.action_masks.get("MOVE_RIGHT", NES_BUTTON_BITS["RIGHT"])
+    if genes[0] > 0.5:
+        hold |= compiled.action_masks.get("RUN", NES_BUTTON_BITS["B"])
+    programs = list(compiled.programs.values())
+    weights = []
+    for program in programs:
+        mask = 0
+        for buttons in set(program):
+            mask |= buttons
+        weights.append(
+            0.05
+            + sum(
+                genes[column]
+                for column, action in enumerate(ACTION_KEYS)
+                if action in compiled.action_masks
+                and mask & compiled.action_masks[action] == compiled.action_masks[action]
+            )
+        )
+    while True:
+        idle = 1 + int(genes[REACTION_TIME] * 90 * rng.random())
+        yield bytes((hold,)) * idle
+        if programs and rng.random() < 0.3 + 0.6 * genes[JUMP_TIMING]:
+            yield rng.choices(programs, weights)[0]
+
+
 class EmulatorSession:
-    def __init__(self, rom_path: str, preset: ControlPreset) -> None:
+    def __init__(
+        self,
+        rom_path: str,
+        preset: ControlPreset,
+        backend: str = BACKEND_SYNTHETIC,
+        snapshots: bool = True,
+        snapshot_capacity: int = SNAPSHOT_CAPACITY,
+        snapshot_interval: int = SNAPSHOT_INTERVAL,
+    ) -> None:
         self.rom_path = Path(rom_path)
         self.preset = preset
         self.is_running = False
         self.goal_distance = 100.0
+        self.rom_entry: Optional[RomEntry] = None
+        if self.rom_path.is_file():
+            registry = rom_registry()
+            self.rom_entry = registry.entry(str(self.rom_path))
+            if parent_process() is None:
+                registry.save()
         self.rom_info = self._load_rom_info()
-        self.seed = int(self.rom_path.stat().st_size) if self.rom_path.exists() else 1337
+        self.seed = self.rom_entry.seed if self.rom_entry else MISSING_ROM_SEED
+        self.leader: Optional[LeaderRecording] = None
+        self.backend_name = backend
+        self.backend: Optional[EmulatorBackend] = create_backend(backend, str(self.rom_path))
+        self.snapshots = snapshots and self.backend is not None
+        self.snapshot_stats = SnapshotStats()
+        self.snapshot_cache: Optional[SnapshotCache] = None
+        self._level_state: Optional[bytearray] = None
+        self._level_start = 0
+        if self.snapshots and snapshot_capacity > 0:
+            self.snapshot_cache = SnapshotCache(
+                self.backend.state_size, snapshot_capacity, snapshot_interval
+            )
 
     def _load_rom_info(self) -> RomInfo:
         name = self.rom_path.stem
-        if not self.rom_path.exists():
+        entry = self.rom_entry
+        if entry is None:
             return RomInfo(name=name, size_kb=0.0, valid_header=False, prg_banks=0, chr_banks=0)
-        data = self.rom_path.read_bytes()
-        size_kb = round(len(data) / 1024, 2)
-        valid_header = data[:4] == b"NES\x1a"
-        prg_banks = data[4] if len(data) > 4 else 0
-        chr_banks = data[5] if len(data) > 5 else 0
+        header = entry.header
+        size_kb = round(entry.size / 1024, 2)
+        if header is None:
+            return RomInfo(
+                name=name,
+                size_kb=size_kb,
+                valid_header=False,
+                prg_banks=0,
+                chr_banks=0,
+                sha256=entry.sha256,
+            )
         return RomInfo(
             name=name,
             size_kb=size_kb,
-            valid_header=valid_header,
-            prg_banks=prg_banks,
-            chr_banks=chr_banks,
+            valid_header=True,
+            prg_banks=header.prg_banks,
+            chr_banks=header.chr_banks,
+            sha256=entry.sha256,
+            format=header.format,
+            mapper=header.mapper,
+            mirroring=header.mirroring,
+            has_trainer=header.has_trainer,
         )
 
+    def bot_stream(
+        self, generation: int, bot_index: int, purpose: int = PURPOSE_EVALUATE
+    ) -> CounterRandom:
+        return CounterRandom(self.seed, generation, bot_index, purpose)
+
     def evaluate_bot(
         self,
         genome: BotGenome,
@@ -70,7 +252,9 @@ class EmulatorSession:
     ) -> EpisodeResult:
         self.is_running = True
         preset_to_use = preset or self.preset
-        action_complexity = len(preset_to_use.buttons) + len(preset_to_use.sequences)
+        if self.backend is not None:
+            return self._play_episode(genome.as_vector(), rng, preset_to_use.compiled)
+        action_complexity = preset_to_use.compiled.action_complexity
         reflex_score = max(0.1, 1.0 - genome.reaction_time)
         decision_score = max(0.1, genome.jump_timing + genome.risk_tolerance)
         bias_score = sum(genome.action_biases.values()) / max(1, len(genome.action_biases))
@@ -90,15 +274,265 @@ class EmulatorSession:
             powerups=powerups,
         )
 
-    def get_leader_frames(self) -> List[FrameSnapshot]:
-        return [
-            FrameSnapshot(
-                frame_index=index,
-                viewport=f"Frame {index}: desplazamiento +{index * 5}",
-                inputs=["RUN", "JUMP"],
+    def evaluate_population(
+        self,
+        genes: np.ndarray,
+        generation: int,
+        preset: Optional[ControlPreset] = None,
+        start_index: int = 0,
+        noise_keys: Optional[np.ndarray] = None,
+        frame_budget: Optional[int] = None,
+    ) -> EpisodeBatch:
+        self.is_running = True
+        preset_to_use = preset or self.preset
+        genes = np.asarray(genes, dtype=np.float64)
+        if self.backend is not None:
+            return self._play_population(
+                genes, generation, preset_to_use, start_index, noise_keys, frame_budget
+            )
+        action_complexity = preset_to_use.compiled.action_complexity
+        reflex_score = np.maximum(0.1, 1.0 - genes[:, REACTION_TIME])
+        decision_score = np.maximum(0.1, genes[:, JUMP_TIMING] + genes[:, RISK_TOLERANCE])
+        bias_score = genes[:, 0].copy()
+        for column in range(1, len(ACTION_KEYS)):
+            bias_score += genes[:, column]
+        bias_score /= len(ACTION_KEYS)
+        raw_skill = reflex_score * 0.4 + decision_score * 0.4 + bias_score * 0.2
+        difficulty = max(0.6, 1.2 - action_complexity * 0.03)
+        if noise_keys is not None:
+            noise = self._noise_from_uniforms(
+                uniforms_from_keys(noise_keys, len(EPISODE_NOISE_LOWS))
+            )
+        else:
+            noise = self._population_noise(len(genes), generation, start_index)
+        distance = np.minimum(
+            self.goal_distance, np.maximum(0.0, raw_skill * 110 * difficulty + noise[:, 0])
+        )
+        time_seconds = np.maximum(10.0, 320 - distance * 2.6 + noise[:, 1])
+        mistakes = np.maximum(0, 15 - distance / 8 + noise[:, 2]).astype(np.int32)
+        coins = np.maximum(0, distance / 4 + noise[:, 3]).astype(np.int32)
+        powerups = np.maximum(0, distance / 35 + noise[:, 4]).astype(np.int32)
+        batch = EpisodeBatch(
+            distance=np.round(distance, 2),
+            time_seconds=np.round(time_seconds, 2),
+            mistakes=mistakes,
+            coins=coins,
+            powerups=powerups,
+        )
+        if frame_budget is None:
+            return batch
+        return batch.truncated(frame_budget)
+
+    def _play_population(
+        self,
+        genes: np.ndarray,
+        generation: int,
+        preset: ControlPreset,
+        start_index: int,
+        noise_keys: Optional[np.ndarray],
+        frame_budget: Optional[int],
+    ) -> EpisodeBatch:
+        if noise_keys is None:
+            noise_keys = stream_keys(
+                self.seed,
+                generation,
+                np.arange(start_index, start_index + len(genes)),
+                PURPOSE_EVALUATE,
             )
-            for index in range(6)
+        episodes = [
+            self._play_episode(
+                row, CounterRandom.from_key(int(key)), preset.compiled, frame_budget
+            )
+            for row, key in zip(genes.tolist(), noise_keys)
         ]
+        return EpisodeBatch(
+            distance=np.array([episode.distance for episode in episodes], dtype=np.float64),
+            time_seconds=np.array(
+                [episode.time_seconds for episode in episodes], dtype=np.float64
+            ),
+            mistakes=np.array([episode.mistakes for episode in episodes], dtype=np.int32),
+            coins=np.array([episode.coins for episode in episodes], dtype=np.int32),
+            powerups=np.array([episode.powerups for episode in episodes], dtype=np.int32),
+        )
+
+    def _play_episode(
+        self,
+        genes: Sequence[float],
+        rng: Random,
+        compiled: CompiledPreset,
+        frame_budget: Optional[int] = None,
+    ) -> EpisodeResult:
+        backend = self.backend
+        stats = self.snapshot_stats
+        limit = EPISODE_FRAMES if frame_budget is None else min(EPISODE_FRAMES, frame_budget)
+        goal = self.goal_distance * PIXELS_PER_DISTANCE
+        inputs = bytes(islice(chain.from_iterable(policy_inputs(genes, rng, compiled)), limit))
+        start = self._start_level()
+        previous = best = start
+        frame = progress_frame = setbacks = 0
+        retreating = False
+        cache = self.snapshot_cache
+        keys = []
+        if cache is not None:
+            keys = cache.prefix_keys(inputs, struct.pack("<d", goal))
+        restored = cache.restore(backend, keys) if keys else None
+        if restored is not None:
+            frame, (previous, best, progress_frame, setbacks, retreating) = restored
+            stats.prefix_hits += 1
+            stats.prefix_frames_restored += frame
+        first_frame = frame
+        while frame < limit:
+            if best - start >= goal or frame - progress_frame >= STALL_FRAMES:
+                break
+            backend.run_frame(inputs[frame])
+            frame += 1
+            position = self._player_position()
+            if position > best:
+                best = position
+                progress_frame = frame
+            if position < previous and not retreating:
+                setbacks += 1
+            retreating = position < previous
+            previous = position
+            if cache is not None and frame % cache.interval == 0:
+                cache.store(
+                    backend,
+                    keys[frame // cache.interval - 1],
+                    (previous, best, progress_frame, setbacks, int(retreating)),
+                )
+        stats.episodes += 1
+        stats.frames_emulated += frame - first_frame
+        return EpisodeResult(
+            distance=round(min(self.goal_distance, (best - start) / PIXELS_PER_DISTANCE), 2),
+            time_seconds=round(frame / FRAMES_PER_SECOND, 2),
+            mistakes=setbacks,
+            coins=backend.read_memory(COINS_ADDRESS),
+            powerups=backend.read_memory(POWERUP_ADDRESS),
+        )
+
+    def _start_level(self) -> int:
+        backend = self.backend
+        if self._level_state is not None:
+            backend.load_state(self._level_state)
+            self.snapshot_stats.boot_frames_restored += len(BOOT_SEQUENCE)
+            return self._level_start
+        backend.reset()
+        for buttons in BOOT_SEQUENCE:
+            backend.run_frame(buttons)
+        self.snapshot_stats.frames_emulated += len(BOOT_SEQUENCE)
+        self._level_start = self._player_position()
+        if self.snapshots:
+            self._level_state = bytearray(backend.state_size)
+            backend.save_state(self._level_state)
+        return self._level_start
+
+    def _player_position(self) -> int:
+        return (
+            self.backend.read_memory(PLAYER_PAGE_ADDRESS) << 8
+        ) | self.backend.read_memory(PLAYER_X_ADDRESS)
+
+    def _population_noise(self, count: int, generation: int, start_index: int) -> np.ndarray:
+        uniforms = stream_uniforms(
+            self.seed,
+            generation,
+            np.arange(start_index, start_index + count),
+            PURPOSE_EVALUATE,
+            len(EPISODE_NOISE_LOWS),
+        )
+        return self._noise_from_uniforms(uniforms)
+
+    @staticmethod
+    def _noise_from_uniforms(uniforms: np.ndarray) -> np.ndarray:
+        return EPISODE_NOISE_LOWS + (EPISODE_NOISE_HIGHS - EPISODE_NOISE_LOWS) * uniforms
+
+    def record_leader(
+        self,
+        genes: Sequence[float],
+        generation: int,
+        bot_index: int,
+        time_seconds: float,
+        preset: Optional[ControlPreset] = None,
+        key: Optional[int] = None,
+    ) -> LeaderRecording:
+        compiled = (preset or self.preset).compiled
+        if key is None:
+            key = stream_key(self.seed, generation, bot_index, PURPOSE_EVALUATE)
+        frames = round(time_seconds * FRAMES_PER_SECOND)
+        log = InputLog()
+        for chunk in policy_inputs(genes, CounterRandom.from_key(key), compiled):
+            if len(log) >= frames:
+                break
+            log.extend(chunk[: frames - len(log)])
+        self.leader = LeaderRecording(generation, bot_index, key, log)
+        return self.leader
+
+    def replay(
+        self, recording: LeaderRecording, start: int = 0, stop: Optional[int] = None
+    ) -> Iterator[FrameSnapshot]:
+        stop = len(recording.log) if stop is None else min(stop, len(recording.log))
+        position = 0.0
+        jump_start = -JUMP_FRAMES
+        previous = 0
+        for frame, buttons, length in recording.log.runs(0, stop):
+            if (
+                buttons & NES_BUTTON_BITS["A"]
+                and not previous & NES_BUTTON_BITS["A"]
+                and frame >= jump_start + JUMP_FRAMES
+            ):
+                jump_start = frame
+            speed = 0.0
+            if buttons & NES_BUTTON_BITS["RIGHT"]:
+                speed = 2.5 if buttons & NES_BUTTON_BITS["B"] else 1.5
+            elif buttons & NES_BUTTON_BITS["LEFT"]:
+                speed = -1.5
+            previous = buttons
+            first = max(frame, start)
+            last = min(frame + length, stop)
+            for index in range(first, last):
+                yield self._replay_frame(
+                    recording.key, index, position + speed * (index - frame), jump_start, buttons
+                )
+            position += speed * length
+
+    @staticmethod
+    def _replay_frame(
+        key: int, frame: int, position: float, jump_start: int, buttons: int
+    ) -> FrameSnapshot:
+        airborne = frame - jump_start
+        height = (
+            4 * JUMP_HEIGHT * airborne * (JUMP_FRAMES - airborne) / JUMP_FRAMES**2
+            if 0 <= airborne < JUMP_FRAMES
+            else 0.0
+        )
+        screen = int(position) // SCREEN_WIDTH
+        obstacle = screen * SCREEN_WIDTH + 64 + int(stream_uniform(key, screen) * 128)
+        if obstacle < position:
+            screen += 1
+            obstacle = screen * SCREEN_WIDTH + 64 + int(stream_uniform(key, screen) * 128)
+        return FrameSnapshot(
+            frame_index=frame,
+            viewport=(
+                f"Frame {frame}: x {position:.0f} altura {height:.0f} "
+                f"obstáculo +{obstacle - position:.0f}"
+            ),
+            inputs=list(button_names(buttons)),
+            position=position,
+            height=height,
+            obstacle=obstacle,
+        )
+
+    def get_leader_frames(self, start: int = 0, count: int = 6) -> List[FrameSnapshot]:
+        if self.leader is None:
+            return []
+        return list(self.replay(self.leader, start, start + count))
 
     def stop(self) -> None:
         self.is_running = False
+
+    def close(self) -> None:
+        self.stop()
+        if self.backend is not None:
+            self.backend.close()
+            self.backend = None
+        self._level_state = None
+        self.snapshot_cache = None
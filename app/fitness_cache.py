@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from emulation import EpisodeBatch
+from presets import ControlPreset
+from streams import hash_rows
+
+SEED_POLICY_GENOME = "genome"
+
+CachedEpisode = Tuple[float, float, int, int, int]
+
+
+@dataclass
+class CacheStats:
+    lookups: int = 0
+    hits: int = 0
+    evaluated: int = 0
+    seconds_saved: float = 0.0
+    hit_rate: float = 0.0
+
+
+class EvaluationCache:
+    def __init__(
+        self,
+        capacity: int = 262144,
+        quantum: float = 1e-6,
+    ) -> None:
+        self.capacity = max(1, capacity)
+        self.quantum = quantum
+        self.seed_policy = SEED_POLICY_GENOME
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[int, CachedEpisode]" = OrderedDict()
+        self._context_seed = 0
+        self._seconds_per_bot = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def begin_generation(self, session_seed: int, preset: ControlPreset) -> CacheStats:
+        context = f"{session_seed}|{preset.content_hash()}|{self.seed_policy}|{self.quantum!r}"
+        digest = hashlib.sha256(context.encode("utf-8")).digest()
+        self._context_seed = int.from_bytes(digest[:8], "little")
+        self.stats = CacheStats()
+        return self.stats
+
+    def keys(self, genes: np.ndarray) -> np.ndarray:
+        quantized = np.rint(np.asarray(genes, dtype=np.float64) / self.quantum).astype(np.int64)
+        return hash_rows(quantized, self._context_seed)
+
+    def evaluate(
+        self, genes: np.ndarray, evaluate: Callable[[np.ndarray, np.ndarray], EpisodeBatch]
+    ) -> EpisodeBatch:
+        cache_keys = self.keys(genes)
+        count = len(genes)
+        distance = np.empty(count)
+        time_seconds = np.empty(count)
+        counters = np.empty((count, 3), dtype=np.int32)
+        hit_positions: List[int] = []
+        hit_values: List[CachedEpisode] = []
+        missing: List[int] = []
+        entries = self._entries
+        for position, key in enumerate(cache_keys.tolist()):
+            cached = entries.get(key)
+            if cached is None:
+                missing.append(position)
+                continue
+            entries.move_to_end(key)
+            hit_positions.append(position)
+            hit_values.append(cached)
+
+        if hit_values:
+            values = np.array(hit_values)
+            distance[hit_positions] = values[:, 0]
+            time_seconds[hit_positions] = values[:, 1]
+            counters[hit_positions] = values[:, 2:]
+        if missing:
+            missing_index = np.array(missing, dtype=np.int64)
+            started = time.perf_counter()
+            batch = evaluate(np.asarray(genes)[missing_index], cache_keys[missing_index])
+            self._seconds_per_bot = (time.perf_counter() - started) / len(missing)
+            distance[missing_index] = batch.distance
+            time_seconds[missing_index] = batch.time_seconds
+            counters[missing_index, 0] = batch.mistakes
+            counters[missing_index, 1] = batch.coins
+            counters[missing_index, 2] = batch.powerups
+            for key, episode in zip(
+                cache_keys[missing_index].tolist(),
+                zip(
+                    batch.distance.tolist(),
+                    batch.time_seconds.tolist(),
+                    batch.mistakes.tolist(),
+                    batch.coins.tolist(),
+                    batch.powerups.tolist(),
+                ),
+            ):
+                entries[key] = episode
+            while len(entries) > self.capacity:
+                entries.popitem(last=False)
+
+        self.stats.lookups += count
+        self.stats.hits += len(hit_positions)
+        self.stats.evaluated += len(missing)
+        self.stats.seconds_saved += len(hit_positions) * self._seconds_per_bot
+        self.stats.hit_rate = self.stats.hits / max(1, self.stats.lookups)
+        return EpisodeBatch(
+            distance=distance,
+            time_seconds=time_seconds,
+            mistakes=counters[:, 0].copy(),
+            coins=counters[:, 1].copy(),
+            powerups=counters[:, 2].copy(),
+        )
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backends import FRAME_HEIGHT, FRAME_WIDTH, EmulatorBackend, create_backend
+from emulation import (
+    BOOT_SEQUENCE,
+    FRAMES_PER_SECOND,
+    EmulatorSession,
+    FrameSnapshot,
+    LeaderRecording,
+)
+from render_pipeline import LatestMailbox
+
+DISPLAY_FPS = 30
+RENDER_BUDGET = 0.2
+COST_SMOOTHING = 0.2
+PLAYBACK_PAUSE = 1.0
+
+NES_PALETTE = (
+    0x666666, 0x002A88, 0x1412A7, 0x3B00A4, 0x5C007E, 0x6E0040, 0x6C0600, 0x561D00,
+    0x333500, 0x0B4800, 0x005200, 0x004F08, 0x00404D, 0x000000, 0x000000, 0x000000,
+    0xADADAD, 0x155FD9, 0x4240FF, 0x7527FE, 0xA01ACC, 0xB71E7B, 0xB53120, 0x994E00,
+    0x6B6D00, 0x388700, 0x0C9300, 0x008F32, 0x007C8D, 0x000000, 0x000000, 0x000000,
+    0xFFFEFF, 0x64B0FF, 0x9290FF, 0xC676FF, 0xF36AFF, 0xFE6ECC, 0xFE8170, 0xEA9E22,
+    0xBCBE00, 0x88D800, 0x5CE430, 0x45E082, 0x48CDDE, 0x4F4F4F, 0x000000, 0x000000,
+    0xFFFEFF, 0xC0DFFF, 0xD3D2FF, 0xE8C8FF, 0xFBC2FF, 0xFEC4EA, 0xFECCC5, 0xF7D8A5,
+    0xE4E594, 0xCFEF96, 0xBDF4AB, 0xB3F3CC, 0xB5EBF2, 0xB8B8B8, 0x000000, 0x000000,
+)
+
+SKY_COLOR = 0x21
+GROUND_COLOR = 0x17
+GROUND_LINE_COLOR = 0x07
+BLOCK_COLOR = 0x1A
+PLAYER_COLOR = 0x16
+GROUND_TOP = 208
+GROUND_TILE = 32
+BLOCK_SIZE = 16
+PLAYER_SIZE = 16
+PLAYER_SCREEN_X = 96
+
+FrameRenderer = Callable[[np.ndarray], None]
+
+
+@dataclass
+class LeaderFrame:
+    generation: int
+    frame_index: int
+    frame_count: int
+    pixels: np.ndarray
+
+
+def palette_lut(palette: Sequence[int] = NES_PALETTE) -> np.ndarray:
+    colors = np.asarray(palette, dtype=np.uint32)
+    channels = (colors >> 16, colors >> 8, colors)
+    return (np.stack(channels, axis=1) & 0xFF).astype(np.uint8)
+
+
+def draw_scene(snapshot: FrameSnapshot, out: np.ndarray) -> None:
+    camera = int(snapshot.position) - PLAYER_SCREEN_X
+    out[:GROUND_TOP] = SKY_COLOR
+    out[GROUND_TOP:] = GROUND_COLOR
+    seams = (np.arange(FRAME_WIDTH) + camera) % GROUND_TILE < 2
+    out[GROUND_TOP:, seams] = GROUND_LINE_COLOR
+    block = snapshot.obstacle - camera
+    if -BLOCK_SIZE < block < FRAME_WIDTH:
+        out[GROUND_TOP - BLOCK_SIZE : GROUND_TOP, max(0, block) : block + BLOCK_SIZE] = BLOCK_COLOR
+    top = GROUND_TOP - PLAYER_SIZE - int(snapshot.height)
+    out[top : top + PLAYER_SIZE, PLAYER_SCREEN_X : PLAYER_SCREEN_X + PLAYER_SIZE] = PLAYER_COLOR
+
+
+class FrameEncoder:
+    def __init__(self, scale: int = 1, palette: Sequence[int] = NES_PALETTE) -> None:
+        if scale < 1:
+            raise ValueError("La escala del framebuffer debe ser al menos 1.")
+        self.scale = scale
+        self.lut = palette_lut(palette)
+        self.width = FRAME_WIDTH * scale
+        self.height = FRAME_HEIGHT * scale
+        self.header = f"P6 {self.width} {self.height} 255\n".encode("ascii")
+
+    def encode(self, pixels: np.ndarray) -> bytes:
+        if self.scale > 1:
+            pixels = pixels.repeat(self.scale, axis=0).repeat(self.scale, axis=1)
+        return self.header + self.lut[pixels].tobytes()
+
+
+class FramePacer:
+    def __init__(self, target_fps: float = DISPLAY_FPS, budget: float = RENDER_BUDGET) -> None:
+        if target_fps <= 0:
+            raise ValueError("Los FPS objetivo deben ser mayores a 0.")
+        if not 0 < budget <= 1:
+            raise ValueError("El presupuesto de render debe estar entre 0 y 1.")
+        self.interval = 1.0 / target_fps
+        self.budget = budget
+        self.cost = 0.0
+        self.shown = 0
+        self.skipped = 0
+        self._next = 0.0
+
+    @property
+    def period(self) -> float:
+        return max(self.interval, self.cost / self.budget)
+
+    @property
+    def fps(self) -> float:
+        return 1.0 / self.period
+
+    def due(self, now: float) -> bool:
+        return now >= self._next
+
+    def record(self, started: float, finished: float, skipped: int = 0) -> None:
+        cost = finished - started
+        self.cost = cost if not self.shown else self.cost + COST_SMOOTHING * (cost - self.cost)
+        self.shown += 1
+        self.skipped += skipped
+        self._next = started + self.period
+
+
+class LeaderPlayback:
+    def __init__(
+        self,
+        session: EmulatorSession,
+        mailbox: LatestMailbox[LeaderFrame],
+        target_fps: float = DISPLAY_FPS,
+    ) -> None:
+        if target_fps <= 0:
+            raise ValueError("Los FPS objetivo deben ser mayores a 0.")
+        self.session = session
+        self.mailbox = mailbox
+        self.stride = max(1, round(FRAMES_PER_SECOND / target_fps))
+        self.rendered = 0
+        self.backend: Optional[EmulatorBackend] = create_backend(
+            session.backend_name, str(session.rom_path)
+        )
+        self._boot_state: Optional[bytearray] = None
+        self._recording: Optional[LeaderRecording] = None
+        self._stopped = False
+        self._changed = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def show(self, recording: Optional[LeaderRecording]) -> None:
+        if recording is None:
+            return
+        with self._changed:
+            self._recording = recording
+            self._changed.notify()
+
+    def close(self) -> None:
+        with self._changed:
+            self._stopped = True
+            self._changed.notify()
+        self._thread.join()
+        if self.backend is not None:
+            self.backend.close()
+            self.backend = None
+
+    def _run(self) -> None:
+        recording: Optional[LeaderRecording] = None
+        while True:
+            with self._changed:
+                if recording is not None and recording is self._recording:
+                    self._changed.wait(PLAYBACK_PAUSE)
+                while self._recording is None and not self._stopped:
+                    self._changed.wait()
+                if self._stopped:
+                    return
+                recording = self._recording
+            self._play(recording)
+
+    def _play(self, recording: LeaderRecording) -> None:
+        started = time.perf_counter()
+        frame_count = len(recording.log)
+        for index, render in self._frames(recording):
+            if self._stopped or self._recording is not recording:
+                return
+            if index % self.stride:
+                continue
+            delay = started + index / FRAMES_PER_SECOND - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if self.mailbox.pending:
+                continue
+            pixels = np.empty((FRAME_HEIGHT, FRAME_WIDTH), dtype=np.uint8)
+            render(pixels)
+            self.rendered += 1
+            self.mailbox.post(LeaderFrame(recording.generation, index, frame_count, pixels))
+
+    def _frames(self, recording: LeaderRecording) -> Iterator[Tuple[int, FrameRenderer]]:
+        backend = self.backend
+        if backend is None:
+            for snapshot in self.session.replay(recording):
+                yield snapshot.frame_index, partial(draw_scene, snapshot)
+            return
+        self._boot(backend)
+        for frame, buttons, length in recording.log.runs():
+            for index in range(frame, frame + length):
+                backend.run_frame(buttons)
+                yield index, backend.render_frame
+
+    def _boot(self, backend: EmulatorBackend) -> None:
+        if self._boot_state is not None:
+            backend.load_state(self._boot_state)
+            return
+        backend.reset()
+        for buttons in BOOT_SEQUENCE:
+            backend.run_frame(buttons)
+        self._boot_state = bytearray(backend.state_size)
+        backend.save_state(self._boot_state)
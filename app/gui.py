@@ -1,18 +1,41 @@
 import json
 import threading
+import time
 import tkinter as tk
 from dataclasses import asdict
 from pathlib import Path
 from tkinter import filedialog, messagebox, ttk
 
+from backends import BACKEND_SYNTHETIC, BACKENDS, create_backend
 from bots import BotPopulation, GenerationResult
+from checkpoint import CheckpointManager
+from dashboard import DashboardServer
 from emulation import EmulatorSession
+from framebuffer import DISPLAY_FPS, FrameEncoder, FramePacer, LeaderFrame, LeaderPlayback
+from islands import IslandModel
+from optimizers import OPTIMIZER_GA, OPTIMIZERS, make_optimizer
+from parallel import ParallelEvaluator
 from presets import ControlPreset, PresetLibrary
+from profiling import (
+    PHASE_BREEDING,
+    PHASE_EVALUATION,
+    PHASE_RANKING,
+    PHASE_RENDERING,
+    PHASE_SERIALIZATION,
+    PhaseTimer,
+)
+from render_pipeline import LatestMailbox, ResultConsumer, StatusLog
 from tutorial import TutorialContent
 
 
+CHECKPOINT_INTERVAL = 10
+RENDER_FPS = 10
+STATUS_LOG_ENTRIES = 200
+LEADER_REPLAY_FRAMES = 6
+
+
 class MarioBotsApp:
-    def __init__(self) -> None:
+    def __init__(self, dashboard_port: int | None = None) -> None:
         self.root = tk.Tk()
         self.root.title("Bots Learn NES")
         self.root.geometry("1100x700")
@@ -29,15 +52,43 @@ class MarioBotsApp:
         self.preset_path: str | None = None
         self.current_preset: ControlPreset | None = None
         self.bot_count = tk.IntVar(value=500)
-        self.population: BotPopulation | None = None
+        self.worker_count = tk.IntVar(value=1)
+        self.island_count = tk.IntVar(value=1)
+        self.optimizer_name = tk.StringVar(value=OPTIMIZER_GA)
+        self.backend_name = tk.StringVar(value=BACKEND_SYNTHETIC)
+        self.pipelined = tk.BooleanVar(value=False)
+        self.population: BotPopulation | IslandModel | None = None
         self.session: EmulatorSession | None = None
+        self.evaluator: ParallelEvaluator | None = None
+        self.checkpoint_path: str | None = None
+        self.checkpoints: CheckpointManager | None = None
+        self.start_generation = 1
         self.run_thread: threading.Thread | None = None
         self.is_running = False
+        self.generation_mailbox: LatestMailbox[GenerationResult] = LatestMailbox()
+        self.frame_mailbox: LatestMailbox[LeaderFrame] = LatestMailbox()
+        self.frame_encoder = FrameEncoder()
+        self.frame_pacer = FramePacer(DISPLAY_FPS)
+        self.playback: LeaderPlayback | None = None
+        self.status_log = StatusLog(STATUS_LOG_ENTRIES)
+        self.last_render_seconds = 0.0
+
+        self.dashboard = (
+            DashboardServer(port=dashboard_port).start() if dashboard_port is not None else None
+        )
 
         self._build_layout()
+        if self.dashboard:
+            self._append_status(f"Panel de métricas en {self.dashboard.url}\n")
+        self.root.after(1000 // RENDER_FPS, self._render_tick)
+        self.root.after(1000 // DISPLAY_FPS, self._frame_tick)
 
     def run(self) -> None:
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            if self.dashboard:
+                self.dashboard.close()
 
     def _build_layout(self) -> None:
         container = ttk.Frame(self.root, padding=24)
@@ -95,6 +146,69 @@ class MarioBotsApp:
         )
         ttk.Label(bots_row, text="(recomendado 500)").pack(side=tk.LEFT)
 
+        workers_row = ttk.Frame(form_frame)
+        workers_row.pack(fill=tk.X, pady=6)
+        ttk.Label(workers_row, text="Procesos de evaluación").pack(side=tk.LEFT)
+        ttk.Entry(workers_row, textvariable=self.worker_count, width=12).pack(
+            side=tk.LEFT, padx=8
+        )
+        ttk.Label(workers_row, text="(1 = sin procesos paralelos)").pack(side=tk.LEFT)
+
+        islands_row = ttk.Frame(form_frame)
+        islands_row.pack(fill=tk.X, pady=6)
+        ttk.Label(islands_row, text="Islas").pack(side=tk.LEFT)
+        ttk.Entry(islands_row, textvariable=self.island_count, width=12).pack(
+            side=tk.LEFT, padx=8
+        )
+        ttk.Label(
+            islands_row, text="(1 = población única; reparte los bots entre islas)"
+        ).pack(side=tk.LEFT)
+
+        optimizer_row = ttk.Frame(form_frame)
+        optimizer_row.pack(fill=tk.X, pady=6)
+        ttk.Label(optimizer_row, text="Optimizador").pack(side=tk.LEFT)
+        ttk.Combobox(
+            optimizer_row,
+            textvariable=self.optimizer_name,
+            values=OPTIMIZERS,
+            state="readonly",
+            width=10,
+        ).pack(side=tk.LEFT, padx=8)
+        ttk.Label(optimizer_row, text="(ga = genético; cmaes = CMA-ES)").pack(side=tk.LEFT)
+
+        backend_row = ttk.Frame(form_frame)
+        backend_row.pack(fill=tk.X, pady=6)
+        ttk.Label(backend_row, text="Backend").pack(side=tk.LEFT)
+        ttk.Combobox(
+            backend_row,
+            textvariable=self.backend_name,
+            values=BACKENDS,
+            state="readonly",
+            width=10,
+        ).pack(side=tk.LEFT, padx=8)
+        ttk.Label(
+            backend_row, text="(synthetic = modelo rápido; nrom = consola emulada)"
+        ).pack(side=tk.LEFT)
+
+        pipeline_row = ttk.Frame(form_frame)
+        pipeline_row.pack(fill=tk.X, pady=6)
+        ttk.Checkbutton(
+            pipeline_row, text="Generaciones solapadas", variable=self.pipelined
+        ).pack(side=tk.LEFT)
+        ttk.Label(
+            pipeline_row,
+            text="(solo ga; evalúa parte de la siguiente generación antes de cerrar la actual)",
+        ).pack(side=tk.LEFT, padx=8)
+
+        checkpoint_row = ttk.Frame(form_frame)
+        checkpoint_row.pack(fill=tk.X, pady=6)
+        ttk.Label(checkpoint_row, text="Checkpoint").pack(side=tk.LEFT)
+        self.checkpoint_label = ttk.Label(checkpoint_row, text="Sin checkpoint", width=60)
+        self.checkpoint_label.pack(side=tk.LEFT, padx=8)
+        ttk.Button(
+            checkpoint_row, text="Elegir", command=self._select_checkpoint
+        ).pack(side=tk.LEFT)
+
         controls_row = ttk.Frame(form_frame)
         controls_row.pack(fill=tk.X, pady=(16, 6))
         ttk.Button(
@@ -126,8 +240,20 @@ class MarioBotsApp:
             height=360,
         )
         self.canvas.pack(fill=tk.BOTH, expand=True, pady=(8, 0))
-        self.canvas_text = self.canvas.create_text(
+        self.frame_image = tk.PhotoImage(
+            width=self.frame_encoder.width, height=self.frame_encoder.height
+        )
+        self.canvas.create_image(20, 20, anchor=tk.NW, image=self.frame_image)
+        self.canvas_caption = self.canvas.create_text(
             20,
+            self.frame_encoder.height + 28,
+            anchor=tk.NW,
+            fill="#9cf5ff",
+            font=("Consolas", 10),
+            text="",
+        )
+        self.canvas_text = self.canvas.create_text(
+            self.frame_encoder.width + 40,
             20,
             anchor=tk.NW,
             fill="#9cf5ff",
@@ -145,7 +271,7 @@ class MarioBotsApp:
             borderwidth=0,
         )
         self.status_text.pack(fill=tk.BOTH, expand=True, pady=(8, 16))
-        self.status_text.insert(tk.END, "Sin ejecución en progreso.\n")
+        self._append_status("Sin ejecución en progreso.\n")
 
         ttk.Label(right_panel, text="Tutorial", style="SubHeader.TLabel").pack(anchor=tk.W)
         tutorial = TutorialContent().render()
@@ -170,11 +296,26 @@ class MarioBotsApp:
         )
         if not preset:
             return
+        try:
+            self.current_preset = ControlPreset.from_dict(PresetLibrary.load_from_path(preset))
+        except (OSError, ValueError) as error:
+            messagebox.showerror("Preset inválido", str(error))
+            return
         self.preset_path = preset
-        preset_data = PresetLibrary.load_from_path(preset)
-        self.current_preset = ControlPreset.from_dict(preset_data)
         self.preset_label.config(text=preset)
 
+    def _select_checkpoint(self) -> None:
+        checkpoint = filedialog.asksaveasfilename(
+            title="Archivo de checkpoint",
+            defaultextension=".ckpt",
+            filetypes=[("Checkpoint", "*.ckpt")],
+            confirmoverwrite=False,
+        )
+        if not checkpoint:
+            return
+        self.checkpoint_path = checkpoint
+        self.checkpoint_label.config(text=checkpoint)
+
     def _use_default_preset(self) -> None:
         self.current_preset = PresetLibrary.default_super_mario_bros()
         self.preset_path = None
@@ -219,29 +360,131 @@ class MarioBotsApp:
 
         try:
             bot_count = int(self.bot_count.get())
-        except ValueError:
+        except (ValueError, tk.TclError):
             messagebox.showerror("Entrada inválida", "Indica un número válido de bots.")
             return
         if bot_count <= 0:
             messagebox.showerror("Entrada inválida", "El número de bots debe ser mayor a 0.")
             return
+        try:
+            worker_count = int(self.worker_count.get())
+        except (ValueError, tk.TclError):
+            messagebox.showerror("Entrada inválida", "Indica un número válido de procesos.")
+            return
+        if worker_count <= 0:
+            messagebox.showerror(
+                "Entrada inválida", "El número de procesos debe ser mayor a 0."
+            )
+            return
+        try:
+            island_count = int(self.island_count.get())
+        except (ValueError, tk.TclError):
+            messagebox.showerror("Entrada inválida", "Indica un número válido de islas.")
+            return
+        if island_count <= 0 or bot_count < 2 * island_count:
+            messagebox.showerror(
+                "Entrada inválida", "Cada isla necesita al menos 2 bots."
+            )
+            return
+        if self.pipelined.get() and (
+            island_count > 1 or self.optimizer_name.get() != OPTIMIZER_GA
+        ):
+            messagebox.showerror(
+                "Entrada inválida",
+                "Las generaciones solapadas requieren el optimizador ga y una sola isla.",
+            )
+            return
+        if island_count > 1 and (worker_count > 1 or self.checkpoint_path):
+            messagebox.showerror(
+                "Entrada inválida",
+                "Las islas no son compatibles con procesos de evaluación ni checkpoints.",
+            )
+            return
+
+        backend = self.backend_name.get()
+        if backend != BACKEND_SYNTHETIC:
+            try:
+                create_backend(backend, self.rom_path).close()
+            except (OSError, ValueError) as error:
+                messagebox.showerror(
+                    "ROM inválida", f"ROM no compatible con el backend {backend}: {error}"
+                )
+                return
 
         if self.current_preset:
             preset = self.current_preset
         else:
-            preset_data = PresetLibrary.load_from_path(self.preset_path or "")
-            preset = ControlPreset.from_dict(preset_data)
+            try:
+                preset = ControlPreset.from_dict(
+                    PresetLibrary.load_from_path(self.preset_path or "")
+                )
+            except (OSError, ValueError) as error:
+                messagebox.showerror("Preset inválido", str(error))
+                return
             self.current_preset = preset
 
-        self.population = BotPopulation(bot_count=bot_count, preset=preset)
-        self.session = EmulatorSession(self.rom_path, preset)
-
-        self.status_text.delete("1.0", tk.END)
-        self.status_text.insert(tk.END, "Inicializando generación 1...\n")
+        self.evaluator = (
+            ParallelEvaluator(self.rom_path, preset, workers=worker_count, backend=backend)
+            if worker_count > 1
+            else None
+        )
+        if island_count > 1:
+            self.population = IslandModel(
+                self.rom_path,
+                preset,
+                island_count,
+                bot_count,
+                optimizer=self.optimizer_name.get(),
+                backend=backend,
+            )
+        else:
+            self.population = BotPopulation(
+                bot_count=bot_count,
+                preset=preset,
+                vectorized=True,
+                evaluator=self.evaluator,
+                optimizer=make_optimizer(self.optimizer_name.get()),
+                pipelined=self.pipelined.get(),
+            )
+        self.session = EmulatorSession(self.rom_path, preset, backend=backend)
+        if self.playback:
+            self.playback.close()
+        self.frame_mailbox.clear()
+        self.playback = LeaderPlayback(self.session, self.frame_mailbox, DISPLAY_FPS)
+        self.start_generation = 1
+        self.checkpoints = (
+            CheckpointManager(self.checkpoint_path, CHECKPOINT_INTERVAL)
+            if self.checkpoint_path
+            else None
+        )
+        if self.checkpoints and self.checkpoints.exists():
+            try:
+                self.start_generation = self.checkpoints.restore(self.population, self.session.seed)
+            except (OSError, ValueError) as error:
+                messagebox.showerror("Checkpoint inválido", str(error))
+                if self.evaluator:
+                    self.evaluator.close()
+                    self.evaluator = None
+                return
+
+        self.generation_mailbox.clear()
+        self.status_log.clear()
+        if self.dashboard:
+            self._append_status(f"Panel de métricas en {self.dashboard.url}\n")
+        self._append_status(f"Inicializando generación {self.start_generation}...\n")
+        if self.start_generation > 1:
+            self._append_status(
+                f"Reanudando desde checkpoint con {self.population.bot_count} bots.\n"
+            )
+        rom_info = self.session.rom_info
         self._append_status(
-            f"ROM: {self.session.rom_info.name} "
-            f"({self.session.rom_info.size_kb} KB) "
-            f"{'OK' if self.session.rom_info.valid_header else 'Sin cabecera NES'}\n"
+            f"ROM: {rom_info.name} ({rom_info.size_kb} KB) "
+            + (
+                f"{rom_info.format} mapper {rom_info.mapper}, {rom_info.mirroring}"
+                if rom_info.valid_header
+                else "Sin cabecera NES"
+            )
+            + (f" [{rom_info.sha256[:12]}]\n" if rom_info.sha256 else "\n")
         )
         self._append_status(
             f"Preset: {preset.game_title} - {preset.description}\n"
@@ -263,53 +506,153 @@ class MarioBotsApp:
         self._append_status("Entrenamiento detenido por el usuario.\n")
 
     def _run_training_loop(self) -> None:
-        generation_index = 1
-        while self.is_running and self.population and self.session:
-            result = self.population.run_generation(self.session, generation_index)
-            self._update_generation(result)
-            generation_index += 1
-            if result.goal_reached:
-                self.is_running = False
-
-    def _update_generation(self, result: GenerationResult) -> None:
-        summary = (
-            f"Generación {result.generation}: "
-            f"mejor distancia {result.best_distance} - "
-            f"tiempo {result.best_time}s - "
-            f"promedio {result.avg_distance} - "
-            f"tasa de éxito {result.success_rate:.0%}\n"
-        )
-        elite_payload = [asdict(state) for state in result.elite_states]
-        details = json.dumps(
-            {
-                "leader": asdict(result.leader_state),
-                "elite": elite_payload,
-            },
-            ensure_ascii=False,
-            indent=2,
-        )
-
-        self.root.after(
-            0,
-            lambda: self._render_generation(summary, details, result.goal_reached),
-        )
-
-    def _render_generation(self, summary: str, details: str, goal_reached: bool) -> None:
-        self._append_status(summary)
+        generation_index = self.start_generation
+        consumer = ResultConsumer(self._publish_generation)
+        try:
+            while self.is_running and self.population and self.session:
+                result = self.population.run_generation(self.session, generation_index)
+                consumer.put(result)
+                if self.checkpoints:
+                    self.checkpoints.observe(self.population, self.session.seed, result)
+                generation_index += 1
+                if result.goal_reached:
+                    self.is_running = False
+        except OSError as error:
+            self.is_running = False
+            self._append_status(f"Error al publicar la generación: {error}\n")
+        finally:
+            try:
+                consumer.close()
+            except OSError as error:
+                self._append_status(f"Error al publicar la generación: {error}\n")
+            checkpoints = self.checkpoints
+            if (
+                checkpoints
+                and self.population
+                and self.session
+                and generation_index - 1 > checkpoints.last_saved_generation
+            ):
+                checkpoints.save(self.population, self.session.seed, generation_index - 1)
+            if self.evaluator:
+                self.evaluator.close()
+                self.evaluator = None
+            if isinstance(self.population, IslandModel):
+                self.population.close()
+
+    def _publish_generation(self, result: GenerationResult) -> None:
+        self.generation_mailbox.post(result)
+        if self.dashboard:
+            self.dashboard.publish(result)
+        playback = self.playback
+        if playback and self.session:
+            playback.show(self.session.leader)
+
+    def _render_tick(self) -> None:
+        try:
+            result, coalesced = self.generation_mailbox.take()
+            if result is not None:
+                self._render_generation(result, coalesced)
+            self._flush_status()
+        finally:
+            self.root.after(1000 // RENDER_FPS, self._render_tick)
+
+    def _frame_tick(self) -> None:
+        try:
+            started = time.perf_counter()
+            if self.frame_pacer.due(started):
+                frame, coalesced = self.frame_mailbox.take()
+                if frame is not None:
+                    self._draw_frame(frame)
+                    self.frame_pacer.record(started, time.perf_counter(), coalesced)
+        finally:
+            self.root.after(1000 // DISPLAY_FPS, self._frame_tick)
+
+    def _draw_frame(self, frame: LeaderFrame) -> None:
+        self.frame_image.configure(data=self.frame_encoder.encode(frame.pixels), format="PPM")
+        pacer = self.frame_pacer
         self.canvas.itemconfig(
-            self.canvas_text,
+            self.canvas_caption,
             text=(
-                f"{summary}\n"
-                f"Estado del bot líder:\n{details}"
+                f"Generación {frame.generation}: frame {frame.frame_index}/{frame.frame_count}\n"
+                f"{pacer.fps:.0f} FPS, {pacer.cost * 1000:.1f} ms por frame, "
+                f"{pacer.skipped} frames omitidos"
             ),
         )
-        if goal_reached:
+
+    def _flush_status(self) -> None:
+        if not self.status_log.dirty:
+            return
+        self.status_text.delete("1.0", tk.END)
+        self.status_text.insert(tk.END, self.status_log.render())
+        self.status_text.see(tk.END)
+
+    def _render_generation(self, result: GenerationResult, coalesced: int) -> None:
+        timer = PhaseTimer()
+        with timer.phase(PHASE_SERIALIZATION):
+            summary = (
+                f"Generación {result.generation}: "
+                f"mejor distancia {result.best_distance} - "
+                f"tiempo {result.best_time}s - "
+                f"promedio {result.avg_distance} - "
+                f"tasa de éxito {result.success_rate:.0%}\n"
+            )
+            elite_payload = [asdict(state) for state in result.elite_states]
+            details = json.dumps(
+                {
+                    "leader": asdict(result.leader_state),
+                    "elite": elite_payload,
+                },
+                ensure_ascii=False,
+                indent=2,
+            )
+        with timer.phase(PHASE_RENDERING):
+            if coalesced:
+                self._append_status(f"({coalesced} generaciones sin mostrar)\n")
+            self._append_status(summary)
+            self.canvas.itemconfig(
+                self.canvas_text,
+                text=(
+                    f"{summary}"
+                    f"{self._format_timings(result, timer.phases)}\n"
+                    f"{self._format_leader_replay()}"
+                    f"Estado del bot líder:\n{details}"
+                ),
+            )
+        self.last_render_seconds = timer.phases[PHASE_RENDERING]
+        if result.goal_reached:
             self._append_status("Objetivo alcanzado. Fin del entrenamiento.\n")
+            self._flush_status()
             messagebox.showinfo(
                 "Entrenamiento completado",
                 "El bot líder completó el juego de manera óptima.",
             )
 
+    def _format_timings(self, result: GenerationResult, phases: dict[str, float]) -> str:
+        generation_phases = result.timings.phases if result.timings else {}
+        labels = (
+            ("evaluación", generation_phases.get(PHASE_EVALUATION, 0.0)),
+            ("ranking", generation_phases.get(PHASE_RANKING, 0.0)),
+            ("cruce", generation_phases.get(PHASE_BREEDING, 0.0)),
+            ("serialización", phases.get(PHASE_SERIALIZATION, 0.0)),
+            ("render", self.last_render_seconds),
+        )
+        prefetched = result.timings.counters.get("bots_prefetched", 0) if result.timings else 0
+        return "Tiempos (ms): " + ", ".join(
+            f"{label} {seconds * 1000:.1f}" for label, seconds in labels
+        ) + (f" ({prefetched} bots evaluados por adelantado)" if prefetched else "")
+
+    def _format_leader_replay(self) -> str:
+        session = self.session
+        if session is None or session.leader is None:
+            return ""
+        log = session.leader.log
+        frames = "\n".join(
+            f"  {frame.viewport} [{'+'.join(frame.inputs) or '-'}]"
+            for frame in session.replay(session.leader, 0, LEADER_REPLAY_FRAMES)
+        )
+        return (
+            f"Registro del líder: {len(log)} frames en {log.nbytes} bytes\n{frames}\n"
+        )
+
     def _append_status(self, text: str) -> None:
-        self.status_text.insert(tk.END, text)
-        self.status_text.see(tk.END)
+        self.status_log.append(text)
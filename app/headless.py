@@ -0,0 +1,471 @@
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, TextIO, Tuple, Union
+
+from backends import BACKEND_SYNTHETIC, BACKENDS, create_backend
+from bots import BotPopulation, GenerationResult, HalvingSchedule
+from checkpoint import CheckpointManager
+from dashboard import DashboardServer
+from distributed import DistributedEvaluator, parse_address
+from emulation import EmulatorSession
+from fitness_cache import EvaluationCache
+from history import HistoryStore, HistoryWriter, default_run_id
+from islands import TOPOLOGIES, TOPOLOGY_RING, IslandModel
+from optimizers import OPTIMIZER_GA, OPTIMIZERS, make_optimizer
+from parallel import ParallelEvaluator
+from presets import ControlPreset, PresetLibrary
+from profiling import GenerationProfiler
+from render_pipeline import ResultConsumer
+
+
+def result_payload(result: GenerationResult, elapsed_seconds: float) -> Dict[str, object]:
+    payload = asdict(result)
+    payload["elapsed_seconds"] = round(elapsed_seconds, 6)
+    return payload
+
+
+def run_headless(
+    rom_path: str,
+    preset: ControlPreset,
+    bot_count: int,
+    output: TextIO,
+    max_generations: int = 0,
+    workers: int = 1,
+    elite_fraction: float = 0.15,
+    seed: int = 42,
+    stop_at_goal: bool = True,
+    checkpoint_path: Optional[str] = None,
+    checkpoint_every: int = 10,
+    resume: bool = False,
+    cache_size: int = 0,
+    deterministic: bool = False,
+    profiler: Optional[GenerationProfiler] = None,
+    islands: int = 1,
+    island_elite_fractions: Optional[Sequence[float]] = None,
+    migration_interval: int = 5,
+    migrant_count: int = 5,
+    topology: str = TOPOLOGY_RING,
+    listen: Optional[Tuple[str, int]] = None,
+    local_workers: int = 0,
+    halving: Optional[HalvingSchedule] = None,
+    history: Optional[HistoryWriter] = None,
+    optimizer: str = OPTIMIZER_GA,
+    backend: str = BACKEND_SYNTHETIC,
+    pipelined: bool = False,
+    dashboard: Optional[DashboardServer] = None,
+) -> Optional[GenerationResult]:
+    if cache_size and not deterministic:
+        raise ValueError(
+            "La caché de evaluaciones requiere el modo determinista: con ruido por generación "
+            "ningún episodio se repite."
+        )
+    session = EmulatorSession(rom_path, preset, backend=backend)
+    evaluator: Union[ParallelEvaluator, DistributedEvaluator, None] = None
+    population: Union[BotPopulation, IslandModel]
+    if islands > 1:
+        population = IslandModel(
+            rom_path,
+            preset,
+            islands,
+            bot_count,
+            elite_fractions=island_elite_fractions or (elite_fraction,),
+            migration_interval=migration_interval,
+            migrant_count=migrant_count,
+            topology=topology,
+            seed=seed,
+            optimizer=optimizer,
+            backend=backend,
+        )
+    else:
+        if listen:
+            evaluator = DistributedEvaluator(
+                rom_path, preset, host=listen[0], port=listen[1], backend=backend
+            )
+            evaluator.start_local_workers(local_workers)
+            host, port = evaluator.address
+            print(f"Coordinador escuchando en {host}:{port}; esperando workers...", file=sys.stderr)
+            evaluator.wait_for_workers(1)
+        elif workers > 1:
+            evaluator = ParallelEvaluator(rom_path, preset, workers=workers, backend=backend)
+        population = BotPopulation(
+            bot_count=bot_count,
+            preset=preset,
+            elite_fraction=elite_fraction,
+            vectorized=True,
+            evaluator=evaluator,
+            seed=seed,
+            cache=EvaluationCache(cache_size) if cache_size else None,
+            profiler=profiler,
+            halving=halving,
+            optimizer=make_optimizer(optimizer),
+            pipelined=pipelined,
+        )
+    checkpoints = (
+        CheckpointManager(checkpoint_path, checkpoint_every) if checkpoint_path else None
+    )
+    result: Optional[GenerationResult] = None
+    generation_index = 1
+    if checkpoints and resume and checkpoints.exists():
+        generation_index = checkpoints.restore(population, session.seed)
+
+    def report(item: Tuple[GenerationResult, float]) -> None:
+        payload = result_payload(*item)
+        output.write(json.dumps(payload, ensure_ascii=False, separators=(",", ":")))
+        output.write("\n")
+        output.flush()
+        if history:
+            history.append(item[0])
+        if dashboard:
+            dashboard.publish(*item)
+
+    consumer = ResultConsumer(report) if pipelined else None
+    publish = consumer.put if consumer else report
+    try:
+        while not max_generations or generation_index <= max_generations:
+            started = time.perf_counter()
+            result = population.run_generation(session, generation_index)
+            publish((result, time.perf_counter() - started))
+            if checkpoints:
+                checkpoints.observe(population, session.seed, result)
+            generation_index += 1
+            if result.goal_reached and stop_at_goal:
+                break
+    finally:
+        session.close()
+        if profiler:
+            profiler.dump()
+        if checkpoints and generation_index - 1 > checkpoints.last_saved_generation:
+            checkpoints.save(population, session.seed, generation_index - 1)
+        if evaluator:
+            evaluator.close()
+        if isinstance(population, IslandModel):
+            population.close()
+        try:
+            if consumer:
+                consumer.close()
+        finally:
+            if history:
+                history.close()
+    return result
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Entrena bots sin interfaz gráfica y emite una línea JSON por generación."
+        )
+    )
+    parser.add_argument("rom", help="Ruta de la ROM (.nes).")
+    parser.add_argument(
+        "--preset", help="Preset JSON de controles (por defecto, el preset SMB interno)."
+    )
+    parser.add_argument("--bots", type=int, default=500, help="Bots por generación.")
+    parser.add_argument(
+        "--generations",
+        type=int,
+        default=0,
+        help="Límite de generaciones (0 = hasta alcanzar el objetivo).",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Procesos de evaluación (1 = sin paralelo)."
+    )
+    parser.add_argument(
+        "--elite-fraction",
+        type=float,
+        nargs="+",
+        default=[0.15],
+        help="Fracción de élites por generación (con --islands, una por isla).",
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de la población.")
+    parser.add_argument(
+        "--keep-going",
+        action="store_true",
+        help="Continúa hasta el límite de generaciones aunque se alcance el objetivo.",
+    )
+    parser.add_argument(
+        "--output", default="-", help="Archivo JSON Lines de salida ('-' = stdout)."
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=0,
+        help="Entradas de la caché de evaluaciones (0 = sin caché; requiere --deterministic).",
+    )
+    parser.add_argument(
+        "--deterministic",
+        action="store_true",
+        help="Reevaluación determinista: los genomas en caché no vuelven al emulador.",
+    )
+    parser.add_argument(
+        "--profile-generations",
+        metavar="INICIO:FIN",
+        help="Perfila con cProfile el rango de generaciones indicado.",
+    )
+    parser.add_argument(
+        "--profile-output",
+        default="generaciones.prof",
+        help="Archivo pstats para --profile-generations.",
+    )
+    parser.add_argument("--checkpoint", help="Archivo binario de checkpoint de la población.")
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=10,
+        help="Generaciones entre checkpoints.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reanuda desde el checkpoint si existe.",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default=BACKEND_SYNTHETIC,
+        help="Emulación: modelo sintético o intérprete 6502 para ROMs NROM (mapper 0).",
+    )
+    parser.add_argument(
+        "--optimizer",
+        choices=OPTIMIZERS,
+        default=OPTIMIZER_GA,
+        help="Algoritmo de cruce: genético (ga) o CMA-ES vectorizado (cmaes).",
+    )
+    parser.add_argument(
+        "--pipelined",
+        action="store_true",
+        help="Solapa el cruce y la evaluación de la siguiente generación con el final de la "
+        "actual y publica las métricas desde otro hilo.",
+    )
+    parser.add_argument(
+        "--dashboard-port",
+        type=int,
+        help="Publica las métricas en http://127.0.0.1:PUERTO/ (eventos SSE en /events y "
+        "resumen JSON en /snapshot; 0 = puerto libre).",
+    )
+    parser.add_argument("--history", help="Directorio del historial de generaciones en disco.")
+    parser.add_argument(
+        "--run-id",
+        help="Identificador de la ejecución en el historial (por defecto, fecha y hora).",
+    )
+    parser.add_argument(
+        "--islands",
+        type=int,
+        default=1,
+        help="Subpoblaciones en procesos independientes (1 = población única).",
+    )
+    parser.add_argument(
+        "--migration-interval",
+        type=int,
+        default=5,
+        help="Generaciones entre migraciones de élites entre islas.",
+    )
+    parser.add_argument(
+        "--migrants", type=int, default=5, help="Élites que emigra cada isla."
+    )
+    parser.add_argument(
+        "--topology",
+        choices=TOPOLOGIES,
+        default=TOPOLOGY_RING,
+        help="Topología de migración: anillo o todas con todas.",
+    )
+    parser.add_argument(
+        "--listen",
+        metavar="HOST:PUERTO",
+        help="Distribuye la evaluación entre workers TCP (python app/distributed.py HOST:PUERTO).",
+    )
+    parser.add_argument(
+        "--local-workers",
+        type=int,
+        default=0,
+        help="Workers TCP locales que se lanzan junto al coordinador.",
+    )
+    parser.add_argument(
+        "--halving",
+        metavar="FRACCIÓN,...",
+        help=(
+            "Evaluación por etapas: fracciones crecientes de la duración del episodio antes "
+            "del episodio completo (por ejemplo 0.25,0.5)."
+        ),
+    )
+    parser.add_argument(
+        "--halving-keep",
+        type=float,
+        default=0.25,
+        help="Fracción de bots que pasa a la siguiente etapa de --halving.",
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    rom_path = Path(args.rom)
+    if not rom_path.exists():
+        parser.error("No se encontró la ROM indicada.")
+    if rom_path.suffix.lower() != ".nes":
+        parser.error("La ROM debe tener extensión .nes.")
+    if args.bots <= 0:
+        parser.error("El número de bots debe ser mayor a 0.")
+    if args.workers <= 0:
+        parser.error("El número de procesos debe ser mayor a 0.")
+    if args.generations < 0:
+        parser.error("El límite de generaciones no puede ser negativo.")
+    if args.keep_going and not args.generations:
+        parser.error("--keep-going requiere un límite de generaciones.")
+    if args.checkpoint_every <= 0:
+        parser.error("El intervalo de checkpoints debe ser mayor a 0.")
+    if args.cache_size < 0:
+        parser.error("El tamaño de la caché no puede ser negativo.")
+    if args.deterministic != bool(args.cache_size):
+        parser.error(
+            "--cache-size y --deterministic van juntos: con ruido por generación ningún "
+            "episodio se repite y la caché no acertaría nunca."
+        )
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requiere --checkpoint.")
+    if args.islands <= 0:
+        parser.error("El número de islas debe ser mayor a 0.")
+    if args.islands > 1:
+        if args.bots < 2 * args.islands:
+            parser.error("Cada isla necesita al menos 2 bots.")
+        if args.workers > 1 or args.cache_size or args.checkpoint or args.profile_generations:
+            parser.error(
+                "--islands no es compatible con --workers, --cache-size, "
+                "--checkpoint ni --profile-generations."
+            )
+        if len(args.elite_fraction) not in (1, args.islands):
+            parser.error("Indica una fracción de élites o una por isla.")
+    elif len(args.elite_fraction) != 1:
+        parser.error("Varias fracciones de élites requieren --islands.")
+    listen = None
+    if args.listen:
+        try:
+            listen = parse_address(args.listen)
+        except ValueError:
+            parser.error("--listen debe tener el formato HOST:PUERTO.")
+        if args.workers > 1 or args.islands > 1:
+            parser.error("--listen no es compatible con --workers ni --islands.")
+    if args.local_workers < 0:
+        parser.error("El número de workers locales no puede ser negativo.")
+    if args.local_workers and not args.listen:
+        parser.error("--local-workers requiere --listen.")
+    halving = None
+    if args.halving:
+        try:
+            fractions = tuple(float(part) for part in args.halving.split(","))
+        except ValueError:
+            parser.error("--halving debe ser una lista de fracciones separada por comas.")
+        if any(not 0 < fraction < 1 for fraction in fractions) or list(fractions) != sorted(
+            set(fractions)
+        ):
+            parser.error("Las fracciones de --halving deben estar entre 0 y 1 y ser crecientes.")
+        if not 0 < args.halving_keep <= 1:
+            parser.error("--halving-keep debe estar entre 0 y 1.")
+        if args.cache_size or args.islands > 1:
+            parser.error("--halving no es compatible con --cache-size ni --islands.")
+        halving = HalvingSchedule(fractions, args.halving_keep)
+    if args.pipelined and (
+        args.islands > 1 or args.cache_size or halving or args.optimizer != OPTIMIZER_GA
+    ):
+        parser.error(
+            "--pipelined requiere el optimizador ga y no es compatible con --islands, "
+            "--cache-size ni --halving."
+        )
+    if args.migration_interval <= 0:
+        parser.error("El intervalo de migración debe ser mayor a 0.")
+    if args.migrants < 0:
+        parser.error("El número de migrantes no puede ser negativo.")
+    profiler = None
+    if args.profile_generations:
+        try:
+            first, last = (int(part) for part in args.profile_generations.split(":"))
+        except ValueError:
+            parser.error("--profile-generations debe tener el formato INICIO:FIN.")
+        profiler = GenerationProfiler(first, last, args.profile_output)
+
+    if args.preset:
+        try:
+            preset = ControlPreset.from_dict(PresetLibrary.load_from_path(args.preset))
+        except (OSError, ValueError) as error:
+            parser.error(f"Preset inválido: {error}")
+    else:
+        preset = PresetLibrary.default_super_mario_bros()
+
+    if args.backend != BACKEND_SYNTHETIC:
+        try:
+            create_backend(args.backend, str(rom_path)).close()
+        except (OSError, ValueError) as error:
+            parser.error(f"ROM no compatible con el backend {args.backend}: {error}")
+
+    history = None
+    if args.run_id and not args.history:
+        parser.error("--run-id requiere --history.")
+    if args.history:
+        try:
+            history = HistoryWriter(HistoryStore(args.history), args.run_id or default_run_id())
+        except (OSError, ValueError) as error:
+            parser.error(f"Historial inválido: {error}")
+
+    if args.dashboard_port is not None and not 0 <= args.dashboard_port <= 65535:
+        parser.error("El puerto del panel debe estar entre 0 y 65535.")
+
+    dashboard = None
+    if args.dashboard_port is not None:
+        try:
+            dashboard = DashboardServer(port=args.dashboard_port).start()
+        except OSError as error:
+            parser.error(f"No se pudo abrir el panel: {error}")
+        print(f"Panel de métricas en {dashboard.url}", file=sys.stderr)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        run_headless(
+            str(rom_path),
+            preset,
+            bot_count=args.bots,
+            output=output,
+            max_generations=args.generations,
+            workers=args.workers,
+            elite_fraction=args.elite_fraction[0],
+            seed=args.seed,
+            stop_at_goal=not args.keep_going,
+            checkpoint_path=args.checkpoint,
+            checkpoint_every=args.checkpoint_every,
+            resume=args.resume,
+            cache_size=args.cache_size,
+            deterministic=args.deterministic,
+            profiler=profiler,
+            islands=args.islands,
+            island_elite_fractions=args.elite_fraction,
+            migration_interval=args.migration_interval,
+            migrant_count=args.migrants,
+            topology=args.topology,
+            listen=listen,
+            local_workers=args.local_workers,
+            halving=halving,
+            history=history,
+            optimizer=args.optimizer,
+            backend=args.backend,
+            pipelined=args.pipelined,
+            dashboard=dashboard,
+        )
+    except KeyboardInterrupt:
+        return 130
+    except ValueError as error:
+        parser.exit(2, f"{parser.prog}: error: {error}\n")
+    except OSError as error:
+        parser.exit(1, f"{parser.prog}: error: {error}\n")
+    finally:
+        if dashboard:
+            dashboard.close()
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
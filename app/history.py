@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import queue
+import re
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from bots import ELITE_REPORT_SIZE, BotGenome, GenerationResult
+from emulation import GENE_COUNT
+from profiling import PHASE_BREEDING, PHASE_EVALUATION, PHASE_RANKING
+
+HISTORY_MAGIC = b"BLHS"
+HISTORY_VERSION = 1
+HISTORY_SUFFIX = ".hist"
+_HEADER = struct.Struct("<4sHHQ")
+HISTORY_ROW = np.dtype(
+    [
+        ("generation", "<u8"),
+        ("timestamp", "<f8"),
+        ("best_distance", "<f8"),
+        ("best_time", "<f8"),
+        ("avg_distance", "<f8"),
+        ("avg_time", "<f8"),
+        ("success_rate", "<f8"),
+        ("total_seconds", "<f4"),
+        ("evaluation_seconds", "<f4"),
+        ("ranking_seconds", "<f4"),
+        ("breeding_seconds", "<f4"),
+        ("goal_reached", "u1"),
+        ("elite_count", "u1"),
+        ("elite_distance", "<f4", (ELITE_REPORT_SIZE,)),
+        ("elite_genes", "u1", (ELITE_REPORT_SIZE, GENE_COUNT)),
+    ]
+)
+_RUN_ID = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def default_run_id() -> str:
+    return time.strftime("%Y%m%d-%H%M%S")
+
+
+def pack_genes(genes: np.ndarray) -> np.ndarray:
+    return np.rint(np.clip(genes, 0.0, 1.0) * 255).astype(np.uint8)
+
+
+def unpack_genes(packed: np.ndarray) -> np.ndarray:
+    return packed.astype(np.float64) / 255
+
+
+def result_row(result: GenerationResult, timestamp: Optional[float] = None) -> np.ndarray:
+    row = np.zeros((), dtype=HISTORY_ROW)
+    phases = result.timings.phases if result.timings else {}
+    elites = result.elite_states[:ELITE_REPORT_SIZE]
+    row["generation"] = result.generation
+    row["timestamp"] = time.time() if timestamp is None else timestamp
+    row["best_distance"] = result.best_distance
+    row["best_time"] = result.best_time
+    row["avg_distance"] = result.avg_distance
+    row["avg_time"] = result.avg_time
+    row["success_rate"] = result.success_rate
+    row["total_seconds"] = result.timings.total_seconds if result.timings else 0.0
+    row["evaluation_seconds"] = phases.get(PHASE_EVALUATION, 0.0)
+    row["ranking_seconds"] = phases.get(PHASE_RANKING, 0.0)
+    row["breeding_seconds"] = phases.get(PHASE_BREEDING, 0.0)
+    row["goal_reached"] = result.goal_reached
+    row["elite_count"] = len(elites)
+    if elites:
+        row["elite_distance"][: len(elites)] = [state.distance for state in elites]
+        row["elite_genes"][: len(elites)] = pack_genes(
+            np.array([state.genome.as_vector() for state in elites])
+        )
+    return row
+
+
+def bisect_generation(rows: np.ndarray, generation: int, after: bool = False) -> int:
+    low, high = 0, len(rows)
+    while low < high:
+        middle = (low + high) // 2
+        value = int(rows[middle]["generation"])
+        if value < generation or (after and value == generation):
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def elite_genomes(row: np.ndarray) -> List[BotGenome]:
+    return [
+        BotGenome.from_vector(list(vector))
+        for vector in unpack_genes(row["elite_genes"][: int(row["elite_count"])])
+    ]
+
+
+class HistoryStore:
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+
+    def path(self, run_id: str) -> Path:
+        if not _RUN_ID.match(run_id):
+            raise ValueError(f"Identificador de ejecución inválido: '{run_id}'.")
+        return self.root / f"{run_id}{HISTORY_SUFFIX}"
+
+    def runs(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        return sorted(path.stem for path in self.root.glob(f"*{HISTORY_SUFFIX}"))
+
+    def rows(self, run_id: str) -> np.ndarray:
+        path = self.path(run_id)
+        if not path.exists():
+            raise ValueError(f"No existe historial para la ejecución '{run_id}'.")
+        with open(path, "rb") as handle:
+            header = handle.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError("Historial inválido: cabecera incompleta.")
+        magic, version, row_size, _ = _HEADER.unpack(header)
+        if magic != HISTORY_MAGIC or version != HISTORY_VERSION:
+            raise ValueError("Historial inválido: firma o versión desconocida.")
+        if row_size != HISTORY_ROW.itemsize:
+            raise ValueError("Historial inválido: tamaño de fila incompatible.")
+        count = (path.stat().st_size - _HEADER.size) // HISTORY_ROW.itemsize
+        if count == 0:
+            return np.zeros(0, dtype=HISTORY_ROW)
+        return np.memmap(path, dtype=HISTORY_ROW, mode="r", offset=_HEADER.size, shape=(count,))
+
+    def count(self, run_id: str) -> int:
+        return len(self.rows(run_id))
+
+    def query(
+        self,
+        run_id: str,
+        first_generation: int = 0,
+        last_generation: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> np.ndarray:
+        rows = self.rows(run_id)
+        start = bisect_generation(rows, first_generation)
+        stop = (
+            len(rows)
+            if last_generation is None
+            else bisect_generation(rows, last_generation, after=True)
+        )
+        selected = rows[start:stop]
+        if fields:
+            return np.array(selected[list(fields)])
+        return np.array(selected)
+
+    def latest(self, run_id: str) -> Optional[np.ndarray]:
+        rows = self.rows(run_id)
+        return np.array(rows[-1]) if len(rows) else None
+
+
+class HistoryWriter:
+    def __init__(
+        self,
+        store: HistoryStore,
+        run_id: str,
+        batch_size: int = 256,
+        flush_seconds: float = 1.0,
+    ) -> None:
+        self.store = store
+        self.run_id = run_id
+        self.path = store.path(run_id)
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.rows_written = 0
+        self.error: Optional[BaseException] = None
+        self._raised = False
+        self._queue: "queue.Queue[Optional[GenerationResult]]" = queue.Queue()
+        self._last_generation: Optional[int] = None
+        store.root.mkdir(parents=True, exist_ok=True)
+        self._prepare_file()
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def append(self, result: GenerationResult) -> None:
+        self._raise_error()
+        self._queue.put(result)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+        self._raise_error()
+
+    def _raise_error(self) -> None:
+        if self.error is not None and not self._raised:
+            self._raised = True
+            raise self.error
+
+    def __enter__(self) -> "HistoryWriter":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _prepare_file(self) -> None:
+        if not self.path.exists() or self.path.stat().st_size < _HEADER.size:
+            with open(self.path, "wb") as handle:
+                handle.write(
+                    _HEADER.pack(
+                        HISTORY_MAGIC, HISTORY_VERSION, HISTORY_ROW.itemsize, int(time.time())
+                    )
+                )
+            return
+        rows = self.store.rows(self.run_id)
+        if len(rows):
+            self._last_generation = int(rows["generation"][-1])
+
+    def _rewind(self, generation: int) -> None:
+        rows = self.store.rows(self.run_id)
+        keep = bisect_generation(rows, generation)
+        del rows
+        with open(self.path, "r+b") as handle:
+            handle.truncate(_HEADER.size + keep * HISTORY_ROW.itemsize)
+
+    def _write_loop(self) -> None:
+        pending: List[np.ndarray] = []
+        oldest = 0.0
+        while True:
+            timeout = (
+                max(0.0, oldest + self.flush_seconds - time.monotonic()) if pending else None
+            )
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False
+            if item is None:
+                break
+            if item is not False:
+                if not pending:
+                    oldest = time.monotonic()
+                pending.append(result_row(item))
+                if (
+                    len(pending) < self.batch_size
+                    and time.monotonic() - oldest < self.flush_seconds
+                ):
+                    continue
+            self._flush(pending)
+            pending = []
+        if pending:
+            self._flush(pending)
+
+    def _flush(self, pending: List[np.ndarray]) -> None:
+        if self.error is not None:
+            return
+        try:
+            self._write_batch(np.array(pending, dtype=HISTORY_ROW))
+        except OSError as error:
+            self.error = error
+
+    def _write_batch(self, batch: np.ndarray) -> None:
+        first = int(batch["generation"][0])
+        if self._last_generation is not None and first <= self._last_generation:
+            self._rewind(first)
+        order = np.argsort(batch["generation"], kind="stable")
+        with open(self.path, "ab") as handle:
+            handle.write(batch[order].tobytes())
+            handle.flush()
+            os.fsync(handle.fileno())
+        self._last_generation = int(batch["generation"][order[-1]])
+        self.rows_written += len(batch)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Consulta el historial de generaciones guardado en disco."
+    )
+    parser.add_argument("directory", help="Directorio del historial.")
+    parser.add_argument("--run", help="Identificador de la ejecución (sin él, lista las ejecuciones).")
+    parser.add_argument("--from", dest="first", type=int, default=0, help="Primera generación.")
+    parser.add_argument("--to", dest="last", type=int, help="Última generación.")
+    parser.add_argument(
+        "--fields",
+        default="generation,best_distance,avg_distance,success_rate",
+        help="Columnas separadas por comas.",
+    )
+    args = parser.parse_args(argv)
+    store = HistoryStore(args.directory)
+    if not args.run:
+        for run_id in store.runs():
+            print(f"{run_id}\t{store.count(run_id)} generaciones")
+        return 0
+    fields = [name.strip() for name in args.fields.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in HISTORY_ROW.names]
+    if unknown:
+        parser.error(f"Columnas desconocidas: {', '.join(unknown)}")
+    try:
+        rows = store.query(args.run, args.first, args.last, fields)
+    except ValueError as error:
+        parser.error(str(error))
+    for row in rows:
+        print(json.dumps({name: row[name].tolist() for name in fields}, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+from bisect import bisect_right
+from itertools import groupby
+from typing import Iterator, List, Optional, Tuple
+
+from presets import NES_BUTTON_BITS
+
+RUN_LIMIT = 255
+INDEX_STRIDE = 64
+
+_BUTTON_NAMES = tuple(
+    tuple(name for name, bit in NES_BUTTON_BITS.items() if mask & bit) for mask in range(256)
+)
+
+
+def button_names(buttons: int) -> Tuple[str, ...]:
+    return _BUTTON_NAMES[buttons & 0xFF]
+
+
+class InputLog:
+    __slots__ = ("_runs", "_frames", "_index")
+
+    def __init__(self) -> None:
+        self._runs = bytearray()
+        self._frames = 0
+        self._index: List[int] = []
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "InputLog":
+        if len(data) % 2:
+            raise ValueError("Registro de entradas inválido: longitud impar.")
+        log = cls()
+        for offset in range(0, len(data), 2):
+            log.append(data[offset], data[offset + 1])
+        return log
+
+    def __len__(self) -> int:
+        return self._frames
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._runs)
+
+    @property
+    def run_count(self) -> int:
+        return len(self._runs) // 2
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._runs)
+
+    def append(self, buttons: int, frames: int = 1) -> None:
+        runs = self._runs
+        buttons &= 0xFF
+        while frames > 0:
+            if runs and runs[-2] == buttons and runs[-1] < RUN_LIMIT:
+                take = min(frames, RUN_LIMIT - runs[-1])
+                runs[-1] += take
+            else:
+                if self.run_count % INDEX_STRIDE == 0:
+                    self._index.append(self._frames)
+                take = min(frames, RUN_LIMIT)
+                runs += bytes((buttons, take))
+            self._frames += take
+            frames -= take
+
+    def extend(self, program: bytes) -> None:
+        for buttons, group in groupby(program):
+            self.append(buttons, sum(1 for _ in group))
+
+    def runs(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[int, int, int]]:
+        stop = self._frames if stop is None else min(stop, self._frames)
+        if start >= stop:
+            return
+        block = max(0, bisect_right(self._index, start) - 1)
+        frame = self._index[block]
+        runs = self._runs
+        for offset in range(block * INDEX_STRIDE * 2, len(runs), 2):
+            if frame >= stop:
+                return
+            length = runs[offset + 1]
+            if frame + length > start:
+                yield frame, runs[offset], length
+            frame += length
+
+    def buttons_at(self, frame: int) -> int:
+        if not 0 <= frame < self._frames:
+            raise IndexError(frame)
+        return next(self.runs(frame, frame + 1))[1]
+
+    def slice(self, start: int, stop: int) -> bytes:
+        output = bytearray()
+        for frame, buttons, length in self.runs(start, stop):
+            first = max(frame, start)
+            last = min(frame + length, stop)
+            output += bytes((buttons,)) * (last - first)
+        return bytes(output)
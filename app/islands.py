@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from multiprocessing.connection import Connection
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backends import BACKEND_SYNTHETIC
+from bots import ELITE_REPORT_SIZE, BotPopulation, GenerationResult
+from emulation import EmulatorSession
+from optimizers import OPTIMIZER_GA, make_optimizer
+from presets import ControlPreset
+from profiling import GenerationTimings
+from streams import PURPOSE_ISLAND, stream_key
+
+TOPOLOGY_RING = "ring"
+TOPOLOGY_FULL = "full"
+TOPOLOGIES = (TOPOLOGY_RING, TOPOLOGY_FULL)
+
+IslandStep = Tuple[GenerationResult, Optional[np.ndarray]]
+
+
+@dataclass
+class IslandConfig:
+    index: int
+    bot_count: int
+    elite_fraction: float
+    seed: int
+    optimizer: str = OPTIMIZER_GA
+    backend: str = BACKEND_SYNTHETIC
+
+
+@dataclass
+class IslandGenerationResult(GenerationResult):
+    migrated: int = 0
+    islands: List[GenerationResult] = field(default_factory=list, compare=False)
+
+
+def island_seed(seed: int, index: int) -> int:
+    return stream_key(seed, 0, index, PURPOSE_ISLAND) >> 1
+
+
+class Island:
+    def __init__(self, rom_path: str, preset: ControlPreset, config: IslandConfig) -> None:
+        self.config = config
+        self.session = EmulatorSession(rom_path, preset, backend=config.backend)
+        self.session.seed = island_seed(self.session.seed, config.index)
+        self.population = BotPopulation(
+            bot_count=config.bot_count,
+            preset=preset,
+            elite_fraction=config.elite_fraction,
+            vectorized=True,
+            seed=config.seed,
+            optimizer=make_optimizer(config.optimizer),
+        )
+
+    def step(
+        self, generation: int, immigrants: Optional[np.ndarray], migrant_count: int
+    ) -> IslandStep:
+        genes = self.population.pool.genes
+        if immigrants is not None and immigrants.shape[1]:
+            count = min(immigrants.shape[1], genes.shape[1])
+            genes[:, genes.shape[1] - count :] = immigrants[:, :count]
+        result = self.population.run_generation(self.session, generation)
+        emigrants = None
+        if migrant_count and self.population.optimizer.keeps_elites:
+            elite_count = max(2, int(self.config.bot_count * self.population.elite_fraction))
+            emigrants = self.population.pool.genes[:, : min(migrant_count, elite_count)].copy()
+        elif migrant_count:
+            emigrants = np.array(
+                [state.genome.as_vector() for state in result.elite_states[:migrant_count]],
+                dtype=np.float32,
+            ).T
+        return result, emigrants
+
+    def stop(self) -> None:
+        self.session.close()
+
+
+def _island_main(
+    connection: Connection, rom_path: str, preset: ControlPreset, config: IslandConfig
+) -> None:
+    island = Island(rom_path, preset, config)
+    connection.send(config.index)
+    try:
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+            try:
+                reply: object = island.step(*message)
+            except Exception as error:
+                reply = error
+            connection.send(reply)
+    finally:
+        island.stop()
+        connection.close()
+
+
+def merge_island_results(
+    results: Sequence[GenerationResult],
+    bot_counts: Sequence[int],
+    goal_distance: float,
+    generation: int,
+    elapsed_seconds: float,
+    migrated: int,
+) -> IslandGenerationResult:
+    total = max(1, sum(bot_counts))
+    elite_states = sorted(
+        (state for result in results for state in result.elite_states),
+        key=lambda state: (-state.distance, state.time_seconds),
+    )[:ELITE_REPORT_SIZE]
+    leader_state = elite_states[0]
+    phases: Dict[str, float] = {}
+    counters: Dict[str, int] = {"islands": len(results), "migrated": migrated}
+    for result in results:
+        if result.timings is None:
+            continue
+        for name, seconds in result.timings.phases.items():
+            phases[name] = round(phases.get(name, 0.0) + seconds, 6)
+        for name, amount in result.timings.counters.items():
+            counters[name] = counters.get(name, 0) + amount
+    return IslandGenerationResult(
+        generation=generation,
+        best_distance=leader_state.distance,
+        best_time=leader_state.time_seconds,
+        avg_distance=round(
+            sum(result.avg_distance * count for result, count in zip(results, bot_counts))
+            / total,
+            2,
+        ),
+        avg_time=round(
+            sum(result.avg_time * count for result, count in zip(results, bot_counts)) / total,
+            2,
+        ),
+        success_rate=sum(
+            result.success_rate * count for result, count in zip(results, bot_counts)
+        )
+        / total,
+        leader_state=leader_state,
+        elite_states=elite_states,
+        goal_reached=any(result.goal_reached for result in results)
+        or leader_state.distance >= goal_distance,
+        timings=GenerationTimings(
+            generation=generation,
+            total_seconds=elapsed_seconds,
+            phases=phases,
+            counters=counters,
+        ),
+        migrated=migrated,
+        islands=list(results),
+    )
+
+
+class IslandModel:
+    def __init__(
+        self,
+        rom_path: str,
+        preset: ControlPreset,
+        island_count: int,
+        bot_count: int,
+        elite_fractions: Sequence[float] = (0.15,),
+        migration_interval: int = 5,
+        migrant_count: int = 5,
+        topology: str = TOPOLOGY_RING,
+        seed: int = 42,
+        parallel: bool = True,
+        optimizer: str = OPTIMIZER_GA,
+        backend: str = BACKEND_SYNTHETIC,
+    ) -> None:
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"Topología de migración desconocida: {topology}")
+        if island_count <= 0 or bot_count < 2 * island_count:
+            raise ValueError("Cada isla necesita al menos 2 bots.")
+        if len(elite_fractions) not in (1, island_count):
+            raise ValueError("Indica una fracción de élites o una por isla.")
+        self.preset = preset
+        self.migration_interval = max(1, migration_interval)
+        self.migrant_count = max(0, migrant_count)
+        self.topology = topology
+        self.seed = seed
+        self.configs = [
+            IslandConfig(
+                index=index,
+                bot_count=bot_count // island_count + int(index < bot_count % island_count),
+                elite_fraction=elite_fractions[index % len(elite_fractions)],
+                seed=island_seed(seed, index),
+                optimizer=optimizer,
+                backend=backend,
+            )
+            for index in range(island_count)
+        ]
+        self.bot_count = bot_count
+        self._pending: List[Optional[np.ndarray]] = [None] * island_count
+        self._islands: List[Island] = []
+        self._connections: List[Connection] = []
+        self._processes = []
+        if parallel:
+            context = get_context("spawn")
+            for config in self.configs:
+                parent, child = context.Pipe()
+                process = context.Process(
+                    target=_island_main,
+                    args=(child, rom_path, preset, config),
+                    daemon=True,
+                )
+                process.start()
+                child.close()
+                self._connections.append(parent)
+                self._processes.append(process)
+            for connection in self._connections:
+                connection.recv()
+        else:
+            self._islands = [Island(rom_path, preset, config) for config in self.configs]
+
+    @property
+    def island_count(self) -> int:
+        return len(self.configs)
+
+    def run_generation(
+        self, session: EmulatorSession, generation: int
+    ) -> IslandGenerationResult:
+        started = time.perf_counter()
+        immigrants = self._pending
+        self._pending = [None] * self.island_count
+        migrant_count = self.migrant_count if generation % self.migration_interval == 0 else 0
+        messages = [
+            (generation, island_immigrants, migrant_count) for island_immigrants in immigrants
+        ]
+        steps = self._step(messages)
+        if migrant_count and self.island_count > 1:
+            self._pending = self._route([emigrants for _, emigrants in steps])
+        return merge_island_results(
+            [result for result, _ in steps],
+            [config.bot_count for config in self.configs],
+            session.goal_distance,
+            generation,
+            time.perf_counter() - started,
+            sum(block.shape[1] for block in immigrants if block is not None),
+        )
+
+    def _step(self, messages: List[Tuple[int, Optional[np.ndarray], int]]) -> List[IslandStep]:
+        if not self._connections:
+            return [island.step(*message) for island, message in zip(self._islands, messages)]
+        for connection, message in zip(self._connections, messages):
+            connection.send(message)
+        steps = []
+        for connection in self._connections:
+            reply = connection.recv()
+            if isinstance(reply, Exception):
+                raise reply
+            steps.append(reply)
+        return steps
+
+    def _route(self, emigrants: List[np.ndarray]) -> List[Optional[np.ndarray]]:
+        count = len(emigrants)
+        if self.topology == TOPOLOGY_RING:
+            return [emigrants[(index - 1) % count] for index in range(count)]
+        return [
+            np.concatenate(
+                [block for source, block in enumerate(emigrants) if source != index], axis=1
+            )
+            for index in range(count)
+        ]
+
+    def close(self) -> None:
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for connection in self._connections:
+            connection.close()
+        for island in self._islands:
+            island.stop()
+        self._connections = []
+        self._processes = []
+        self._islands = []
+
+    def __enter__(self) -> "IslandModel":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
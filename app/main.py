@@ -1,8 +1,23 @@
+import argparse
+from typing import List, Optional
+
 from gui import MarioBotsApp
 
 
-def main() -> None:
-    app = MarioBotsApp()
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Entrena bots de NES con interfaz gráfica.")
+    parser.add_argument(
+        "--dashboard-port",
+        type=int,
+        help="Publica las métricas en http://127.0.0.1:PUERTO/ (0 = puerto libre).",
+    )
+    args = parser.parse_args(argv)
+    if args.dashboard_port is not None and not 0 <= args.dashboard_port <= 65535:
+        parser.error("El puerto del panel debe estar entre 0 y 65535.")
+    try:
+        app = MarioBotsApp(dashboard_port=args.dashboard_port)
+    except OSError as error:
+        parser.error(f"No se pudo abrir el panel: {error}")
     app.run()
 
 
@@ -0,0 +1,1003 @@
+from __future__ import annotations
+
+import struct
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from backends import BACKEND_NROM, FRAME_HEIGHT, FRAME_WIDTH, EmulatorBackend
+from roms import (
+    CHR_BANK_SIZE,
+    INES_MAGIC,
+    MIRRORING_VERTICAL,
+    PRG_BANK_SIZE,
+    RomRegistry,
+    rom_registry,
+)
+RAM_SIZE = 0x0800
+PRG_RAM_SIZE = 0x2000
+CYCLES_PER_FRAME = 29781
+SPRITE_ZERO_CYCLE = 3410
+VBLANK_CYCLE = 27394
+OAM_DMA_CYCLES = 513
+NMI_VECTOR = 0xFFFA
+RESET_VECTOR = 0xFFFC
+IRQ_VECTOR = 0xFFFE
+
+OPCODES: Dict[int, Tuple[str, str, int]] = {
+    0x69: ("ADC", "imm", 2), 0x65: ("ADC", "zp", 3), 0x75: ("ADC", "zpx", 4),
+    0x6D: ("ADC", "abs", 4), 0x7D: ("ADC", "abx", 4), 0x79: ("ADC", "aby", 4),
+    0x61: ("ADC", "izx", 6), 0x71: ("ADC", "izy", 5),
+    0x29: ("AND", "imm", 2), 0x25: ("AND", "zp", 3), 0x35: ("AND", "zpx", 4),
+    0x2D: ("AND", "abs", 4), 0x3D: ("AND", "abx", 4), 0x39: ("AND", "aby", 4),
+    0x21: ("AND", "izx", 6), 0x31: ("AND", "izy", 5),
+    0x0A: ("ASL", "acc", 2), 0x06: ("ASL", "zp", 5), 0x16: ("ASL", "zpx", 6),
+    0x0E: ("ASL", "abs", 6), 0x1E: ("ASL", "abx", 7),
+    0x90: ("BCC", "rel", 2), 0xB0: ("BCS", "rel", 2), 0xF0: ("BEQ", "rel", 2),
+    0x30: ("BMI", "rel", 2), 0xD0: ("BNE", "rel", 2), 0x10: ("BPL", "rel", 2),
+    0x50: ("BVC", "rel", 2), 0x70: ("BVS", "rel", 2),
+    0x24: ("BIT", "zp", 3), 0x2C: ("BIT", "abs", 4),
+    0x00: ("BRK", "imp", 7),
+    0x18: ("CLC", "imp", 2), 0xD8: ("CLD", "imp", 2), 0x58: ("CLI", "imp", 2),
+    0xB8: ("CLV", "imp", 2),
+    0xC9: ("CMP", "imm", 2), 0xC5: ("CMP", "zp", 3), 0xD5: ("CMP", "zpx", 4),
+    0xCD: ("CMP", "abs", 4), 0xDD: ("CMP", "abx", 4), 0xD9: ("CMP", "aby", 4),
+    0xC1: ("CMP", "izx", 6), 0xD1: ("CMP", "izy", 5),
+    0xE0: ("CPX", "imm", 2), 0xE4: ("CPX", "zp", 3), 0xEC: ("CPX", "abs", 4),
+    0xC0: ("CPY", "imm", 2), 0xC4: ("CPY", "zp", 3), 0xCC: ("CPY", "abs", 4),
+    0xC6: ("DEC", "zp", 5), 0xD6: ("DEC", "zpx", 6), 0xCE: ("DEC", "abs", 6),
+    0xDE: ("DEC", "abx", 7),
+    0xCA: ("DEX", "imp", 2), 0x88: ("DEY", "imp", 2),
+    0x49: ("EOR", "imm", 2), 0x45: ("EOR", "zp", 3), 0x55: ("EOR", "zpx", 4),
+    0x4D: ("EOR", "abs", 4), 0x5D: ("EOR", "abx", 4), 0x59: ("EOR", "aby", 4),
+    0x41: ("EOR", "izx", 6), 0x51: ("EOR", "izy", 5),
+    0xE6: ("INC", "zp", 5), 0xF6: ("INC", "zpx", 6), 0xEE: ("INC", "abs", 6),
+    0xFE: ("INC", "abx", 7),
+    0xE8: ("INX", "imp", 2), 0xC8: ("INY", "imp", 2),
+    0x4C: ("JMP", "abs", 3), 0x6C: ("JMP", "ind", 5),
+    0x20: ("JSR", "abs", 6),
+    0xA9: ("LDA", "imm", 2), 0xA5: ("LDA", "zp", 3), 0xB5: ("LDA", "zpx", 4),
+    0xAD: ("LDA", "abs", 4), 0xBD: ("LDA", "abx", 4), 0xB9: ("LDA", "aby", 4),
+    0xA1: ("LDA", "izx", 6), 0xB1: ("LDA", "izy", 5),
+    0xA2: ("LDX", "imm", 2), 0xA6: ("LDX", "zp", 3), 0xB6: ("LDX", "zpy", 4),
+    0xAE: ("LDX", "abs", 4), 0xBE: ("LDX", "aby", 4),
+    0xA0: ("LDY", "imm", 2), 0xA4: ("LDY", "zp", 3), 0xB4: ("LDY", "zpx", 4),
+    0xAC: ("LDY", "abs", 4), 0xBC: ("LDY", "abx", 4),
+    0x4A: ("LSR", "acc", 2), 0x46: ("LSR", "zp", 5), 0x56: ("LSR", "zpx", 6),
+    0x4E: ("LSR", "abs", 6), 0x5E: ("LSR", "abx", 7),
+    0xEA: ("NOP", "imp", 2),
+    0x09: ("ORA", "imm", 2), 0x05: ("ORA", "zp", 3), 0x15: ("ORA", "zpx", 4),
+    0x0D: ("ORA", "abs", 4), 0x1D: ("ORA", "abx", 4), 0x19: ("ORA", "aby", 4),
+    0x01: ("ORA", "izx", 6), 0x11: ("ORA", "izy", 5),
+    0x48: ("PHA", "imp", 3), 0x08: ("PHP", "imp", 3), 0x68: ("PLA", "imp", 4),
+    0x28: ("PLP", "imp", 4),
+    0x2A: ("ROL", "acc", 2), 0x26: ("ROL", "zp", 5), 0x36: ("ROL", "zpx", 6),
+    0x2E: ("ROL", "abs", 6), 0x3E: ("ROL", "abx", 7),
+    0x6A: ("ROR", "acc", 2), 0x66: ("ROR", "zp", 5), 0x76: ("ROR", "zpx", 6),
+    0x6E: ("ROR", "abs", 6), 0x7E: ("ROR", "abx", 7),
+    0x40: ("RTI", "imp", 6), 0x60: ("RTS", "imp", 6),
+    0xE9: ("SBC", "imm", 2), 0xE5: ("SBC", "zp", 3), 0xF5: ("SBC", "zpx", 4),
+    0xED: ("SBC", "abs", 4), 0xFD: ("SBC", "abx", 4), 0xF9: ("SBC", "aby", 4),
+    0xE1: ("SBC", "izx", 6), 0xF1: ("SBC", "izy", 5),
+    0x38: ("SEC", "imp", 2), 0xF8: ("SED", "imp", 2), 0x78: ("SEI", "imp", 2),
+    0x85: ("STA", "zp", 3), 0x95: ("STA", "zpx", 4), 0x8D: ("STA", "abs", 4),
+    0x9D: ("STA", "abx", 5), 0x99: ("STA", "aby", 5), 0x81: ("STA", "izx", 6),
+    0x91: ("STA", "izy", 6),
+    0x86: ("STX", "zp", 3), 0x96: ("STX", "zpy", 4), 0x8E: ("STX", "abs", 4),
+    0x84: ("STY", "zp", 3), 0x94: ("STY", "zpx", 4), 0x8C: ("STY", "abs", 4),
+    0xAA: ("TAX", "imp", 2), 0xA8: ("TAY", "imp", 2), 0xBA: ("TSX", "imp", 2),
+    0x8A: ("TXA", "imp", 2), 0x9A: ("TXS", "imp", 2), 0x98: ("TYA", "imp", 2),
+}
+PAGE_PENALTY_OPERATIONS = {"ADC", "AND", "CMP", "EOR", "LDA", "LDX", "LDY", "ORA", "SBC"}
+_MODE_METHODS = {
+    "imp": "_implied",
+    "acc": "_accumulator",
+    "imm": "_immediate",
+    "zp": "_zero_page",
+    "zpx": "_zero_page_x",
+    "zpy": "_zero_page_y",
+    "abs": "_absolute",
+    "abx": "_absolute_x",
+    "aby": "_absolute_y",
+    "ind": "_indirect",
+    "izx": "_indexed_indirect",
+    "izy": "_indirect_indexed",
+    "rel": "_relative",
+}
+_STATE_REGISTERS = struct.Struct("<4BHB?iI4BH?3B3B")
+
+ChrMemory = Union[memoryview, bytearray]
+StateBuffer = Union[bytearray, memoryview]
+
+
+class Cartridge:
+    def __init__(self, rom_path: str, registry: Optional[RomRegistry] = None) -> None:
+        self.path = Path(rom_path)
+        registry = registry or rom_registry()
+        entry = registry.entry(rom_path)
+        header = entry.header
+        if header is None:
+            raise ValueError("ROM inválida: falta la cabecera iNES.")
+        self.sha256 = entry.sha256
+        self.mapper = header.mapper
+        self.vertical_mirroring = header.mirroring == MIRRORING_VERTICAL
+        self.prg_size = header.prg_size
+        self.chr_size = header.chr_size
+        if entry.size < header.expected_size:
+            raise ValueError("ROM inválida: el archivo está truncado.")
+        self._view: Optional[memoryview] = memoryview(registry.mapping(rom_path))
+        offset = header.data_offset
+        self.prg = self._view[offset : offset + self.prg_size]
+        self.chr = self._view[offset + self.prg_size : offset + self.prg_size + self.chr_size]
+
+    def close(self) -> None:
+        for name in ("prg", "chr", "_view"):
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+        self._view = None
+
+
+class Controller:
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.buttons = 0
+        self.strobe = 0
+        self.shift = 0
+
+    def write(self, value: int) -> None:
+        self.strobe = value & 0x01
+        if self.strobe:
+            self.shift = self.buttons
+
+    def read(self) -> int:
+        if self.strobe:
+            return 0x40 | (self.buttons & 0x01)
+        value = self.shift & 0x01
+        self.shift = (self.shift >> 1) | 0x80
+        return 0x40 | value
+
+
+class PPU:
+    def __init__(self, chr_memory: ChrMemory, chr_writable: bool, vertical_mirroring: bool) -> None:
+        self.chr = chr_memory
+        self.chr_writable = chr_writable
+        self.vertical_mirroring = vertical_mirroring
+        self.oam = bytearray(256)
+        self.nametables = bytearray(0x800)
+        self.palette = bytearray(32)
+        self.reset()
+
+    def reset(self) -> None:
+        self.ctrl = 0
+        self.mask = 0
+        self.status = 0
+        self.oam_address = 0
+        self.address = 0
+        self.latch = False
+        self.buffer = 0
+        self.scroll_x = 0
+        self.scroll_y = 0
+        self.nmi_request = False
+        self.oam[:] = bytes(len(self.oam))
+        self.nametables[:] = bytes(len(self.nametables))
+        self.palette[:] = bytes(len(self.palette))
+
+    def read_register(self, register: int) -> int:
+        if register == 2:
+            value = self.status | (self.buffer & 0x1F)
+            self.status &= 0x7F
+            self.latch = False
+            return value
+        if register == 4:
+            return self.oam[self.oam_address]
+        if register == 7:
+            address = self.address
+            self._advance()
+            if address >= 0x3F00:
+                self.buffer = self._read_vram(address - 0x1000)
+                return self.palette[self._palette_index(address)]
+            value = self.buffer
+            self.buffer = self._read_vram(address)
+            return value
+        return 0
+
+    def write_register(self, register: int, value: int) -> None:
+        if register == 0:
+            if value & 0x80 and not self.ctrl & 0x80 and self.status & 0x80:
+                self.nmi_request = True
+            self.ctrl = value
+        elif register == 1:
+            self.mask = value
+        elif register == 3:
+            self.oam_address = value
+        elif register == 4:
+            self.oam[self.oam_address] = value
+            self.oam_address = (self.oam_address + 1) & 0xFF
+        elif register == 5:
+            if self.latch:
+                self.scroll_y = value
+            else:
+                self.scroll_x = value
+            self.latch = not self.latch
+        elif register == 6:
+            if self.latch:
+                self.address = (self.address & 0x3F00) | value
+            else:
+                self.address = ((value & 0x3F) << 8) | (self.address & 0xFF)
+            self.latch = not self.latch
+        elif register == 7:
+            self._write_vram(self.address, value)
+            self._advance()
+
+    def _advance(self) -> None:
+        self.address = (self.address + (32 if self.ctrl & 0x04 else 1)) & 0x3FFF
+
+    def _read_vram(self, address: int) -> int:
+        address &= 0x3FFF
+        if address < 0x2000:
+            return self.chr[address] if address < len(self.chr) else 0
+        if address < 0x3F00:
+            return self.nametables[self._nametable_index(address)]
+        return self.palette[self._palette_index(address)]
+
+    def _write_vram(self, address: int, value: int) -> None:
+        if address < 0x2000:
+            if self.chr_writable and address < len(self.chr):
+                self.chr[address] = value
+        elif address < 0x3F00:
+            self.nametables[self._nametable_index(address)] = value
+        else:
+            self.palette[self._palette_index(address)] = value & 0x3F
+
+    def _nametable_index(self, address: int) -> int:
+        offset = (address - 0x2000) & 0x0FFF
+        table = offset >> 10
+        table = table & 0x01 if self.vertical_mirroring else table >> 1
+        return (table << 10) | (offset & 0x03FF)
+
+    @staticmethod
+    def _palette_index(address: int) -> int:
+        index = address & 0x1F
+        return index - 0x10 if index in (0x10, 0x14, 0x18, 0x1C) else index
+
+    def render(self, out: np.ndarray) -> None:
+        palette = np.frombuffer(self.palette, dtype=np.uint8) & 0x3F
+        out.fill(palette[0])
+        opaque = np.zeros((FRAME_HEIGHT, FRAME_WIDTH), dtype=bool)
+        if self.mask & 0x08:
+            pixels = self._background_pixels()
+            opaque = (pixels & 0x03) != 0
+            out[opaque] = palette[pixels[opaque]]
+        if self.mask & 0x10:
+            self._render_sprites(out, palette, opaque)
+
+    def _pattern_table(self, base: int) -> np.ndarray:
+        data = np.zeros(0x1000, dtype=np.uint8)
+        chunk = np.frombuffer(self.chr[base : base + 0x1000], dtype=np.uint8)
+        data[: len(chunk)] = chunk
+        planes = np.unpackbits(data.reshape(256, 2, 8), axis=2).reshape(256, 2, 8, 8)
+        return planes[:, 0] | (planes[:, 1] << 1)
+
+    def _background_pixels(self) -> np.ndarray:
+        tiles = self._pattern_table(0x1000 if self.ctrl & 0x10 else 0)
+        plane = np.empty((2 * FRAME_HEIGHT, 2 * FRAME_WIDTH), dtype=np.uint8)
+        rows = np.arange(30)[:, None]
+        columns = np.arange(32)[None, :]
+        shifts = ((rows & 0x02) << 1) | (columns & 0x02)
+        for table in range(4):
+            start = self._nametable_index(0x2000 + (table << 10))
+            nametable = np.frombuffer(self.nametables, dtype=np.uint8)[start : start + 0x400]
+            attributes = nametable[0x3C0:][(rows >> 2) * 8 + (columns >> 2)]
+            palettes = ((attributes >> shifts) & 0x03) << 2
+            pixels = tiles[nametable[:0x3C0].reshape(30, 32)]
+            pixels = np.where(pixels != 0, pixels | palettes[:, :, None, None], 0)
+            top = (table >> 1) * FRAME_HEIGHT
+            left = (table & 0x01) * FRAME_WIDTH
+            plane[top : top + FRAME_HEIGHT, left : left + FRAME_WIDTH] = pixels.transpose(
+                0, 2, 1, 3
+            ).reshape(FRAME_HEIGHT, FRAME_WIDTH)
+        scroll_x = (self.ctrl & 0x01) * FRAME_WIDTH + self.scroll_x
+        scroll_y = ((self.ctrl >> 1) & 0x01) * FRAME_HEIGHT + min(self.scroll_y, FRAME_HEIGHT - 1)
+        ys = (scroll_y + np.arange(FRAME_HEIGHT)) % (2 * FRAME_HEIGHT)
+        xs = (scroll_x + np.arange(FRAME_WIDTH)) % (2 * FRAME_WIDTH)
+        return plane[np.ix_(ys, xs)]
+
+    def _render_sprites(self, out: np.ndarray, palette: np.ndarray, opaque: np.ndarray) -> None:
+        tall = bool(self.ctrl & 0x20)
+        tables = (
+            (self._pattern_table(0), self._pattern_table(0x1000))
+            if tall
+            else (self._pattern_table(0x1000 if self.ctrl & 0x08 else 0),) * 2
+        )
+        for sprite in range(63, -1, -1):
+            y, tile, attributes, x = self.oam[sprite * 4 : sprite * 4 + 4]
+            top = y + 1
+            if top >= FRAME_HEIGHT:
+                continue
+            if tall:
+                table = tables[tile & 0x01]
+                pixels = np.concatenate((table[tile & 0xFE], table[tile | 0x01]))
+            else:
+                pixels = tables[0][tile]
+            if attributes & 0x40:
+                pixels = pixels[:, ::-1]
+            if attributes & 0x80:
+                pixels = pixels[::-1]
+            pixels = pixels[: FRAME_HEIGHT - top, : FRAME_WIDTH - x]
+            height, width = pixels.shape
+            visible = pixels != 0
+            if attributes & 0x20:
+                visible &= ~opaque[top : top + height, x : x + width]
+            colors = palette[0x10 | ((attributes & 0x03) << 2) | pixels]
+            target = out[top : top + height, x : x + width]
+            target[visible] = colors[visible]
+
+
+class NROMBus:
+    def __init__(self, cartridge: Cartridge) -> None:
+        self.cartridge = cartridge
+        self.prg = cartridge.prg
+        self.prg_mask = len(cartridge.prg) - 1
+        self.ram = bytearray(RAM_SIZE)
+        self.prg_ram = bytearray(PRG_RAM_SIZE)
+        chr_memory: ChrMemory = cartridge.chr if cartridge.chr_size else bytearray(CHR_BANK_SIZE)
+        self.ppu = PPU(chr_memory, not cartridge.chr_size, cartridge.vertical_mirroring)
+        self.controller = Controller()
+        self.cpu: Optional[CPU] = None
+
+    def reset(self) -> None:
+        self.ram[:] = bytes(RAM_SIZE)
+        self.prg_ram[:] = bytes(PRG_RAM_SIZE)
+        self.ppu.reset()
+        self.controller.reset()
+
+    def read(self, address: int) -> int:
+        if address < 0x2000:
+            return self.ram[address & 0x07FF]
+        if address >= 0x8000:
+            return self.prg[address & self.prg_mask]
+        if address < 0x4000:
+            return self.ppu.read_register(address & 0x07)
+        if address == 0x4016:
+            return self.controller.read()
+        if address >= 0x6000:
+            return self.prg_ram[address - 0x6000]
+        return 0
+
+    def peek(self, address: int) -> int:
+        if address < 0x2000:
+            return self.ram[address & 0x07FF]
+        if address >= 0x8000:
+            return self.prg[address & self.prg_mask]
+        if 0x6000 <= address < 0x8000:
+            return self.prg_ram[address - 0x6000]
+        return 0
+
+    def write(self, address: int, value: int) -> None:
+        if address < 0x2000:
+            self.ram[address & 0x07FF] = value
+        elif address < 0x4000:
+            ppu = self.ppu
+            ppu.write_register(address & 0x07, value)
+            if ppu.nmi_request:
+                ppu.nmi_request = False
+                self.cpu.nmi_pending = True
+        elif address == 0x4014:
+            self._oam_dma(value << 8)
+        elif address == 0x4016:
+            self.controller.write(value)
+        elif 0x6000 <= address < 0x8000:
+            self.prg_ram[address - 0x6000] = value
+
+    def _oam_dma(self, page: int) -> None:
+        oam = self.ppu.oam
+        start = self.ppu.oam_address
+        if page < 0x2000:
+            data = self.ram[page & 0x07FF : (page & 0x07FF) + 256]
+        else:
+            data = bytes(self.read(page + offset) for offset in range(256))
+        oam[start:] = data[: 256 - start]
+        oam[:start] = data[256 - start :]
+        self.cpu.cycles += OAM_DMA_CYCLES
+
+
+class CPU:
+    def __init__(self, bus: NROMBus) -> None:
+        self.read = bus.read
+        self.write = bus.write
+        self.ram = bus.ram
+        self.a = 0
+        self.x = 0
+        self.y = 0
+        self.sp = 0xFD
+        self.pc = 0
+        self.carry = 0
+        self.zero = 0
+        self.interrupt = 1
+        self.decimal = 0
+        self.overflow = 0
+        self.negative = 0
+        self.cycles = 0
+        self.nmi_pending = False
+        self._table = self._build_table()
+
+    def _build_table(self) -> List[Tuple[Callable[[int], None], Callable[[], int], int]]:
+        table = []
+        for opcode in range(256):
+            entry = OPCODES.get(opcode)
+            if entry is None:
+                table.append((lambda _, opcode=opcode: self._illegal(opcode), self._implied, 2))
+                continue
+            mnemonic, mode, cycles = entry
+            mode_name = _MODE_METHODS[mode]
+            if mnemonic in PAGE_PENALTY_OPERATIONS and mode in ("abx", "aby", "izy"):
+                mode_name += "_read"
+            table.append((getattr(self, f"_{mnemonic.lower()}"), getattr(self, mode_name), cycles))
+        return table
+
+    @property
+    def status(self) -> int:
+        return (
+            (self.negative << 7)
+            | (self.overflow << 6)
+            | 0x20
+            | (self.decimal << 3)
+            | (self.interrupt << 2)
+            | (self.zero << 1)
+            | self.carry
+        )
+
+    @status.setter
+    def status(self, value: int) -> None:
+        self.negative = (value >> 7) & 1
+        self.overflow = (value >> 6) & 1
+        self.decimal = (value >> 3) & 1
+        self.interrupt = (value >> 2) & 1
+        self.zero = (value >> 1) & 1
+        self.carry = value & 1
+
+    def reset(self) -> None:
+        self.a = self.x = self.y = 0
+        self.sp = 0xFD
+        self.status = 0x24
+        self.cycles = 0
+        self.nmi_pending = False
+        self.pc = self.read16(RESET_VECTOR)
+
+    def read16(self, address: int) -> int:
+        return self.read(address) | (self.read((address + 1) & 0xFFFF) << 8)
+
+    def run(self, target_cycles: int) -> None:
+        read = self.read
+        table = self._table
+        while self.cycles < target_cycles:
+            if self.nmi_pending:
+                self.nmi_pending = False
+                self._interrupt(NMI_VECTOR, 0x20)
+            pc = self.pc
+            operation, mode, cycles = table[read(pc)]
+            self.pc = (pc + 1) & 0xFFFF
+            self.cycles += cycles
+            operation(mode())
+
+    def step(self) -> None:
+        self.run(self.cycles + 1)
+
+    def _interrupt(self, vector: int, flags: int) -> None:
+        self._push((self.pc >> 8) & 0xFF)
+        self._push(self.pc & 0xFF)
+        self._push(self.status & ~0x10 | flags)
+        self.interrupt = 1
+        self.pc = self.read16(vector)
+        self.cycles += 7
+
+    def _push(self, value: int) -> None:
+        self.ram[0x100 | self.sp] = value
+        self.sp = (self.sp - 1) & 0xFF
+
+    def _pull(self) -> int:
+        self.sp = (self.sp + 1) & 0xFF
+        return self.ram[0x100 | self.sp]
+
+    def _set_zn(self, value: int) -> None:
+        self.zero = int(value == 0)
+        self.negative = value >> 7
+
+    def _illegal(self, opcode: int) -> None:
+        raise ValueError(f"Opcode no soportado ${opcode:02X} en ${(self.pc - 1) & 0xFFFF:04X}.")
+
+    def _implied(self) -> int:
+        return 0
+
+    def _accumulator(self) -> int:
+        return -1
+
+    def _immediate(self) -> int:
+        address = self.pc
+        self.pc = (address + 1) & 0xFFFF
+        return address
+
+    def _zero_page(self) -> int:
+        address = self.read(self.pc)
+        self.pc = (self.pc + 1) & 0xFFFF
+        return address
+
+    def _zero_page_x(self) -> int:
+        address = (self.read(self.pc) + self.x) & 0xFF
+        self.pc = (self.pc + 1) & 0xFFFF
+        return address
+
+    def _zero_page_y(self) -> int:
+        address = (self.read(self.pc) + self.y) & 0xFF
+        self.pc = (self.pc + 1) & 0xFFFF
+        return address
+
+    def _absolute(self) -> int:
+        address = self.read16(self.pc)
+        self.pc = (self.pc + 2) & 0xFFFF
+        return address
+
+    def _absolute_x(self) -> int:
+        address = (self.read16(self.pc) + self.x) & 0xFFFF
+        self.pc = (self.pc + 2) & 0xFFFF
+        return address
+
+    def _absolute_x_read(self) -> int:
+        base = self.read16(self.pc)
+        self.pc = (self.pc + 2) & 0xFFFF
+        address = (base + self.x) & 0xFFFF
+        if (base ^ address) & 0xFF00:
+            self.cycles += 1
+        return address
+
+    def _absolute_y(self) -> int:
+        address = (self.read16(self.pc) + self.y) & 0xFFFF
+        self.pc = (self.pc + 2) & 0xFFFF
+        return address
+
+    def _absolute_y_read(self) -> int:
+        base = self.read16(self.pc)
+        self.pc = (self.pc + 2) & 0xFFFF
+        address = (base + self.y) & 0xFFFF
+        if (base ^ address) & 0xFF00:
+            self.cycles += 1
+        return address
+
+    def _indirect(self) -> int:
+        pointer = self.read16(self.pc)
+        self.pc = (self.pc + 2) & 0xFFFF
+        high = self.read((pointer & 0xFF00) | ((pointer + 1) & 0xFF))
+        return self.read(pointer) | (high << 8)
+
+    def _indexed_indirect(self) -> int:
+        pointer = (self.read(self.pc) + self.x) & 0xFF
+        self.pc = (self.pc + 1) & 0xFFFF
+        return self.ram[pointer] | (self.ram[(pointer + 1) & 0xFF] << 8)
+
+    def _indirect_indexed(self) -> int:
+        pointer = self.read(self.pc)
+        self.pc = (self.pc + 1) & 0xFFFF
+        base = self.ram[pointer] | (self.ram[(pointer + 1) & 0xFF] << 8)
+        return (base + self.y) & 0xFFFF
+
+    def _indirect_indexed_read(self) -> int:
+        pointer = self.read(self.pc)
+        self.pc = (self.pc + 1) & 0xFFFF
+        base = self.ram[pointer] | (self.ram[(pointer + 1) & 0xFF] << 8)
+        address = (base + self.y) & 0xFFFF
+        if (base ^ address) & 0xFF00:
+            self.cycles += 1
+        return address
+
+    def _relative(self) -> int:
+        offset = self.read(self.pc)
+        self.pc = (self.pc + 1) & 0xFFFF
+        if offset & 0x80:
+            offset -= 0x100
+        return (self.pc + offset) & 0xFFFF
+
+    def _add(self, value: int) -> None:
+        total = self.a + value + self.carry
+        result = total & 0xFF
+        self.overflow = int(bool(~(self.a ^ value) & (self.a ^ result) & 0x80))
+        self.carry = int(total > 0xFF)
+        self.a = result
+        self._set_zn(result)
+
+    def _adc(self, address: int) -> None:
+        self._add(self.read(address))
+
+    def _sbc(self, address: int) -> None:
+        self._add(self.read(address) ^ 0xFF)
+
+    def _and(self, address: int) -> None:
+        self.a &= self.read(address)
+        self._set_zn(self.a)
+
+    def _ora(self, address: int) -> None:
+        self.a |= self.read(address)
+        self._set_zn(self.a)
+
+    def _eor(self, address: int) -> None:
+        self.a ^= self.read(address)
+        self._set_zn(self.a)
+
+    def _compare(self, register: int, value: int) -> None:
+        self.carry = int(register >= value)
+        self._set_zn((register - value) & 0xFF)
+
+    def _cmp(self, address: int) -> None:
+        self._compare(self.a, self.read(address))
+
+    def _cpx(self, address: int) -> None:
+        self._compare(self.x, self.read(address))
+
+    def _cpy(self, address: int) -> None:
+        self._compare(self.y, self.read(address))
+
+    def _bit(self, address: int) -> None:
+        value = self.read(address)
+        self.zero = int(self.a & value == 0)
+        self.overflow = (value >> 6) & 1
+        self.negative = value >> 7
+
+    def _lda(self, address: int) -> None:
+        self.a = self.read(address)
+        self._set_zn(self.a)
+
+    def _ldx(self, address: int) -> None:
+        self.x = self.read(address)
+        self._set_zn(self.x)
+
+    def _ldy(self, address: int) -> None:
+        self.y = self.read(address)
+        self._set_zn(self.y)
+
+    def _sta(self, address: int) -> None:
+        self.write(address, self.a)
+
+    def _stx(self, address: int) -> None:
+        self.write(address, self.x)
+
+    def _sty(self, address: int) -> None:
+        self.write(address, self.y)
+
+    def _inc(self, address: int) -> None:
+        value = (self.read(address) + 1) & 0xFF
+        self.write(address, value)
+        self._set_zn(value)
+
+    def _dec(self, address: int) -> None:
+        value = (self.read(address) - 1) & 0xFF
+        self.write(address, value)
+        self._set_zn(value)
+
+    def _inx(self, _: int) -> None:
+        self.x = (self.x + 1) & 0xFF
+        self._set_zn(self.x)
+
+    def _iny(self, _: int) -> None:
+        self.y = (self.y + 1) & 0xFF
+        self._set_zn(self.y)
+
+    def _dex(self, _: int) -> None:
+        self.x = (self.x - 1) & 0xFF
+        self._set_zn(self.x)
+
+    def _dey(self, _: int) -> None:
+        self.y = (self.y - 1) & 0xFF
+        self._set_zn(self.y)
+
+    def _modify(self, address: int, function: Callable[[int], int]) -> None:
+        if address < 0:
+            self.a = function(self.a)
+            self._set_zn(self.a)
+            return
+        value = function(self.read(address))
+        self.write(address, value)
+        self._set_zn(value)
+
+    def _asl(self, address: int) -> None:
+        def shift(value: int) -> int:
+            self.carry = value >> 7
+            return (value << 1) & 0xFF
+
+        self._modify(address, shift)
+
+    def _lsr(self, address: int) -> None:
+        def shift(value: int) -> int:
+            self.carry = value & 0x01
+            return value >> 1
+
+        self._modify(address, shift)
+
+    def _rol(self, address: int) -> None:
+        def rotate(value: int) -> int:
+            carry = self.carry
+            self.carry = value >> 7
+            return ((value << 1) & 0xFF) | carry
+
+        self._modify(address, rotate)
+
+    def _ror(self, address: int) -> None:
+        def rotate(value: int) -> int:
+            carry = self.carry
+            self.carry = value & 0x01
+            return (value >> 1) | (carry << 7)
+
+        self._modify(address, rotate)
+
+    def _jmp(self, address: int) -> None:
+        self.pc = address
+
+    def _jsr(self, address: int) -> None:
+        ret = (self.pc - 1) & 0xFFFF
+        self._push(ret >> 8)
+        self._push(ret & 0xFF)
+        self.pc = address
+
+    def _rts(self, _: int) -> None:
+        low = self._pull()
+        self.pc = (((self._pull() << 8) | low) + 1) & 0xFFFF
+
+    def _rti(self, _: int) -> None:
+        self.status = self._pull()
+        low = self._pull()
+        self.pc = (self._pull() << 8) | low
+
+    def _brk(self, _: int) -> None:
+        self.pc = (self.pc + 1) & 0xFFFF
+        self._interrupt(IRQ_VECTOR, 0x30)
+        self.cycles -= 7
+
+    def _branch(self, address: int) -> None:
+        self.cycles += 2 if (self.pc ^ address) & 0xFF00 else 1
+        self.pc = address
+
+    def _bcc(self, address: int) -> None:
+        if not self.carry:
+            self._branch(address)
+
+    def _bcs(self, address: int) -> None:
+        if self.carry:
+            self._branch(address)
+
+    def _beq(self, address: int) -> None:
+        if self.zero:
+            self._branch(address)
+
+    def _bne(self, address: int) -> None:
+        if not self.zero:
+            self._branch(address)
+
+    def _bmi(self, address: int) -> None:
+        if self.negative:
+            self._branch(address)
+
+    def _bpl(self, address: int) -> None:
+        if not self.negative:
+            self._branch(address)
+
+    def _bvc(self, address: int) -> None:
+        if not self.overflow:
+            self._branch(address)
+
+    def _bvs(self, address: int) -> None:
+        if self.overflow:
+            self._branch(address)
+
+    def _clc(self, _: int) -> None:
+        self.carry = 0
+
+    def _sec(self, _: int) -> None:
+        self.carry = 1
+
+    def _cli(self, _: int) -> None:
+        self.interrupt = 0
+
+    def _sei(self, _: int) -> None:
+        self.interrupt = 1
+
+    def _cld(self, _: int) -> None:
+        self.decimal = 0
+
+    def _sed(self, _: int) -> None:
+        self.decimal = 1
+
+    def _clv(self, _: int) -> None:
+        self.overflow = 0
+
+    def _tax(self, _: int) -> None:
+        self.x = self.a
+        self._set_zn(self.x)
+
+    def _tay(self, _: int) -> None:
+        self.y = self.a
+        self._set_zn(self.y)
+
+    def _txa(self, _: int) -> None:
+        self.a = self.x
+        self._set_zn(self.a)
+
+    def _tya(self, _: int) -> None:
+        self.a = self.y
+        self._set_zn(self.a)
+
+    def _tsx(self, _: int) -> None:
+        self.x = self.sp
+        self._set_zn(self.x)
+
+    def _txs(self, _: int) -> None:
+        self.sp = self.x
+
+    def _pha(self, _: int) -> None:
+        self._push(self.a)
+
+    def _php(self, _: int) -> None:
+        self._push(self.status | 0x10)
+
+    def _pla(self, _: int) -> None:
+        self.a = self._pull()
+        self._set_zn(self.a)
+
+    def _plp(self, _: int) -> None:
+        self.status = self._pull()
+
+    def _nop(self, _: int) -> None:
+        pass
+
+
+class NROMBackend(EmulatorBackend):
+    name = BACKEND_NROM
+
+    def __init__(self, rom_path: str) -> None:
+        super().__init__()
+        self.cartridge = Cartridge(rom_path)
+        if self.cartridge.mapper != 0:
+            mapper = self.cartridge.mapper
+            self.cartridge.close()
+            raise ValueError(f"Mapper {mapper} no soportado: el backend NROM solo ejecuta mapper 0.")
+        if self.cartridge.prg_size not in (PRG_BANK_SIZE, 2 * PRG_BANK_SIZE):
+            self.cartridge.close()
+            raise ValueError("ROM NROM inválida: la PRG debe ocupar 16 o 32 KiB.")
+        self.bus = NROMBus(self.cartridge)
+        self.cpu = CPU(self.bus)
+        self.bus.cpu = self.cpu
+        self._frame_start = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self.bus.reset()
+        self.cpu.reset()
+        self.frame_count = 0
+        self._frame_start = 0
+
+    def run_frame(self, buttons: int) -> None:
+        cpu = self.cpu
+        ppu = self.bus.ppu
+        start = self._frame_start
+        self.bus.controller.buttons = buttons & 0xFF
+        cpu.run(start + SPRITE_ZERO_CYCLE)
+        ppu.status |= 0x40
+        cpu.run(start + VBLANK_CYCLE)
+        ppu.status |= 0x80
+        if ppu.ctrl & 0x80:
+            cpu.nmi_pending = True
+        cpu.run(start + CYCLES_PER_FRAME)
+        ppu.status &= 0x1F
+        self._frame_start = start + CYCLES_PER_FRAME
+        self.frame_count += 1
+
+    def read_memory(self, address: int) -> int:
+        return self.bus.peek(address)
+
+    @property
+    def state_size(self) -> int:
+        return _STATE_REGISTERS.size + sum(len(region) for region in self._state_regions())
+
+    def save_state(self, buffer: StateBuffer) -> None:
+        cpu = self.cpu
+        ppu = self.bus.ppu
+        controller = self.bus.controller
+        _STATE_REGISTERS.pack_into(
+            buffer,
+            0,
+            cpu.a,
+            cpu.x,
+            cpu.y,
+            cpu.sp,
+            cpu.pc,
+            cpu.status,
+            cpu.nmi_pending,
+            cpu.cycles - self._frame_start,
+            self.frame_count,
+            ppu.ctrl,
+            ppu.mask,
+            ppu.status,
+            ppu.oam_address,
+            ppu.address,
+            ppu.latch,
+            ppu.buffer,
+            ppu.scroll_x,
+            ppu.scroll_y,
+            controller.buttons,
+            controller.strobe,
+            controller.shift,
+        )
+        offset = _STATE_REGISTERS.size
+        for region in self._state_regions():
+            buffer[offset : offset + len(region)] = region
+            offset += len(region)
+
+    def load_state(self, buffer: StateBuffer) -> None:
+        cpu = self.cpu
+        ppu = self.bus.ppu
+        controller = self.bus.controller
+        (
+            cpu.a,
+            cpu.x,
+            cpu.y,
+            cpu.sp,
+            cpu.pc,
+            cpu.status,
+            cpu.nmi_pending,
+            cpu.cycles,
+            self.frame_count,
+            ppu.ctrl,
+            ppu.mask,
+            ppu.status,
+            ppu.oam_address,
+            ppu.address,
+            ppu.latch,
+            ppu.buffer,
+            ppu.scroll_x,
+            ppu.scroll_y,
+            controller.buttons,
+            controller.strobe,
+            controller.shift,
+        ) = _STATE_REGISTERS.unpack_from(buffer)
+        ppu.nmi_request = False
+        self._frame_start = 0
+        offset = _STATE_REGISTERS.size
+        for region in self._state_regions():
+            region[:] = buffer[offset : offset + len(region)]
+            offset += len(region)
+
+    def render_frame(self, out: np.ndarray) -> None:
+        self.bus.ppu.render(out)
+
+    def _state_regions(self) -> Tuple[bytearray, ...]:
+        ppu = self.bus.ppu
+        regions = (self.bus.ram, self.bus.prg_ram, ppu.oam, ppu.nametables, ppu.palette)
+        return regions + (ppu.chr,) if ppu.chr_writable else regions
+
+    def close(self) -> None:
+        self.cartridge.close()
+
+
+def build_nrom_image(
+    program: bytes,
+    nmi_handler: bytes = b"\x40",
+    chr_data: bytes = b"",
+    prg_banks: int = 1,
+    vertical_mirroring: bool = False,
+) -> bytes:
+    prg_size = prg_banks * PRG_BANK_SIZE
+    nmi_offset = prg_size - 0x100
+    if len(program) > nmi_offset or len(nmi_handler) > 0xFA:
+        raise ValueError("Programa demasiado grande para la PRG indicada.")
+    prg = bytearray(prg_size)
+    prg[: len(program)] = program
+    prg[nmi_offset : nmi_offset + len(nmi_handler)] = nmi_handler
+    base = 0x10000 - prg_size
+    nmi_address = base + nmi_offset
+    prg[-6:] = bytes(
+        (nmi_address & 0xFF, nmi_address >> 8, base & 0xFF, base >> 8, 0x00, base >> 8)
+    )
+    chr_banks = (len(chr_data) + CHR_BANK_SIZE - 1) // CHR_BANK_SIZE
+    header = INES_MAGIC + bytes((prg_banks, chr_banks, int(vertical_mirroring), 0)) + bytes(8)
+    return header + bytes(prg) + chr_data.ljust(chr_banks * CHR_BANK_SIZE, b"\x00")
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import math
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+
+from emulation import GENE_COUNT
+from streams import PURPOSE_BREED, stream_uniforms
+
+if TYPE_CHECKING:
+    from bots import GenomePool
+
+OPTIMIZER_GA = "ga"
+OPTIMIZER_CMAES = "cmaes"
+OPTIMIZERS = (OPTIMIZER_GA, OPTIMIZER_CMAES)
+MIN_SIGMA = 1e-4
+MAX_SIGMA = 0.5
+CMAES_STATE_SIZE = 3 * GENE_COUNT + GENE_COUNT * GENE_COUNT + 2
+
+
+def stream_normals(
+    seed: int, generation: int, bot_indices: np.ndarray, purpose: int, count: int
+) -> np.ndarray:
+    uniforms = stream_uniforms(seed, generation, bot_indices, purpose, 2 * ((count + 1) // 2))
+    radius = np.sqrt(-2.0 * np.log1p(-uniforms[:, 0::2]))
+    angle = 2.0 * math.pi * uniforms[:, 1::2]
+    normals = np.empty_like(uniforms)
+    normals[:, 0::2] = radius * np.cos(angle)
+    normals[:, 1::2] = radius * np.sin(angle)
+    return normals[:, :count]
+
+
+class Optimizer(ABC):
+    name = ""
+    keeps_elites = False
+
+    @abstractmethod
+    def breed(
+        self,
+        pool: GenomePool,
+        ranked_indices: np.ndarray,
+        seed: int,
+        generation: int,
+        chunk_size: int = 65536,
+    ) -> None:
+        ...
+
+    def reset(self) -> None:
+        pass
+
+    def state(self) -> np.ndarray:
+        return np.empty(0)
+
+    def load_state(self, state: np.ndarray) -> None:
+        self.reset()
+        if len(state):
+            raise ValueError("El checkpoint guarda el estado de otro optimizador.")
+
+
+class GeneticOptimizer(Optimizer):
+    name = OPTIMIZER_GA
+    keeps_elites = True
+
+    def breed(
+        self,
+        pool: GenomePool,
+        ranked_indices: np.ndarray,
+        seed: int,
+        generation: int,
+        chunk_size: int = 65536,
+    ) -> None:
+        pool.breed(ranked_indices, seed, generation, chunk_size)
+
+
+class CMAESOptimizer(Optimizer):
+    name = OPTIMIZER_CMAES
+
+    def __init__(self, sigma: Optional[float] = None) -> None:
+        self.initial_sigma = sigma
+        self.reset()
+
+    def reset(self) -> None:
+        self.mean: Optional[np.ndarray] = None
+        self.sigma = 0.0
+        self.covariance = np.eye(GENE_COUNT)
+        self.path_sigma = np.zeros(GENE_COUNT)
+        self.path_covariance = np.zeros(GENE_COUNT)
+        self.updates = 0
+        self._basis = np.eye(GENE_COUNT)
+        self._scales = np.ones(GENE_COUNT)
+
+    def state(self) -> np.ndarray:
+        if self.mean is None:
+            return np.empty(0)
+        return np.concatenate(
+            (
+                self.mean,
+                (self.sigma, self.updates),
+                self.covariance.ravel(),
+                self.path_sigma,
+                self.path_covariance,
+            )
+        )
+
+    def load_state(self, state: np.ndarray) -> None:
+        self.reset()
+        if not len(state):
+            return
+        if len(state) != CMAES_STATE_SIZE:
+            raise ValueError("El checkpoint guarda el estado de otro optimizador.")
+        state = np.asarray(state, dtype=np.float64)
+        covariance_end = GENE_COUNT + 2 + GENE_COUNT * GENE_COUNT
+        self.mean = state[:GENE_COUNT].copy()
+        self.sigma = float(state[GENE_COUNT])
+        self.updates = int(state[GENE_COUNT + 1])
+        self.covariance = state[GENE_COUNT + 2 : covariance_end].reshape(GENE_COUNT, GENE_COUNT)
+        self.path_sigma = state[covariance_end : covariance_end + GENE_COUNT].copy()
+        self.path_covariance = state[covariance_end + GENE_COUNT :].copy()
+        self._decompose()
+
+    def breed(
+        self,
+        pool: GenomePool,
+        ranked_indices: np.ndarray,
+        seed: int,
+        generation: int,
+        chunk_size: int = 65536,
+    ) -> None:
+        if self.mean is None:
+            self._initialize(pool.genes)
+        selected = pool.genes[:, np.asarray(ranked_indices, dtype=np.int64)].T.astype(np.float64)
+        self._update(selected)
+        transform = self._basis * self._scales
+        for start in range(0, len(pool), max(1, chunk_size)):
+            stop = min(len(pool), start + chunk_size)
+            normals = stream_normals(
+                seed, generation, np.arange(start, stop), PURPOSE_BREED, GENE_COUNT
+            )
+            samples = self.mean + self.sigma * normals @ transform.T
+            np.clip(samples, 0.0, 1.0, out=samples)
+            pool.genes[:, start:stop] = samples.T
+
+    def _initialize(self, genes: np.ndarray) -> None:
+        genes = genes.astype(np.float64)
+        self.mean = genes.mean(axis=1)
+        covariance = np.cov(genes) if genes.shape[1] > 1 else np.eye(GENE_COUNT)
+        spread = math.sqrt(max(np.trace(covariance) / GENE_COUNT, MIN_SIGMA**2))
+        self.sigma = self.initial_sigma or min(MAX_SIGMA, spread)
+        self.covariance = covariance / spread**2 + np.eye(GENE_COUNT) * 1e-6
+        self._decompose()
+
+    def _update(self, selected: np.ndarray) -> None:
+        dimension = GENE_COUNT
+        mu = len(selected)
+        weights = math.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+        weights /= weights.sum()
+        mu_eff = 1.0 / np.sum(weights**2)
+        c_sigma = (mu_eff + 2) / (dimension + mu_eff + 5)
+        d_sigma = (
+            1 + 2 * max(0.0, math.sqrt((mu_eff - 1) / (dimension + 1)) - 1) + c_sigma
+        )
+        c_c = (4 + mu_eff / dimension) / (dimension + 4 + 2 * mu_eff / dimension)
+        c_1 = 2 / ((dimension + 1.3) ** 2 + mu_eff)
+        c_mu = min(
+            1 - c_1, 2 * (mu_eff - 2 + 1 / mu_eff) / ((dimension + 2) ** 2 + mu_eff)
+        )
+        chi_n = math.sqrt(dimension) * (
+            1 - 1 / (4 * dimension) + 1 / (21 * dimension**2)
+        )
+
+        steps = (selected - self.mean) / self.sigma
+        step = weights @ steps
+        self.mean = self.mean + self.sigma * step
+        whitened = self._basis @ ((self._basis.T @ step) / self._scales)
+        self.path_sigma = (1 - c_sigma) * self.path_sigma + math.sqrt(
+            c_sigma * (2 - c_sigma) * mu_eff
+        ) * whitened
+        self.updates += 1
+        norm = float(np.linalg.norm(self.path_sigma))
+        correction = math.sqrt(1 - (1 - c_sigma) ** (2 * self.updates))
+        steady = norm / correction / chi_n < 1.4 + 2 / (dimension + 1)
+        self.path_covariance = (1 - c_c) * self.path_covariance
+        if steady:
+            self.path_covariance += math.sqrt(c_c * (2 - c_c) * mu_eff) * step
+        rank_one = np.outer(self.path_covariance, self.path_covariance)
+        if not steady:
+            rank_one += c_c * (2 - c_c) * self.covariance
+        rank_mu = (steps * weights[:, None]).T @ steps
+        self.covariance = (
+            (1 - c_1 - c_mu) * self.covariance + c_1 * rank_one + c_mu * rank_mu
+        )
+        self.sigma *= math.exp((c_sigma / d_sigma) * (norm / chi_n - 1))
+        self.sigma = min(MAX_SIGMA, max(MIN_SIGMA, self.sigma))
+        self._decompose()
+
+    def _decompose(self) -> None:
+        self.covariance = (self.covariance + self.covariance.T) / 2
+        eigenvalues, self._basis = np.linalg.eigh(self.covariance)
+        self._scales = np.sqrt(np.maximum(eigenvalues, 1e-12))
+
+
+def make_optimizer(name: str) -> Optimizer:
+    if name == OPTIMIZER_GA:
+        return GeneticOptimizer()
+    if name == OPTIMIZER_CMAES:
+        return CMAESOptimizer()
+    raise ValueError(f"Optimizador desconocido: {name}")
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Deque, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from backends import BACKEND_SYNTHETIC
+from emulation import EmulatorSession, EpisodeBatch
+from presets import ControlPreset
+
+WORKER_SESSION_LIMIT = 8
+
+_WORKER_SESSIONS: "OrderedDict[Tuple[str, str, str], EmulatorSession]" = OrderedDict()
+
+
+def preset_payload(preset: ControlPreset) -> str:
+    return json.dumps(preset.to_dict(), ensure_ascii=False, sort_keys=True)
+
+
+def worker_session(
+    rom_path: str, payload: str, backend: str = BACKEND_SYNTHETIC
+) -> EmulatorSession:
+    key = (rom_path, payload, backend)
+    session = _WORKER_SESSIONS.get(key)
+    if session is not None:
+        _WORKER_SESSIONS.move_to_end(key)
+        return session
+    session = EmulatorSession(
+        rom_path, ControlPreset.from_dict(json.loads(payload)), backend=backend
+    )
+    _WORKER_SESSIONS[key] = session
+    while len(_WORKER_SESSIONS) > WORKER_SESSION_LIMIT:
+        _, evicted = _WORKER_SESSIONS.popitem(last=False)
+        evicted.close()
+    return session
+
+
+def _evaluate_shard(
+    rom_path: str,
+    payload: str,
+    genes: np.ndarray,
+    generation: int,
+    start_index: int,
+    noise_keys: Optional[np.ndarray] = None,
+    frame_budget: Optional[int] = None,
+    backend: str = BACKEND_SYNTHETIC,
+) -> EpisodeBatch:
+    session = worker_session(rom_path, payload, backend)
+    return session.evaluate_population(
+        genes,
+        generation,
+        start_index=start_index,
+        noise_keys=noise_keys,
+        frame_budget=frame_budget,
+    )
+
+
+class ParallelEvaluator:
+    concurrent = True
+
+    def __init__(
+        self,
+        rom_path: str,
+        preset: ControlPreset,
+        workers: Optional[int] = None,
+        min_shard_size: int = 2048,
+        max_shard_size: int = 65536,
+        backend: str = BACKEND_SYNTHETIC,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        self.rom_path = str(rom_path)
+        self.payload = preset_payload(preset)
+        self.backend = backend
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.min_shard_size = max(1, min_shard_size)
+        self.max_shard_size = max(self.min_shard_size, max_shard_size)
+        self._owns_executor = executor is None
+        self._executor = executor or ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=worker_session,
+            initargs=(self.rom_path, self.payload, self.backend),
+        )
+
+    def evaluate(
+        self,
+        genes: np.ndarray,
+        generation: int,
+        noise_keys: Optional[np.ndarray] = None,
+        frame_budget: Optional[int] = None,
+    ) -> EpisodeBatch:
+        return EpisodeBatch.concatenate(
+            [
+                batch
+                for _, batch in self.evaluate_chunks(genes, generation, noise_keys, frame_budget)
+            ]
+        )
+
+    def evaluate_chunks(
+        self,
+        genes: np.ndarray,
+        generation: int,
+        noise_keys: Optional[np.ndarray] = None,
+        frame_budget: Optional[int] = None,
+    ) -> Iterator[Tuple[int, EpisodeBatch]]:
+        pending: Deque[Tuple[int, Future]] = deque()
+        for start, shard in self._shards(genes):
+            shard_keys = None if noise_keys is None else noise_keys[start : start + len(shard)]
+            pending.append(
+                (
+                    start,
+                    self._executor.submit(
+                        _evaluate_shard,
+                        self.rom_path,
+                        self.payload,
+                        shard,
+                        generation,
+                        start,
+                        shard_keys,
+                        frame_budget,
+                        self.backend,
+                    ),
+                )
+            )
+            if len(pending) >= self.workers * 2:
+                done_start, future = pending.popleft()
+                yield done_start, future.result()
+        while pending:
+            done_start, future = pending.popleft()
+            yield done_start, future.result()
+
+    def _shards(self, genes: np.ndarray) -> List[Tuple[int, np.ndarray]]:
+        count = len(genes)
+        shard_count = max(
+            1,
+            -(-count // self.max_shard_size),
+            min(self.workers, -(-count // self.min_shard_size)),
+        )
+        bounds = np.linspace(0, count, shard_count + 1).astype(int)
+        return [
+            (int(start), genes[start:end])
+            for start, end in zip(bounds[:-1], bounds[1:])
+            if end > start
+        ]
+
+    def close(self) -> None:
+        if self._owns_executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "ParallelEvaluator":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
@@ -1,7 +1,39 @@
+import hashlib
 import json
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+NES_BUTTON_BITS = {
+    "A": 0x01,
+    "B": 0x02,
+    "SELECT": 0x04,
+    "START": 0x08,
+    "UP": 0x10,
+    "DOWN": 0x20,
+    "LEFT": 0x40,
+    "RIGHT": 0x80,
+}
+MAX_SEQUENCE_FRAMES = 3600
+
+
+@dataclass(frozen=True)
+class CompiledPreset:
+    content_hash: str
+    action_masks: Dict[str, int]
+    programs: Dict[str, bytes]
+    binding_count: int
+
+    @property
+    def action_complexity(self) -> int:
+        return self.binding_count + len(self.programs)
+
+    def frame_input(self, sequence: str, frame: int) -> int:
+        program = self.programs[sequence]
+        return program[frame] if 0 <= frame < len(program) else 0
+
+
+_COMPILED_PRESETS: Dict[str, CompiledPreset] = {}
 
 
 @dataclass
@@ -10,15 +42,102 @@ class ControlPreset:
     description: str
     buttons: Dict[str, str]
     sequences: List[Dict[str, str]]
+    _compiled: Optional[CompiledPreset] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     @classmethod
     def from_dict(cls, data: Dict[str, object]) -> "ControlPreset":
-        return cls(
+        if not isinstance(data, dict) or "game_title" not in data:
+            raise ValueError("Preset inválido: falta game_title.")
+        buttons = data.get("buttons", {})
+        sequences = data.get("sequences", [])
+        if not isinstance(buttons, dict) or not isinstance(sequences, list):
+            raise ValueError("Preset inválido: buttons debe ser un objeto y sequences una lista.")
+        preset = cls(
             game_title=str(data["game_title"]),
             description=str(data.get("description", "")),
-            buttons=dict(data.get("buttons", {})),
-            sequences=list(data.get("sequences", [])),
+            buttons=dict(buttons),
+            sequences=list(sequences),
         )
+        preset._compiled = compile_preset(preset)
+        return preset
+
+    @property
+    def compiled(self) -> CompiledPreset:
+        if self._compiled is None:
+            self._compiled = compile_preset(self)
+        return self._compiled
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "game_title": self.game_title,
+            "description": self.description,
+            "buttons": self.buttons,
+            "sequences": self.sequences,
+        }
+
+    def content_hash(self) -> str:
+        canonical = json.dumps(self.to_dict(), ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _parse_pattern(pattern: object, action_masks: Dict[str, int], name: str) -> int:
+    if not isinstance(pattern, str) or not pattern.strip():
+        raise ValueError(f"Secuencia '{name}': el patrón debe ser un texto no vacío.")
+    mask = 0
+    for token in pattern.split("+"):
+        token = token.strip()
+        if token in action_masks:
+            mask |= action_masks[token]
+        elif token.upper() in NES_BUTTON_BITS:
+            mask |= NES_BUTTON_BITS[token.upper()]
+        else:
+            raise ValueError(f"Secuencia '{name}': acción desconocida '{token}'.")
+    return mask
+
+
+def compile_preset(preset: ControlPreset) -> CompiledPreset:
+    content_hash = preset.content_hash()
+    cached = _COMPILED_PRESETS.get(content_hash)
+    if cached is not None:
+        return cached
+    action_masks: Dict[str, int] = {}
+    for button, action in preset.buttons.items():
+        bit = NES_BUTTON_BITS.get(str(button).upper())
+        if bit is None:
+            raise ValueError(f"Botón NES desconocido: '{button}'.")
+        if not isinstance(action, str) or not action.strip():
+            raise ValueError(f"El botón '{button}' necesita un nombre de acción.")
+        action_masks[action.strip()] = action_masks.get(action.strip(), 0) | bit
+    programs: Dict[str, bytes] = {}
+    for sequence in preset.sequences:
+        if not isinstance(sequence, dict):
+            raise ValueError("Cada secuencia debe ser un objeto con name, pattern y frames.")
+        name = str(sequence.get("name", "")).strip()
+        if not name:
+            raise ValueError("Cada secuencia necesita un nombre.")
+        if name in programs:
+            raise ValueError(f"Secuencia duplicada: '{name}'.")
+        frames = sequence.get("frames")
+        if (
+            isinstance(frames, bool)
+            or not isinstance(frames, int)
+            or not 0 < frames <= MAX_SEQUENCE_FRAMES
+        ):
+            raise ValueError(
+                f"Secuencia '{name}': frames debe ser un entero entre 1 y {MAX_SEQUENCE_FRAMES}."
+            )
+        mask = _parse_pattern(sequence.get("pattern"), action_masks, name)
+        programs[name] = bytes((mask,)) * frames
+    compiled = CompiledPreset(
+        content_hash=content_hash,
+        action_masks=action_masks,
+        programs=programs,
+        binding_count=len(preset.buttons),
+    )
+    _COMPILED_PRESETS[content_hash] = compiled
+    return compiled
 
 
 class PresetLibrary:
@@ -55,12 +174,6 @@ class PresetLibrary:
 
     @staticmethod
     def save(path: str, preset: ControlPreset) -> None:
-        payload = {
-            "game_title": preset.game_title,
-            "description": preset.description,
-            "buttons": preset.buttons,
-            "sequences": preset.sequences,
-        }
         Path(path).write_text(
-            json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8"
+            json.dumps(preset.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8"
         )
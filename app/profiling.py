@@ -0,0 +1,80 @@
+import cProfile
+import pstats
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional
+
+PHASE_EVALUATION = "evaluation"
+PHASE_RANKING = "ranking"
+PHASE_BREEDING = "breeding"
+PHASE_SERIALIZATION = "serialization"
+PHASE_RENDERING = "rendering"
+
+
+@dataclass
+class GenerationTimings:
+    generation: int
+    total_seconds: float
+    phases: Dict[str, float] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+
+
+class PhaseTimer:
+    def __init__(self) -> None:
+        self.phases: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self._started = time.perf_counter()
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def finish(self, generation: int) -> GenerationTimings:
+        return GenerationTimings(
+            generation=generation,
+            total_seconds=time.perf_counter() - self._started,
+            phases={name: round(seconds, 6) for name, seconds in self.phases.items()},
+            counters=dict(self.counters),
+        )
+
+
+class GenerationProfiler:
+    def __init__(self, first_generation: int, last_generation: int, output_path: str) -> None:
+        self.first_generation = first_generation
+        self.last_generation = max(first_generation, last_generation)
+        self.output_path = output_path
+        self._profile: Optional[cProfile.Profile] = None
+
+    def covers(self, generation: int) -> bool:
+        return self.first_generation <= generation <= self.last_generation
+
+    def begin(self, generation: int) -> None:
+        if not self.covers(generation):
+            return
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def end(self, generation: int) -> None:
+        if self._profile is None or not self.covers(generation):
+            return
+        self._profile.disable()
+        if generation == self.last_generation:
+            self.dump()
+
+    def dump(self) -> None:
+        if self._profile is None:
+            return
+        pstats.Stats(self._profile).dump_stats(self.output_path)
+        self._profile = None
@@ -0,0 +1,93 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Generic, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class LatestMailbox(Generic[T]):
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._item: Optional[T] = None
+        self._coalesced = 0
+
+    def post(self, item: T) -> None:
+        with self._lock:
+            if self._item is not None:
+                self._coalesced += 1
+            self._item = item
+
+    @property
+    def pending(self) -> bool:
+        return self._item is not None
+
+    def take(self) -> Tuple[Optional[T], int]:
+        with self._lock:
+            item, coalesced = self._item, self._coalesced
+            self._item = None
+            self._coalesced = 0
+        return item, coalesced
+
+    def clear(self) -> None:
+        self.take()
+
+
+class StatusLog:
+    def __init__(self, max_entries: int = 200) -> None:
+        self._entries: Deque[str] = deque(maxlen=max_entries)
+        self.dirty = False
+
+    def append(self, text: str) -> None:
+        self._entries.append(text)
+        self.dirty = True
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.dirty = True
+
+    def render(self) -> str:
+        self.dirty = False
+        return "".join(self._entries)
+
+
+class ResultConsumer(Generic[T]):
+    def __init__(self, handler: Callable[[T], None], max_pending: int = 8) -> None:
+        self.handler = handler
+        self.handled = 0
+        self.blocked_seconds = 0.0
+        self.error: Optional[BaseException] = None
+        self._raised = False
+        self._queue: "queue.Queue[Optional[T]]" = queue.Queue(maxsize=max(1, max_pending))
+        self._thread = threading.Thread(target=self._consume, daemon=True)
+        self._thread.start()
+
+    def put(self, item: T) -> None:
+        self._raise_error()
+        started = time.perf_counter()
+        self._queue.put(item)
+        self.blocked_seconds += time.perf_counter() - started
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+        self._raise_error()
+
+    def _raise_error(self) -> None:
+        if self.error is not None and not self._raised:
+            self._raised = True
+            raise self.error
+
+    def _consume(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue
+            try:
+                self.handler(item)
+                self.handled += 1
+            except BaseException as error:
+                self.error = error
@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+INES_MAGIC = b"NES\x1a"
+INES_HEADER_SIZE = 16
+TRAINER_SIZE = 512
+PRG_BANK_SIZE = 0x4000
+CHR_BANK_SIZE = 0x2000
+ROM_INDEX_VERSION = 1
+ROM_SUFFIXES = (".nes",)
+MISSING_ROM_SEED = 1337
+HASH_CHUNK_SIZE = 1 << 20
+
+FORMAT_INES = "iNES"
+FORMAT_NES2 = "NES 2.0"
+MIRRORING_HORIZONTAL = "horizontal"
+MIRRORING_VERTICAL = "vertical"
+MIRRORING_FOUR_SCREEN = "four_screen"
+CONSOLE_TYPES = ("NES", "Vs. System", "PlayChoice-10", "Extendida")
+TIMINGS = ("NTSC", "PAL", "Multiregión", "Dendy")
+
+
+@dataclass(frozen=True)
+class RomHeader:
+    format: str
+    mapper: int
+    submapper: int
+    prg_size: int
+    chr_size: int
+    mirroring: str
+    has_battery: bool
+    has_trainer: bool
+    console_type: str
+    timing: str
+    prg_ram_size: int
+    prg_nvram_size: int
+    chr_ram_size: int
+    chr_nvram_size: int
+
+    @property
+    def prg_banks(self) -> int:
+        return self.prg_size // PRG_BANK_SIZE
+
+    @property
+    def chr_banks(self) -> int:
+        return self.chr_size // CHR_BANK_SIZE
+
+    @property
+    def data_offset(self) -> int:
+        return INES_HEADER_SIZE + (TRAINER_SIZE if self.has_trainer else 0)
+
+    @property
+    def expected_size(self) -> int:
+        return self.data_offset + self.prg_size + self.chr_size
+
+
+def _nes2_rom_size(low: int, high: int, unit: int) -> int:
+    if high == 0x0F:
+        return (1 << (low >> 2)) * ((low & 0x03) * 2 + 1)
+    return ((high << 8) | low) * unit
+
+
+def _shift_size(value: int) -> int:
+    return 64 << value if value else 0
+
+
+def parse_header(header: bytes) -> Optional[RomHeader]:
+    if len(header) < INES_HEADER_SIZE or header[:4] != INES_MAGIC:
+        return None
+    flags6, flags7 = header[6], header[7]
+    mirroring = MIRRORING_VERTICAL if flags6 & 0x01 else MIRRORING_HORIZONTAL
+    if flags6 & 0x08:
+        mirroring = MIRRORING_FOUR_SCREEN
+    mapper = (flags6 >> 4) | (flags7 & 0xF0)
+    console_type = CONSOLE_TYPES[flags7 & 0x03]
+    if flags7 & 0x0C == 0x08:
+        return RomHeader(
+            format=FORMAT_NES2,
+            mapper=mapper | ((header[8] & 0x0F) << 8),
+            submapper=header[8] >> 4,
+            prg_size=_nes2_rom_size(header[4], header[9] & 0x0F, PRG_BANK_SIZE),
+            chr_size=_nes2_rom_size(header[5], header[9] >> 4, CHR_BANK_SIZE),
+            mirroring=mirroring,
+            has_battery=bool(flags6 & 0x02),
+            has_trainer=bool(flags6 & 0x04),
+            console_type=console_type,
+            timing=TIMINGS[header[12] & 0x03],
+            prg_ram_size=_shift_size(header[10] & 0x0F),
+            prg_nvram_size=_shift_size(header[10] >> 4),
+            chr_ram_size=_shift_size(header[11] & 0x0F),
+            chr_nvram_size=_shift_size(header[11] >> 4),
+        )
+    if any(header[12:16]):
+        mapper &= 0x0F
+    return RomHeader(
+        format=FORMAT_INES,
+        mapper=mapper,
+        submapper=0,
+        prg_size=header[4] * PRG_BANK_SIZE,
+        chr_size=header[5] * CHR_BANK_SIZE,
+        mirroring=mirroring,
+        has_battery=bool(flags6 & 0x02),
+        has_trainer=bool(flags6 & 0x04),
+        console_type=console_type,
+        timing=TIMINGS[1] if header[9] & 0x01 else TIMINGS[0],
+        prg_ram_size=max(1, header[8]) * 0x2000,
+        prg_nvram_size=0,
+        chr_ram_size=0 if header[5] else CHR_BANK_SIZE,
+        chr_nvram_size=0,
+    )
+
+
+def rom_seed(sha256: str) -> int:
+    return int.from_bytes(bytes.fromhex(sha256)[:8], "little") >> 1
+
+
+@dataclass
+class RomEntry:
+    path: str
+    size: int
+    mtime_ns: int
+    sha256: str
+    header_bytes: bytes
+    _header: Optional[RomHeader] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def name(self) -> str:
+        return Path(self.path).stem
+
+    @property
+    def header(self) -> Optional[RomHeader]:
+        if self._header is None and self.header_bytes[:4] == INES_MAGIC:
+            self._header = parse_header(self.header_bytes)
+        return self._header
+
+    @property
+    def seed(self) -> int:
+        return rom_seed(self.sha256)
+
+    def matches(self, stat: os.stat_result) -> bool:
+        return self.size == stat.st_size and self.mtime_ns == stat.st_mtime_ns
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "sha256": self.sha256,
+            "header": self.header_bytes.hex(),
+        }
+
+    @classmethod
+    def from_dict(cls, path: str, data: Dict[str, object]) -> "RomEntry":
+        return cls(
+            path=path,
+            size=int(data["size"]),
+            mtime_ns=int(data["mtime_ns"]),
+            sha256=str(data["sha256"]),
+            header_bytes=bytes.fromhex(str(data["header"])),
+        )
+
+
+def default_index_path() -> Path:
+    cache_root = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_root) / "bots_learn" / "roms.json"
+
+
+class RomRegistry:
+    def __init__(self, index_path: Optional[str] = None) -> None:
+        self.index_path = Path(index_path) if index_path else default_index_path()
+        self.hashed = 0
+        self._entries: Dict[str, RomEntry] = {}
+        self._maps: Dict[str, mmap.mmap] = {}
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._dirty = False
+
+    def entry(self, rom_path: str) -> RomEntry:
+        path = str(Path(rom_path).resolve())
+        stat = os.stat(path)
+        with self._lock:
+            self._load_index()
+            entry = self._entries.get(path)
+            if entry is not None and entry.matches(stat):
+                return entry
+            if entry is not None:
+                self._drop_mapping(entry.sha256)
+            entry = self._fingerprint(path, stat)
+            self._entries[path] = entry
+            self._dirty = True
+            return entry
+
+    def scan(self, directory: str) -> List[RomEntry]:
+        paths = sorted(
+            path
+            for path in Path(directory).iterdir()
+            if path.suffix.lower() in ROM_SUFFIXES and path.is_file()
+        )
+        entries = [self.entry(str(path)) for path in paths]
+        self.save()
+        return entries
+
+    def mapping(self, rom_path: str) -> mmap.mmap:
+        entry = self.entry(rom_path)
+        with self._lock:
+            mapped = self._maps.get(entry.sha256)
+            if mapped is None or mapped.closed:
+                if entry.size == 0:
+                    raise ValueError("ROM inválida: el archivo está vacío.")
+                with open(entry.path, "rb") as handle:
+                    mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[entry.sha256] = mapped
+            return mapped
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {
+                "version": ROM_INDEX_VERSION,
+                "roms": {path: entry.to_dict() for path, entry in self._entries.items()},
+            }
+            temporary = self.index_path.with_name(f".{self.index_path.name}.{os.getpid()}.tmp")
+            try:
+                self.index_path.parent.mkdir(parents=True, exist_ok=True)
+                temporary.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+                os.replace(temporary, self.index_path)
+            except OSError:
+                return
+            self._dirty = False
+
+    def close(self) -> None:
+        with self._lock:
+            for sha256 in list(self._maps):
+                self._drop_mapping(sha256)
+
+    def _drop_mapping(self, sha256: str) -> None:
+        mapped = self._maps.pop(sha256, None)
+        if mapped is not None:
+            try:
+                mapped.close()
+            except BufferError:
+                pass
+
+    def _load_index(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            payload = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(payload, dict) or payload.get("version") != ROM_INDEX_VERSION:
+            return
+        for path, data in payload.get("roms", {}).items():
+            try:
+                self._entries[path] = RomEntry.from_dict(path, data)
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    def _fingerprint(self, path: str, stat: os.stat_result) -> RomEntry:
+        digest = hashlib.sha256()
+        with open(path, "rb") as handle:
+            header = handle.read(INES_HEADER_SIZE)
+            digest.update(header)
+            while True:
+                chunk = handle.read(HASH_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+        self.hashed += 1
+        return RomEntry(
+            path=path,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            sha256=digest.hexdigest(),
+            header_bytes=header,
+        )
+
+
+_registry: Optional[RomRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def rom_registry() -> RomRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = RomRegistry()
+        return _registry
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Indexa un directorio de ROMs por hash de contenido y cabecera iNES."
+    )
+    parser.add_argument("directory", help="Directorio con archivos .nes.")
+    parser.add_argument("--index", help="Archivo del índice (por defecto en la caché del usuario).")
+    args = parser.parse_args(argv)
+    if not Path(args.directory).is_dir():
+        parser.error(f"No existe el directorio: {args.directory}")
+    registry = RomRegistry(args.index)
+    for entry in registry.scan(args.directory):
+        header = entry.header
+        details = (
+            f"{header.format} mapper {header.mapper} PRG {header.prg_size // 1024} KB "
+            f"CHR {header.chr_size // 1024} KB {header.mirroring}"
+            f"{' trainer' if header.has_trainer else ''}"
+            if header
+            else "sin cabecera NES"
+        )
+        print(f"{entry.sha256[:12]}  {entry.name}  {details}")
+    print(f"{registry.hashed} ROMs procesadas de nuevo", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
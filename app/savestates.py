@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from typing import Dict, List, Optional, Tuple
+
+from backends import EmulatorBackend
+
+SNAPSHOT_INTERVAL = 30
+SNAPSHOT_CAPACITY = 256
+
+Tracker = Tuple[int, ...]
+
+
+@dataclass
+class SnapshotStats:
+    episodes: int = 0
+    frames_emulated: int = 0
+    boot_frames_restored: int = 0
+    prefix_frames_restored: int = 0
+    prefix_hits: int = 0
+
+    @property
+    def frames_restored(self) -> int:
+        return self.boot_frames_restored + self.prefix_frames_restored
+
+    @property
+    def speedup(self) -> float:
+        return (self.frames_emulated + self.frames_restored) / max(1, self.frames_emulated)
+
+    def copy(self) -> "SnapshotStats":
+        return SnapshotStats(**self.as_counters())
+
+    def since(self, earlier: "SnapshotStats") -> "SnapshotStats":
+        return SnapshotStats(
+            **{
+                item.name: getattr(self, item.name) - getattr(earlier, item.name)
+                for item in fields(self)
+            }
+        )
+
+    def as_counters(self) -> Dict[str, int]:
+        return {item.name: getattr(self, item.name) for item in fields(self)}
+
+
+class SnapshotCache:
+    def __init__(self, state_size: int, capacity: int, interval: int = SNAPSHOT_INTERVAL) -> None:
+        self.state_size = state_size
+        self.capacity = max(1, capacity)
+        self.interval = max(1, interval)
+        self._buffer = bytearray(state_size * self.capacity)
+        self._view = memoryview(self._buffer)
+        self._entries: "OrderedDict[bytes, Tuple[int, Tracker]]" = OrderedDict()
+        self._free = list(range(self.capacity - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._buffer)
+
+    def prefix_keys(self, inputs: bytes, context: bytes = b"") -> List[bytes]:
+        digest = hashlib.blake2b(context, digest_size=16)
+        keys = []
+        for start in range(0, len(inputs) - self.interval + 1, self.interval):
+            digest.update(inputs[start : start + self.interval])
+            keys.append(digest.digest())
+        return keys
+
+    def restore(
+        self, backend: EmulatorBackend, keys: List[bytes]
+    ) -> Optional[Tuple[int, Tracker]]:
+        for depth in range(len(keys) - 1, -1, -1):
+            entry = self._entries.get(keys[depth])
+            if entry is None:
+                continue
+            self._entries.move_to_end(keys[depth])
+            slot, tracker = entry
+            backend.load_state(self._slot(slot))
+            return (depth + 1) * self.interval, tracker
+        return None
+
+    def store(self, backend: EmulatorBackend, key: bytes, tracker: Tracker) -> None:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        if self._free:
+            slot = self._free.pop()
+        else:
+            _, (slot, _) = self._entries.popitem(last=False)
+        backend.save_state(self._slot(slot))
+        self._entries[key] = (slot, tracker)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._free = list(range(self.capacity - 1, -1, -1))
+
+    def _slot(self, slot: int) -> memoryview:
+        return self._view[slot * self.state_size : (slot + 1) * self.state_size]
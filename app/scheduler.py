@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import sys
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO
+
+from backends import BACKEND_SYNTHETIC, BACKENDS
+from bots import BotPopulation, GenerationResult
+from emulation import EmulatorSession
+from headless import result_payload
+from optimizers import OPTIMIZER_GA, OPTIMIZERS, make_optimizer
+from parallel import ParallelEvaluator
+from presets import ControlPreset, PresetLibrary
+
+POLICY_FAIR = "fair"
+POLICY_PRIORITY = "priority"
+POLICIES = (POLICY_FAIR, POLICY_PRIORITY)
+
+EVENT_STARTED = "started"
+EVENT_GENERATION = "generation"
+EVENT_FINISHED = "finished"
+
+REASON_GOAL = "goal"
+REASON_MAX_GENERATIONS = "max_generations"
+REASON_ERROR = "error"
+REASON_STOPPED = "stopped"
+
+
+@dataclass
+class TrainingJob:
+    job_id: str
+    rom_path: str
+    preset: ControlPreset
+    bot_count: int = 100
+    max_generations: int = 0
+    stop_at_goal: bool = True
+    priority: int = 0
+    weight: float = 1.0
+    seed: int = 42
+    backend: str = BACKEND_SYNTHETIC
+    optimizer: str = OPTIMIZER_GA
+
+    def __post_init__(self) -> None:
+        if self.bot_count < 2:
+            raise ValueError(f"Trabajo '{self.job_id}': se necesitan al menos 2 bots.")
+        if self.max_generations < 0:
+            raise ValueError(
+                f"Trabajo '{self.job_id}': el límite de generaciones no puede ser negativo."
+            )
+        if not self.stop_at_goal and not self.max_generations:
+            raise ValueError(
+                f"Trabajo '{self.job_id}': sin detenerse en la meta hace falta un límite "
+                "de generaciones."
+            )
+        if self.weight <= 0:
+            raise ValueError(f"Trabajo '{self.job_id}': el peso debe ser mayor a 0.")
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Trabajo '{self.job_id}': backend desconocido '{self.backend}'.")
+        if self.optimizer not in OPTIMIZERS:
+            raise ValueError(
+                f"Trabajo '{self.job_id}': optimizador desconocido '{self.optimizer}'."
+            )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object], base_dir: Path) -> "TrainingJob":
+        job_id = str(data.get("id") or "")
+        if not job_id:
+            raise ValueError("Cada trabajo necesita un campo 'id'.")
+        if "rom" not in data:
+            raise ValueError(f"Trabajo '{job_id}': falta el campo 'rom'.")
+        preset = PresetLibrary.default_super_mario_bros()
+        if data.get("preset"):
+            preset = ControlPreset.from_dict(
+                PresetLibrary.load_from_path(str(base_dir / str(data["preset"])))
+            )
+        return cls(
+            job_id=job_id,
+            rom_path=str(base_dir / str(data["rom"])),
+            preset=preset,
+            bot_count=int(data.get("bots", 100)),
+            max_generations=int(data.get("max_generations", 0)),
+            stop_at_goal=bool(data.get("stop_at_goal", True)),
+            priority=int(data.get("priority", 0)),
+            weight=float(data.get("weight", 1.0)),
+            seed=int(data.get("seed", 42)),
+            backend=str(data.get("backend", BACKEND_SYNTHETIC)),
+            optimizer=str(data.get("optimizer", OPTIMIZER_GA)),
+        )
+
+
+def load_jobs(path: str) -> List[TrainingJob]:
+    source = Path(path)
+    jobs: List[TrainingJob] = []
+    for number, line in enumerate(source.read_text(encoding="utf-8").splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            jobs.append(TrainingJob.from_dict(json.loads(line), source.parent))
+        except (AttributeError, OSError, TypeError, ValueError) as error:
+            raise ValueError(f"Línea {number}: {error}") from None
+    identifiers = [job.job_id for job in jobs]
+    duplicated = sorted({job_id for job_id in identifiers if identifiers.count(job_id) > 1})
+    if duplicated:
+        raise ValueError(f"Identificadores de trabajo repetidos: {', '.join(duplicated)}")
+    return jobs
+
+
+@dataclass
+class JobState:
+    job: TrainingJob
+    order: int
+    generation: int = 0
+    used_seconds: float = 0.0
+    running: bool = False
+    finished: Optional[str] = None
+    last_result: Optional[GenerationResult] = None
+    session: Optional[EmulatorSession] = field(default=None, repr=False)
+    population: Optional[BotPopulation] = field(default=None, repr=False)
+    evaluator: Optional[ParallelEvaluator] = field(default=None, repr=False)
+
+    @property
+    def share(self) -> float:
+        return self.used_seconds / self.job.weight
+
+    def release(self) -> None:
+        if self.evaluator is not None:
+            self.evaluator.close()
+        if self.session is not None:
+            self.session.close()
+        self.evaluator = None
+        self.session = None
+        self.population = None
+
+
+class JobScheduler:
+    def __init__(
+        self,
+        output: TextIO,
+        workers: int = 1,
+        slots: int = 2,
+        policy: str = POLICY_FAIR,
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"Política de planificación desconocida: {policy}")
+        self.output = output
+        self.workers = max(1, workers)
+        self.slots = max(1, slots)
+        self.policy = policy
+        self.states: Dict[str, JobState] = {}
+        self._lock = threading.Lock()
+        self._output_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        if self.workers > 1:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+    def submit(self, job: TrainingJob) -> None:
+        with self._lock:
+            if job.job_id in self.states:
+                raise ValueError(f"El trabajo '{job.job_id}' ya está en la cola.")
+            self.states[job.job_id] = JobState(job, len(self.states))
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self) -> Dict[str, JobState]:
+        running: Dict[Future, JobState] = {}
+        with ThreadPoolExecutor(max_workers=self.slots) as threads:
+            while True:
+                while len(running) < self.slots and not self._stop.is_set():
+                    state = self._next_job()
+                    if state is None:
+                        break
+                    state.running = True
+                    running[threads.submit(self._run_generation, state)] = state
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._complete(running.pop(future), future)
+        for state in self.states.values():
+            if state.finished is None:
+                self._finish(state, REASON_STOPPED)
+        return self.states
+
+    def close(self) -> None:
+        for state in self.states.values():
+            state.release()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self) -> "JobScheduler":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _next_job(self) -> Optional[JobState]:
+        with self._lock:
+            candidates = [
+                state
+                for state in self.states.values()
+                if not state.running and state.finished is None
+            ]
+        if not candidates:
+            return None
+        if self.policy == POLICY_PRIORITY:
+            return min(
+                candidates, key=lambda state: (-state.job.priority, state.share, state.order)
+            )
+        return min(candidates, key=lambda state: (state.share, state.order))
+
+    def _run_generation(self, state: JobState) -> GenerationResult:
+        if state.population is None:
+            self._start(state)
+        state.generation += 1
+        return state.population.run_generation(state.session, state.generation)
+
+    def _start(self, state: JobState) -> None:
+        job = state.job
+        state.session = EmulatorSession(job.rom_path, job.preset, backend=job.backend)
+        if self._pool is not None:
+            state.evaluator = ParallelEvaluator(
+                job.rom_path,
+                job.preset,
+                workers=self.workers,
+                backend=job.backend,
+                executor=self._pool,
+            )
+        state.population = BotPopulation(
+            bot_count=job.bot_count,
+            preset=job.preset,
+            vectorized=True,
+            evaluator=state.evaluator,
+            seed=job.seed,
+            optimizer=make_optimizer(job.optimizer),
+        )
+        self._emit(
+            {
+                "job": job.job_id,
+                "event": EVENT_STARTED,
+                "rom_sha256": state.session.rom_info.sha256,
+                "bots": job.bot_count,
+            }
+        )
+
+    def _complete(self, state: JobState, future: Future) -> None:
+        state.running = False
+        error = future.exception()
+        if error is not None:
+            self._finish(state, REASON_ERROR, error=str(error))
+            return
+        result = future.result()
+        elapsed = result.timings.total_seconds if result.timings else 0.0
+        state.used_seconds += elapsed
+        state.last_result = result
+        payload = result_payload(result, elapsed)
+        self._emit({"job": state.job.job_id, "event": EVENT_GENERATION, **payload})
+        if result.goal_reached and state.job.stop_at_goal:
+            self._finish(state, REASON_GOAL)
+        elif state.job.max_generations and state.generation >= state.job.max_generations:
+            self._finish(state, REASON_MAX_GENERATIONS)
+
+    def _finish(self, state: JobState, reason: str, error: Optional[str] = None) -> None:
+        state.finished = reason
+        state.release()
+        payload: Dict[str, object] = {
+            "job": state.job.job_id,
+            "event": EVENT_FINISHED,
+            "reason": reason,
+            "generations": state.generation,
+            "seconds": round(state.used_seconds, 6),
+        }
+        if state.last_result is not None:
+            payload["best_distance"] = state.last_result.best_distance
+        if error:
+            payload["error"] = error
+        self._emit(payload)
+
+    def _emit(self, payload: Dict[str, object]) -> None:
+        payload["timestamp"] = round(time.time(), 3)
+        line = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        with self._output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Entrena varias combinaciones de ROM y preset a la vez sobre un único "
+            "grupo de procesos."
+        )
+    )
+    parser.add_argument(
+        "jobs",
+        help="Archivo JSON Lines con un trabajo por línea (id, rom, preset, bots, "
+        "max_generations, stop_at_goal, priority, weight, seed, backend, optimizer).",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Procesos de evaluación compartidos.")
+    parser.add_argument(
+        "--slots", type=int, default=2, help="Trabajos que avanzan una generación a la vez."
+    )
+    parser.add_argument(
+        "--policy",
+        choices=POLICIES,
+        default=POLICY_FAIR,
+        help="fair reparte el tiempo según el peso; priority atiende antes la mayor prioridad.",
+    )
+    parser.add_argument("--output", default="-", help="Archivo JSONL de métricas ('-' = stdout).")
+    args = parser.parse_args(argv)
+    if args.workers <= 0 or args.slots <= 0:
+        parser.error("Los procesos y los turnos deben ser mayores a 0.")
+    try:
+        jobs = load_jobs(args.jobs)
+    except (OSError, ValueError) as error:
+        parser.error(f"Trabajos inválidos: {error}")
+    if not jobs:
+        parser.error("El archivo no contiene trabajos.")
+    for job in jobs:
+        if not Path(job.rom_path).exists():
+            parser.error(f"Trabajo '{job.job_id}': no existe la ROM {job.rom_path}")
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    scheduler = JobScheduler(output, workers=args.workers, slots=args.slots, policy=args.policy)
+    try:
+        for job in jobs:
+            scheduler.submit(job)
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            scheduler.stop()
+            return 130
+    finally:
+        scheduler.close()
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+from random import Random
+
+import numpy as np
+
+PURPOSE_INIT = 1
+PURPOSE_EVALUATE = 2
+PURPOSE_BREED = 3
+PURPOSE_ISLAND = 4
+
+_MASK64 = (1 << 64) - 1
+_GAMMA = 0x9E3779B97F4A7C15
+_MIX_A = 0xBF58476D1CE4E5B9
+_MIX_B = 0x94D049BB133111EB
+_UNIT = 1.0 / (1 << 53)
+
+
+def _finalize(value: int) -> int:
+    value = ((value ^ (value >> 30)) * _MIX_A) & _MASK64
+    value = ((value ^ (value >> 27)) * _MIX_B) & _MASK64
+    return value ^ (value >> 31)
+
+
+def _mix(value: int) -> int:
+    return _finalize((value + _GAMMA) & _MASK64)
+
+
+def _prefix_key(seed: int, generation: int) -> int:
+    return _mix(_mix(seed & _MASK64) ^ (generation & _MASK64))
+
+
+def stream_key(seed: int, generation: int, bot_index: int, purpose: int) -> int:
+    return _mix(_mix(_prefix_key(seed, generation) ^ (bot_index & _MASK64)) ^ purpose)
+
+
+def stream_uniform(key: int, counter: int) -> float:
+    return (_finalize((key + (counter + 1) * _GAMMA) & _MASK64) >> 11) * _UNIT
+
+
+class CounterRandom(Random):
+    def __init__(self, seed: int, generation: int, bot_index: int, purpose: int) -> None:
+        self._key = stream_key(seed, generation, bot_index, purpose)
+        self._counter = 0
+        super().__init__()
+
+    @classmethod
+    def from_key(cls, key: int) -> "CounterRandom":
+        rng = cls(0, 0, 0, 0)
+        rng._key = key & _MASK64
+        return rng
+
+    def seed(self, *args: object, **kwargs: object) -> None:
+        self._counter = 0
+
+    def random(self) -> float:
+        value = stream_uniform(self._key, self._counter)
+        self._counter += 1
+        return value
+
+    def _randbelow(self, n: int) -> int:
+        return int(self.random() * n)
+
+
+def _finalize_array(values: np.ndarray) -> np.ndarray:
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(_MIX_A)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(_MIX_B)
+    return values ^ (values >> np.uint64(31))
+
+
+def _mix_array(values: np.ndarray) -> np.ndarray:
+    return _finalize_array(values + np.uint64(_GAMMA))
+
+
+def stream_keys(
+    seed: int, generation: int, bot_indices: np.ndarray, purpose: int
+) -> np.ndarray:
+    indices = np.asarray(bot_indices).astype(np.uint64)
+    keys = _mix_array(np.uint64(_prefix_key(seed, generation)) ^ indices)
+    return _mix_array(keys ^ np.uint64(purpose))
+
+
+def hash_rows(rows: np.ndarray, seed: int) -> np.ndarray:
+    rows = np.asarray(rows)
+    keys = np.full(len(rows), _mix(seed & _MASK64), dtype=np.uint64)
+    for column in range(rows.shape[1]):
+        keys = _mix_array(keys ^ rows[:, column].astype(np.uint64))
+    return keys
+
+
+def combine_keys(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    return _mix_array(first ^ _mix_array(second))
+
+
+def stream_uniforms(
+    seed: int, generation: int, bot_indices: np.ndarray, purpose: int, draws: int
+) -> np.ndarray:
+    return uniforms_from_keys(stream_keys(seed, generation, bot_indices, purpose), draws)
+
+
+def uniforms_from_keys(keys: np.ndarray, draws: int) -> np.ndarray:
+    steps = np.arange(1, draws + 1, dtype=np.uint64) * np.uint64(_GAMMA)
+    bits = _finalize_array(keys[:, None] + steps[None, :])
+    return (bits >> np.uint64(11)).astype(np.float64) * _UNIT
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+WALKER_MAIN = bytes.fromhex("a9 80 8d 00 20 4c 05 c0")
+WALKER_NMI = bytes.fromhex(
+    "a9 01 8d 16 40 a9 00 8d 16 40 ad 16 40 29 01 85 10 ad 16 40 29 01 85 11 a2 05 ad 16 40"
+    " ca d0 fa ad 16 40 29 01 f0 11 a5 11 18 69 01 0a 0a 0a 18 65 86 85 86 90 05 e6 6d ee"
+    " 5e 07 40"
+)
+
+
+@pytest.fixture(autouse=True, scope="session")
+def rom_cache(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    cache_root = tmp_path_factory.mktemp("cache")
+    os.environ["XDG_CACHE_HOME"] = str(cache_root)
+    return cache_root
+
+
+@pytest.fixture
+def walker_path(tmp_path: Path) -> str:
+    from nes import build_nrom_image
+
+    path = tmp_path / "walker.nes"
+    path.write_bytes(build_nrom_image(WALKER_MAIN, WALKER_NMI))
+    return str(path)
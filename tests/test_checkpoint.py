@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from bots import BotPopulation
+from checkpoint import CheckpointManager, load_checkpoint
+from emulation import EmulatorSession
+from optimizers import CMAESOptimizer, GeneticOptimizer
+from presets import PresetLibrary
+
+
+def make_population(session: EmulatorSession) -> BotPopulation:
+    return BotPopulation(
+        bot_count=2000, preset=session.preset, vectorized=True, pipelined=True, chunk_size=256
+    )
+
+
+def summaries(results) -> list:
+    return [(result.best_distance, result.avg_distance, result.avg_time) for result in results]
+
+
+def test_pipelined_run_resumes_exactly(tmp_path) -> None:
+    session = EmulatorSession(
+        str(tmp_path / "sin_rom.nes"), PresetLibrary.default_super_mario_bros()
+    )
+    population = make_population(session)
+    manager = CheckpointManager(str(tmp_path / "completa.ckpt"), interval=3)
+    expected = []
+    for generation in range(1, 7):
+        expected.append(population.run_generation(session, generation))
+        manager.observe(population, session.seed, expected[-1])
+
+    first = make_population(session)
+    manager = CheckpointManager(str(tmp_path / "partida.ckpt"), interval=3)
+    for generation in range(1, 4):
+        manager.observe(first, session.seed, first.run_generation(session, generation))
+    resumed = make_population(session)
+    start = CheckpointManager(str(tmp_path / "partida.ckpt")).restore(resumed, session.seed)
+    results = [resumed.run_generation(session, generation) for generation in range(start, 7)]
+
+    assert start == 4
+    assert summaries(results) == summaries(expected[3:])
+    np.testing.assert_array_equal(resumed.genome_matrix(), population.genome_matrix())
+
+
+@pytest.mark.parametrize(
+    ("saved", "resumed"),
+    [(GeneticOptimizer, CMAESOptimizer), (CMAESOptimizer, GeneticOptimizer)],
+)
+def test_checkpoint_from_another_optimizer_is_rejected(tmp_path, saved, resumed) -> None:
+    session = EmulatorSession(
+        str(tmp_path / "sin_rom.nes"), PresetLibrary.default_super_mario_bros()
+    )
+    population = BotPopulation(
+        bot_count=40, preset=session.preset, vectorized=True, optimizer=saved()
+    )
+    manager = CheckpointManager(str(tmp_path / "otro.ckpt"), interval=1)
+    manager.observe(population, session.seed, population.run_generation(session, 1))
+    assert load_checkpoint(manager.path).optimizer == population.optimizer.name
+
+    target = BotPopulation(
+        bot_count=40, preset=session.preset, vectorized=True, optimizer=resumed()
+    )
+    with pytest.raises(ValueError, match="optimizador"):
+        CheckpointManager(manager.path).restore(target, session.seed)
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import http.client
+import json
+import socket
+import time
+from dataclasses import replace
+
+import pytest
+
+from bots import BotPopulation
+from dashboard import RETRY_MILLISECONDS, DashboardServer
+from emulation import EmulatorSession
+from presets import PresetLibrary
+
+
+@pytest.fixture(scope="module")
+def results(tmp_path_factory):
+    path = tmp_path_factory.mktemp("panel") / "sin_rom.nes"
+    session = EmulatorSession(str(path), PresetLibrary.default_super_mario_bros())
+    population = BotPopulation(bot_count=40, preset=session.preset, vectorized=True)
+    return [population.run_generation(session, generation) for generation in (1, 2)]
+
+
+@pytest.fixture
+def server():
+    dashboard = DashboardServer().start()
+    yield dashboard
+    dashboard.close()
+
+
+def get(server: DashboardServer, path: str) -> http.client.HTTPResponse:
+    connection = http.client.HTTPConnection(*server.address, timeout=5)
+    connection.request("GET", path)
+    return connection.getresponse()
+
+
+def read_event(stream) -> dict:
+    fields = {}
+    while True:
+        line = stream.readline().decode("utf-8").rstrip("\n")
+        if not line:
+            if fields:
+                return fields
+            continue
+        name, _, value = line.partition(": ")
+        fields[name] = value
+
+
+def wait_for_clients(server: DashboardServer, count: int) -> None:
+    deadline = time.monotonic() + 5
+    while server.client_count < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_snapshot_is_empty_until_the_first_generation(server, results) -> None:
+    response = get(server, "/snapshot")
+    assert response.status == 204
+    assert response.read() == b""
+
+    server.publish(results[0], 1.5)
+    response = get(server, "/snapshot")
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "application/json"
+    payload = json.loads(response.read())
+    assert payload["generation"] == 1
+    assert payload["elapsed_seconds"] == 1.5
+    assert payload["best_distance"] == results[0].best_distance
+
+
+def test_events_stream_uses_sse_framing(server, results) -> None:
+    server.publish(results[0])
+    with socket.create_connection(server.address, timeout=5) as connection:
+        connection.sendall(b"GET /events HTTP/1.1\r\nHost: panel\r\n\r\n")
+        stream = connection.makefile("rb")
+        assert stream.readline() == b"HTTP/1.1 200 OK\r\n"
+        headers = {}
+        while (line := stream.readline()) != b"\r\n":
+            name, _, value = line.decode("ascii").partition(": ")
+            headers[name] = value.strip()
+        assert headers["Content-Type"].startswith("text/event-stream")
+        assert read_event(stream) == {"retry": str(RETRY_MILLISECONDS)}
+
+        latest = read_event(stream)
+        assert latest["id"] == "1"
+        assert latest["event"] == "generation"
+        assert json.loads(latest["data"])["generation"] == 1
+
+        wait_for_clients(server, 1)
+        server.publish(results[1])
+        event = read_event(stream)
+        data = json.loads(event["data"])
+        assert event["id"] == "2"
+        assert data["generation"] == 2
+        assert data["leader"]["distance"] == results[1].leader_state.distance
+        assert len(data["elite"]) == len(results[1].elite_states)
+
+
+def test_unknown_paths_and_methods_are_rejected(server) -> None:
+    assert get(server, "/nada").status == 404
+    connection = http.client.HTTPConnection(*server.address, timeout=5)
+    connection.request("POST", "/snapshot")
+    assert connection.getresponse().status == 405
+
+
+def test_close_ends_open_streams(results) -> None:
+    server = DashboardServer().start()
+    connection = socket.create_connection(server.address, timeout=5)
+    connection.sendall(b"GET /events HTTP/1.1\r\n\r\n")
+    stream = connection.makefile("rb")
+    while stream.readline() != b"\r\n":
+        pass
+    wait_for_clients(server, 1)
+
+    server.close()
+
+    assert server._thread is None
+    try:
+        remainder = stream.read()
+    except ConnectionResetError:
+        remainder = b""
+    assert remainder in (b"", f"retry: {RETRY_MILLISECONDS}\n\n".encode("ascii"))
+    assert server.client_count == 0
+    server.publish(results[0])
+    server.close()
+    connection.close()
+    with pytest.raises(OSError):
+        socket.create_connection(server.address, timeout=1)
+
+
+def open_stream(server: DashboardServer, receive_buffer: int = 0) -> socket.socket:
+    connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if receive_buffer:
+        connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+    connection.settimeout(5)
+    connection.connect(server.address)
+    connection.sendall(b"GET /events HTTP/1.1\r\nHost: panel\r\n\r\n")
+    return connection
+
+
+def test_stalled_client_does_not_block_the_others(results) -> None:
+    with DashboardServer(client_buffer=3) as server:
+        stalled = open_stream(server, receive_buffer=4096)
+        wait_for_clients(server, 1)
+        (slow,) = server._clients
+        connection = open_stream(server)
+        stream = connection.makefile("rb")
+        while stream.readline() != b"\r\n":
+            pass
+        assert read_event(stream) == {"retry": str(RETRY_MILLISECONDS)}
+        wait_for_clients(server, 2)
+
+        generation = 0
+
+        def publish_and_receive() -> None:
+            nonlocal generation
+            generation += 1
+            server.publish(replace(results[generation % 2], generation=generation))
+            event = read_event(stream)
+            assert event["id"] == str(generation)
+            assert json.loads(event["data"])["generation"] == generation
+
+        while slow.dropped == 0:
+            assert generation < 20000
+            publish_and_receive()
+        dropped = slow.dropped
+        for _ in range(20):
+            publish_and_receive()
+
+        assert len(slow.events) == 3
+        assert slow.dropped >= dropped + 20 - 3
+        assert server.client_count == 2
+        connection.close()
+        stalled.close()
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from distributed import (
+    MESSAGE_BATCH,
+    MESSAGE_HEARTBEAT,
+    MESSAGE_HELLO,
+    MESSAGE_SETUP,
+    PROTOCOL_VERSION,
+    DistributedEvaluator,
+    _HELLO,
+    receive_frame,
+    run_worker,
+    send_frame,
+)
+from emulation import GENE_COUNT, EmulatorSession
+from presets import PresetLibrary
+from streams import PURPOSE_EVALUATE, stream_keys
+
+
+@pytest.fixture
+def rom_path(tmp_path) -> str:
+    path = tmp_path / "prueba.nes"
+    path.write_bytes(b"NES\x1a\x01\x01" + bytes(10) + bytes(0x4000) + bytes(0x2000))
+    return str(path)
+
+
+def start_worker(evaluator: DistributedEvaluator, cache_dir) -> threading.Thread:
+    host, port = evaluator.address
+    thread = threading.Thread(target=run_worker, args=(host, port, str(cache_dir)), daemon=True)
+    thread.start()
+    return thread
+
+
+def fake_worker(evaluator: DistributedEvaluator, behaviour: str) -> threading.Thread:
+    def run() -> None:
+        with socket.create_connection(evaluator.address) as connection:
+            send_frame(connection, MESSAGE_HELLO, _HELLO.pack(PROTOCOL_VERSION))
+            kind, _ = receive_frame(connection)
+            assert kind == MESSAGE_SETUP
+            kind, _ = receive_frame(connection)
+            assert kind == MESSAGE_BATCH
+            if behaviour == "silent":
+                time.sleep(2.0)
+            elif behaviour == "stalled":
+                try:
+                    for _ in range(50):
+                        send_frame(connection, MESSAGE_HEARTBEAT)
+                        time.sleep(0.1)
+                except OSError:
+                    return
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def serial_evaluation(rom_path: str, genes: np.ndarray, keys: np.ndarray):
+    session = EmulatorSession(rom_path, PresetLibrary.default_super_mario_bros())
+    return session.evaluate_population(genes, 3, noise_keys=keys)
+
+
+def make_job(count: int):
+    genes = np.random.default_rng(11).random((count, GENE_COUNT))
+    keys = stream_keys(1234, 3, np.arange(count, dtype=np.int64), PURPOSE_EVALUATE)
+    return genes, keys
+
+
+def test_localhost_round_trip_matches_serial_evaluation(rom_path, tmp_path) -> None:
+    genes, keys = make_job(3000)
+    preset = PresetLibrary.default_super_mario_bros()
+    with DistributedEvaluator(rom_path, preset, min_batch_size=64, max_batch_size=512) as evaluator:
+        workers = [start_worker(evaluator, tmp_path / "cache") for _ in range(3)]
+        assert evaluator.wait_for_workers(3, timeout=10)
+        batch = evaluator.evaluate(genes, 3, noise_keys=keys)
+        assert sum(stats.bots for stats in evaluator.stats.values()) == 3000
+    for worker in workers:
+        worker.join(timeout=5)
+
+    expected = serial_evaluation(rom_path, genes, keys)
+    np.testing.assert_array_equal(batch.distance, expected.distance)
+    np.testing.assert_array_equal(batch.time_seconds, expected.time_seconds)
+    np.testing.assert_array_equal(batch.coins, expected.coins)
+
+
+@pytest.mark.parametrize("behaviour", ["disconnect", "silent"])
+def test_lost_worker_batches_are_requeued(rom_path, tmp_path, behaviour) -> None:
+    genes, keys = make_job(500)
+    preset = PresetLibrary.default_super_mario_bros()
+    with DistributedEvaluator(
+        rom_path, preset, min_batch_size=100, worker_timeout=0.5
+    ) as evaluator:
+        fake_worker(evaluator, behaviour)
+        assert evaluator.wait_for_workers(1, timeout=10)
+        start_worker(evaluator, tmp_path / "cache")
+        batch = evaluator.evaluate(genes, 3, noise_keys=keys)
+        assert evaluator.requeued_bots >= 100
+
+    expected = serial_evaluation(rom_path, genes, keys)
+    np.testing.assert_array_equal(batch.distance, expected.distance)
+
+
+def test_evaluation_fails_when_no_workers_remain(rom_path) -> None:
+    genes, keys = make_job(200)
+    preset = PresetLibrary.default_super_mario_bros()
+    with DistributedEvaluator(
+        rom_path, preset, min_batch_size=50, worker_timeout=0.3
+    ) as evaluator:
+        fake_worker(evaluator, "disconnect")
+        assert evaluator.wait_for_workers(1, timeout=10)
+        with pytest.raises(RuntimeError, match="No quedan workers"):
+            evaluator.evaluate(genes, 3, noise_keys=keys)
+
+
+def test_heartbeating_worker_past_its_batch_deadline_is_dropped(rom_path, tmp_path) -> None:
+    genes, keys = make_job(500)
+    preset = PresetLibrary.default_super_mario_bros()
+    with DistributedEvaluator(
+        rom_path, preset, min_batch_size=100, max_batch_size=100, worker_timeout=0.5
+    ) as evaluator:
+        start_worker(evaluator, tmp_path / "cache")
+        assert evaluator.wait_for_workers(1, timeout=10)
+        evaluator.evaluate(genes, 3, noise_keys=keys)
+        stalled = fake_worker(evaluator, "stalled")
+        assert evaluator.wait_for_workers(2, timeout=10)
+        started = time.monotonic()
+        batch = evaluator.evaluate(genes, 3, noise_keys=keys)
+        stalled.join(timeout=10)
+        assert evaluator.requeued_bots >= 100
+        assert time.monotonic() - started < 4.0
+
+    expected = serial_evaluation(rom_path, genes, keys)
+    np.testing.assert_array_equal(batch.distance, expected.distance)
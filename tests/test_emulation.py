@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import pytest
+
+from bots import BotPopulation
+from emulation import (
+    BOOT_SEQUENCE,
+    COINS_ADDRESS,
+    FRAMES_PER_SECOND,
+    PIXELS_PER_DISTANCE,
+    PLAYER_PAGE_ADDRESS,
+    PLAYER_X_ADDRESS,
+    EmulatorSession,
+)
+from fitness_cache import EvaluationCache
+from nes import NROMBackend
+from presets import PresetLibrary
+
+
+def position(backend: NROMBackend) -> int:
+    return backend.read_memory(PLAYER_PAGE_ADDRESS) << 8 | backend.read_memory(PLAYER_X_ADDRESS)
+
+
+@pytest.mark.parametrize("cache", [None, EvaluationCache(100)])
+def test_replaying_the_leader_log_reproduces_its_fitness(walker_path, cache) -> None:
+    session = EmulatorSession(
+        walker_path, PresetLibrary.default_super_mario_bros(), backend="nrom"
+    )
+    session.goal_distance = 8
+    population = BotPopulation(bot_count=8, preset=session.preset, vectorized=True, cache=cache)
+    result = population.run_generation(session, 1)
+    recording = session.leader
+
+    backend = NROMBackend(walker_path)
+    backend.reset()
+    for buttons in BOOT_SEQUENCE:
+        backend.run_frame(buttons)
+    start = position(backend)
+    for _, buttons, length in recording.log.runs():
+        for _ in range(length):
+            backend.run_frame(buttons)
+    distance = min(session.goal_distance, (position(backend) - start) / PIXELS_PER_DISTANCE)
+
+    leader = result.leader_state
+    assert round(distance, 2) == leader.distance == result.best_distance
+    assert round(len(recording.log) / FRAMES_PER_SECOND, 2) == leader.time_seconds
+    assert backend.read_memory(COINS_ADDRESS) == leader.coins
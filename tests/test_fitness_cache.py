@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import numpy as np
+
+from bots import BotPopulation
+from emulation import EmulatorSession
+from fitness_cache import EvaluationCache
+from presets import PresetLibrary
+
+
+def make_session(tmp_path) -> EmulatorSession:
+    return EmulatorSession(str(tmp_path / "sin_rom.nes"), PresetLibrary.default_super_mario_bros())
+
+
+def test_elites_hit_the_cache_after_the_first_generation(tmp_path) -> None:
+    session = make_session(tmp_path)
+    population = BotPopulation(
+        bot_count=200, preset=session.preset, vectorized=True, cache=EvaluationCache(10000)
+    )
+    results = [population.run_generation(session, generation) for generation in range(1, 5)]
+
+    assert results[0].cache_stats.hits == 0
+    elite_count = max(1, int(200 * population.elite_fraction))
+    for result in results[1:]:
+        assert result.cache_stats.hits >= elite_count
+        assert result.cache_stats.hit_rate > 0
+
+
+def test_cached_episodes_match_fresh_evaluations(tmp_path) -> None:
+    session = make_session(tmp_path)
+    cache = EvaluationCache(1000)
+    cache.begin_generation(session.seed, session.preset)
+    genes = np.random.default_rng(7).random((50, 7))
+
+    def evaluate(subset: np.ndarray, keys: np.ndarray):
+        return session.evaluate_population(subset, 1, session.preset, noise_keys=keys)
+
+    first = cache.evaluate(genes, evaluate)
+    second = cache.evaluate(genes, evaluate)
+
+    assert cache.stats.hits == 50
+    assert cache.stats.evaluated == 50
+    np.testing.assert_array_equal(first.distance, second.distance)
+    np.testing.assert_array_equal(first.time_seconds, second.time_seconds)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import numpy as np
+
+from backends import BACKEND_NROM, FRAME_HEIGHT, FRAME_WIDTH
+from bots import BotPopulation
+from emulation import (
+    BOOT_SEQUENCE,
+    PIXELS_PER_DISTANCE,
+    PLAYER_PAGE_ADDRESS,
+    PLAYER_X_ADDRESS,
+    EmulatorSession,
+)
+from framebuffer import LeaderPlayback
+from nes import NROMBackend
+from presets import PresetLibrary
+from render_pipeline import LatestMailbox
+
+
+def position(backend) -> int:
+    return backend.read_memory(PLAYER_PAGE_ADDRESS) << 8 | backend.read_memory(PLAYER_X_ADDRESS)
+
+
+def test_nrom_playback_runs_the_leader_inputs_on_its_own_console(walker_path) -> None:
+    session = EmulatorSession(
+        walker_path, PresetLibrary.default_super_mario_bros(), backend=BACKEND_NROM
+    )
+    session.goal_distance = 8
+    population = BotPopulation(bot_count=6, preset=session.preset, vectorized=True)
+    leader = population.run_generation(session, 1).leader_state
+    recording = session.leader
+    booted = NROMBackend(walker_path)
+    booted.reset()
+    for buttons in BOOT_SEQUENCE:
+        booted.run_frame(buttons)
+    start = position(booted)
+
+    playback = LeaderPlayback(session, LatestMailbox())
+    try:
+        backend = playback.backend
+        assert isinstance(backend, NROMBackend) and backend is not session.backend
+        for _ in range(2):
+            frames = list(playback._frames(recording))
+            assert [index for index, _ in frames] == list(range(len(recording.log)))
+            distance = min(session.goal_distance, (position(backend) - start) / PIXELS_PER_DISTANCE)
+            assert round(distance, 2) == leader.distance
+
+        pixels = np.full((FRAME_HEIGHT, FRAME_WIDTH), 0xFF, dtype=np.uint8)
+        frames[-1][1](pixels)
+        assert pixels.max() < 64
+    finally:
+        playback.close()
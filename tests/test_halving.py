@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from bots import BotPopulation, HalvingSchedule
+from emulation import FRAMES_PER_SECOND, EmulatorSession
+from presets import PresetLibrary
+
+
+@pytest.fixture
+def session(tmp_path) -> EmulatorSession:
+    return EmulatorSession(str(tmp_path / "sin_rom.nes"), PresetLibrary.default_super_mario_bros())
+
+
+def make_population(session: EmulatorSession) -> BotPopulation:
+    return BotPopulation(
+        bot_count=400,
+        preset=session.preset,
+        vectorized=True,
+        halving=HalvingSchedule((0.25, 0.5), 0.25),
+    )
+
+
+def test_rung_budgets_follow_the_episode_length(session) -> None:
+    population = make_population(session)
+    result = population.run_generation(session, 1)
+    stats = result.halving_stats
+
+    shortest = 10 * FRAMES_PER_SECOND
+    assert stats.episode_frames > shortest
+    episode = stats.episode_frames
+    assert stats.frame_budgets == [round(episode * 0.25), round(episode * 0.5)]
+    assert stats.rung_sizes[0] == 400 - 60
+    assert stats.frames_simulated < stats.frames_full_estimate
+
+
+def test_averages_only_count_full_episodes(session) -> None:
+    population = make_population(session)
+    genes = population.genome_matrix().copy()
+    result = population.run_generation(session, 1)
+
+    batch, full, _ = population._evaluate_halving(session, genes, 1, 60)
+    indices = np.arange(len(genes), dtype=np.int64)
+    full_batch = population._evaluate_indices(session, genes, 1, indices, None)
+
+    assert 60 <= full.sum() < 400
+    np.testing.assert_array_equal(batch.distance[full], full_batch.distance[full])
+    assert result.avg_distance == round(float(batch.distance[full].mean()), 2)
+    assert result.avg_time == round(float(batch.time_seconds[full].mean()), 2)
+    assert result.success_rate == np.mean(batch.distance[full] >= session.goal_distance)
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import pytest
+
+from bots import BotPopulation
+from emulation import EmulatorSession
+from history import HistoryStore, HistoryWriter
+from presets import PresetLibrary
+
+
+def test_close_reraises_a_failed_write(tmp_path, monkeypatch) -> None:
+    preset = PresetLibrary.default_super_mario_bros()
+    session = EmulatorSession(str(tmp_path / "sin_rom.nes"), preset)
+    population = BotPopulation(bot_count=20, preset=session.preset, vectorized=True)
+    result = population.run_generation(session, 1)
+    writer = HistoryWriter(HistoryStore(str(tmp_path / "historial")), "prueba", batch_size=1)
+
+    def fail(batch) -> None:
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(writer, "_write_batch", fail)
+    writer.append(result)
+    with pytest.raises(OSError, match="disco lleno"):
+        writer.close()
+    assert writer.rows_written == 0
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from islands import IslandModel
+from presets import PresetLibrary
+
+
+@pytest.fixture
+def model(tmp_path):
+    preset = PresetLibrary.default_super_mario_bros()
+    with IslandModel(str(tmp_path / "sin_rom.nes"), preset, 3, 10, parallel=False) as islands:
+        yield islands
+
+
+def test_remainder_bots_are_spread_across_islands(model) -> None:
+    assert [config.bot_count for config in model.configs] == [4, 3, 3]
+    assert model.bot_count == 10
+    result = model.run_generation(model._islands[0].session, 1)
+    assert sum(len(island.population.pool) for island in model._islands) == 10
+    assert len(result.islands) == 3
+
+
+def test_islands_draw_different_evaluation_noise(model) -> None:
+    genes = np.full((4, 7), 0.5)
+    batches = [
+        island.session.evaluate_population(genes, 1, island.session.preset)
+        for island in model._islands
+    ]
+    assert len({island.session.seed for island in model._islands}) == 3
+    assert not np.array_equal(batches[0].time_seconds, batches[1].time_seconds)
+
+
+def test_too_few_bots_are_rejected(tmp_path) -> None:
+    preset = PresetLibrary.default_super_mario_bros()
+    with pytest.raises(ValueError):
+        IslandModel(str(tmp_path / "sin_rom.nes"), preset, 3, 5, parallel=False)
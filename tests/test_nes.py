@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import pytest
+
+from backends import EmulatorBackend
+from nes import NROMBackend, build_nrom_image
+
+BASE = 0xC000
+
+
+def load(tmp_path, program: bytes, name: str = "programa.nes") -> NROMBackend:
+    rom_path = tmp_path / name
+    rom_path.write_bytes(build_nrom_image(program))
+    return NROMBackend(str(rom_path))
+
+
+def execute(tmp_path, program: bytes) -> NROMBackend:
+    halt = BASE + len(program)
+    backend = load(tmp_path, program + bytes((0x4C, halt & 0xFF, halt >> 8)))
+    cpu = backend.cpu
+    for _ in range(10000):
+        if cpu.pc == halt:
+            return backend
+        cpu.step()
+    raise AssertionError("El programa no llegó al final.")
+
+
+def cycles_of(tmp_path, setup: bytes, instruction: bytes) -> int:
+    backend = load(tmp_path, setup + instruction + b"\x4c\x00\xc0")
+    cpu = backend.cpu
+    while cpu.pc != BASE + len(setup):
+        cpu.step()
+    before = cpu.cycles
+    cpu.step()
+    return cpu.cycles - before
+
+
+def test_reset_starts_at_the_reset_vector(tmp_path) -> None:
+    cpu = load(tmp_path, b"\xea").cpu
+    assert cpu.pc == BASE
+    assert cpu.sp == 0xFD
+    assert cpu.status == 0x24
+
+
+def test_adc_sets_overflow_and_negative(tmp_path) -> None:
+    cpu = execute(tmp_path, bytes.fromhex("18 a9 50 69 50")).cpu
+    assert cpu.a == 0xA0
+    assert (cpu.overflow, cpu.negative, cpu.carry, cpu.zero) == (1, 1, 0, 0)
+
+
+def test_adc_carries_out(tmp_path) -> None:
+    cpu = execute(tmp_path, bytes.fromhex("18 a9 ff 69 01")).cpu
+    assert cpu.a == 0x00
+    assert (cpu.carry, cpu.zero, cpu.overflow) == (1, 1, 0)
+
+
+def test_sbc_borrows(tmp_path) -> None:
+    cpu = execute(tmp_path, bytes.fromhex("38 a9 00 e9 01")).cpu
+    assert cpu.a == 0xFF
+    assert (cpu.carry, cpu.negative) == (0, 1)
+
+
+def test_compare_and_branch_loop(tmp_path) -> None:
+    program = bytes.fromhex("a2 00 a0 05 e8 88 d0 fc")
+    cpu = execute(tmp_path, program).cpu
+    assert (cpu.x, cpu.y, cpu.zero) == (5, 0, 1)
+
+
+def test_shifts_and_rotates(tmp_path) -> None:
+    program = bytes.fromhex("a9 81 0a 85 10 38 66 10")
+    backend = execute(tmp_path, program)
+    assert backend.cpu.a == 0x02
+    assert backend.read_memory(0x10) == 0x81
+    assert backend.cpu.carry == 0
+
+
+def test_zero_page_indexed_wraps_inside_page_zero(tmp_path) -> None:
+    backend = execute(tmp_path, bytes.fromhex("a2 ff a9 42 95 80"))
+    assert backend.read_memory(0x7F) == 0x42
+    assert backend.read_memory(0x017F) == 0
+
+
+def test_absolute_indexed_and_indirect_modes(tmp_path) -> None:
+    program = bytes.fromhex(
+        "a9 11 8d 34 02"
+        "a9 22 8d 36 02"
+        "a9 33 8d 38 02"
+        "a9 34 85 20 a9 02 85 21"
+        "a0 02 b9 34 02 aa 86 32"
+        "a2 00 a1 20 85 30"
+        "a0 04 b1 20 85 31"
+    )
+    backend = execute(tmp_path, program)
+    assert backend.read_memory(0x32) == 0x22
+    assert backend.read_memory(0x30) == 0x11
+    assert backend.read_memory(0x31) == 0x33
+
+
+def test_indexed_indirect_pointer_wraps_in_zero_page(tmp_path) -> None:
+    program = bytes.fromhex("a9 00 85 ff a9 03 85 00 a9 5a 8d 00 03 a2 00 a1 ff")
+    assert execute(tmp_path, program).cpu.a == 0x5A
+
+
+def test_page_crossing_adds_a_cycle_only_on_reads(tmp_path) -> None:
+    assert cycles_of(tmp_path, bytes.fromhex("a0 00"), bytes.fromhex("b9 ff 02")) == 4
+    assert cycles_of(tmp_path, bytes.fromhex("a0 01"), bytes.fromhex("b9 ff 02")) == 5
+    assert cycles_of(tmp_path, bytes.fromhex("a0 01"), bytes.fromhex("99 ff 02")) == 5
+    assert cycles_of(tmp_path, bytes.fromhex("a0 00"), bytes.fromhex("99 ff 02")) == 5
+
+
+def test_jmp_indirect_reproduces_the_page_wrap_bug(tmp_path) -> None:
+    program = bytes.fromhex(
+        "a9 40 8d ff 02"
+        "a9 c0 8d 00 02"
+        "a9 d0 8d 00 03"
+        "6c ff 02"
+    )
+    halt = BASE + 0x40
+    image = program.ljust(0x40, b"\xea") + bytes((0x4C, halt & 0xFF, halt >> 8))
+    backend = load(tmp_path, image)
+    cpu = backend.cpu
+    for _ in range(20):
+        cpu.step()
+        if cpu.pc in (halt, 0xD040):
+            break
+    assert cpu.pc == halt
+
+
+def test_jsr_and_rts_use_the_stack(tmp_path) -> None:
+    subroutine = BASE + 0x20
+    program = bytes((0x20, subroutine & 0xFF, subroutine >> 8, 0xA2, 0x07))
+    halt = BASE + len(program)
+    image = bytearray((program + bytes((0x4C, halt & 0xFF, halt >> 8))).ljust(0x20, b"\xea"))
+    image += bytes.fromhex("a9 99 48 68 60")
+    backend = load(tmp_path, bytes(image))
+    cpu = backend.cpu
+    cpu.step()
+    assert cpu.pc == subroutine
+    assert cpu.sp == 0xFB
+    assert backend.read_memory(0x01FD) == (BASE + 2) >> 8
+    assert backend.read_memory(0x01FC) == (BASE + 2) & 0xFF
+    while cpu.pc != halt:
+        cpu.step()
+    assert (cpu.a, cpu.x, cpu.sp) == (0x99, 0x07, 0xFD)
+
+
+def test_unsupported_opcode_raises(tmp_path) -> None:
+    backend = load(tmp_path, b"\x02")
+    with pytest.raises(ValueError, match="Opcode no soportado"):
+        backend.cpu.step()
+
+
+COUNTER_PROGRAM = bytes.fromhex("e8 8a 9d 00 03 e6 10 a5 10 8d 00 60 4c 00 c0")
+
+
+def machine_state(backend: NROMBackend) -> tuple:
+    cpu = backend.cpu
+    return (
+        cpu.a,
+        cpu.x,
+        cpu.y,
+        cpu.sp,
+        cpu.pc,
+        cpu.status,
+        cpu.cycles - backend._frame_start,
+        backend.frame_count,
+        bytes(backend.bus.ram),
+        bytes(backend.bus.prg_ram),
+    )
+
+
+def test_save_state_round_trip_replays_identically(tmp_path) -> None:
+    backend = load(tmp_path, COUNTER_PROGRAM)
+    for _ in range(2):
+        backend.run_frame(0)
+    state = bytearray(backend.state_size)
+    backend.save_state(state)
+    for _ in range(3):
+        backend.run_frame(0)
+    expected = machine_state(backend)
+
+    backend.load_state(state)
+    for _ in range(3):
+        backend.run_frame(0)
+    assert machine_state(backend) == expected
+
+    other = load(tmp_path, COUNTER_PROGRAM, "copia.nes")
+    other.run_frame(0xFF)
+    other.load_state(memoryview(state))
+    for _ in range(3):
+        other.run_frame(0)
+    assert machine_state(other) == expected
+
+
+def test_state_includes_chr_ram(tmp_path) -> None:
+    backend = load(tmp_path, COUNTER_PROGRAM)
+    backend.bus.ppu.chr[0x10] = 0xAB
+    state = bytearray(backend.state_size)
+    backend.save_state(state)
+    backend.bus.ppu.chr[0x10] = 0
+    backend.load_state(state)
+    assert backend.bus.ppu.chr[0x10] == 0xAB
+
+
+def test_backends_must_implement_the_whole_interface(tmp_path) -> None:
+    class Incomplete(EmulatorBackend):
+        def reset(self) -> None:
+            pass
+
+    with pytest.raises(TypeError, match="abstract"):
+        Incomplete()
+    assert isinstance(load(tmp_path, b"\x4c\x00\xc0"), EmulatorBackend)
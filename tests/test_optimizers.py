@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from bots import GenomePool
+from emulation import GENE_COUNT
+from optimizers import CMAES_STATE_SIZE, CMAESOptimizer, GeneticOptimizer, Optimizer
+
+
+def make_pool(seed: int = 5, count: int = 200) -> GenomePool:
+    return GenomePool(np.random.default_rng(seed).random((GENE_COUNT, count)))
+
+
+def ranked(pool: GenomePool, count: int = 20) -> np.ndarray:
+    return np.argsort(-pool.genes.sum(axis=0))[:count]
+
+
+def test_mean_moves_toward_the_best_genomes() -> None:
+    pool = make_pool()
+    best = ranked(pool)
+    start = pool.genes.mean(axis=1).astype(np.float64)
+    target = pool.genes[:, best].mean(axis=1).astype(np.float64)
+    optimizer = CMAESOptimizer()
+
+    optimizer.breed(pool, best, seed=9, generation=1)
+
+    assert optimizer.updates == 1
+    assert np.linalg.norm(optimizer.mean - target) < np.linalg.norm(start - target)
+    assert optimizer.mean.sum() > start.sum()
+    assert pool.genes.mean(axis=1).sum() > start.sum()
+
+
+def test_state_round_trip_is_exact() -> None:
+    pool = make_pool()
+    optimizer = CMAESOptimizer()
+    for generation in (1, 2):
+        optimizer.breed(pool, ranked(pool), seed=9, generation=generation)
+    state = optimizer.state()
+    assert len(state) == CMAES_STATE_SIZE
+
+    restored = CMAESOptimizer()
+    restored.load_state(state)
+    np.testing.assert_array_equal(restored.state(), state)
+
+    copy = GenomePool(pool.genes.copy())
+    optimizer.breed(pool, ranked(pool), seed=9, generation=3)
+    restored.breed(copy, ranked(copy), seed=9, generation=3)
+    np.testing.assert_array_equal(restored.state(), optimizer.state())
+    np.testing.assert_array_equal(copy.genes, pool.genes)
+
+
+def test_state_of_the_wrong_size_is_rejected() -> None:
+    optimizer = CMAESOptimizer()
+    optimizer.breed(make_pool(), ranked(make_pool()), seed=9, generation=1)
+
+    with pytest.raises(ValueError, match="otro optimizador"):
+        CMAESOptimizer().load_state(optimizer.state()[:-1])
+    with pytest.raises(ValueError, match="otro optimizador"):
+        CMAESOptimizer().load_state(np.zeros(CMAES_STATE_SIZE + GENE_COUNT))
+
+
+def test_optimizers_must_implement_breed() -> None:
+    class Incomplete(Optimizer):
+        name = "incompleto"
+
+    with pytest.raises(TypeError, match="abstract"):
+        Incomplete()
+    assert isinstance(CMAESOptimizer(), Optimizer)
+    assert isinstance(GeneticOptimizer(), Optimizer)
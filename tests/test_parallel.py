@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import parallel
+from backends import BACKEND_SYNTHETIC
+from emulation import EmulatorSession
+from parallel import WORKER_SESSION_LIMIT, preset_payload, worker_session
+from presets import PresetLibrary
+
+
+def test_worker_sessions_are_bounded_and_closed_on_eviction(tmp_path, monkeypatch) -> None:
+    closed = []
+    monkeypatch.setattr(parallel, "_WORKER_SESSIONS", type(parallel._WORKER_SESSIONS)())
+    monkeypatch.setattr(EmulatorSession, "close", lambda session: closed.append(session))
+    payload = preset_payload(PresetLibrary.default_super_mario_bros())
+    paths = [str(tmp_path / f"rom_{index}.nes") for index in range(WORKER_SESSION_LIMIT + 2)]
+    first = worker_session(paths[0], payload)
+    second = worker_session(paths[1], payload)
+    for path in paths[2:]:
+        assert worker_session(paths[0], payload) is first
+        worker_session(path, payload)
+
+    assert len(parallel._WORKER_SESSIONS) == WORKER_SESSION_LIMIT
+    assert (paths[0], payload, BACKEND_SYNTHETIC) in parallel._WORKER_SESSIONS
+    assert (paths[1], payload, BACKEND_SYNTHETIC) not in parallel._WORKER_SESSIONS
+    assert len(closed) == 2 and closed[0] is second
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import pytest
+
+from presets import MAX_SEQUENCE_FRAMES, NES_BUTTON_BITS, ControlPreset, PresetLibrary
+
+
+def preset_data(buttons=None, sequences=None) -> dict:
+    return {
+        "game_title": "Prueba",
+        "buttons": buttons if buttons is not None else {"A": "JUMP", "RIGHT": "MOVE_RIGHT"},
+        "sequences": [] if sequences is None else sequences,
+    }
+
+
+def sequence(name: str = "avance", pattern: str = "MOVE_RIGHT", frames: object = 10) -> dict:
+    return {"name": name, "pattern": pattern, "frames": frames}
+
+
+def test_default_preset_compiles_to_nes_bitmasks() -> None:
+    compiled = PresetLibrary.default_super_mario_bros().compiled
+
+    assert compiled.action_masks == {
+        "JUMP": 0x01,
+        "RUN": 0x02,
+        "MENU": 0x04,
+        "PAUSE": 0x08,
+        "LOOK": 0x10,
+        "DUCK": 0x20,
+        "MOVE_LEFT": 0x40,
+        "MOVE_RIGHT": 0x80,
+    }
+    assert compiled.programs["salto_largo"] == b"\x03" * 18
+    assert compiled.programs["avance_seguro"] == b"\x82" * 30
+    assert compiled.programs["freno_rapido"] == b"\x60" * 8
+    assert compiled.binding_count == 8
+    assert compiled.action_complexity == 12
+    assert compiled.frame_input("salto_rebote", 11) == 0x03
+    assert compiled.frame_input("salto_rebote", 12) == 0
+
+
+def test_shared_actions_and_raw_buttons_are_combined() -> None:
+    preset = ControlPreset.from_dict(
+        preset_data(
+            buttons={"a": "SALTO", "B": "SALTO", "right": "DERECHA"},
+            sequences=[sequence("mixta", "SALTO + DERECHA + Start", 2)],
+        )
+    )
+
+    assert preset.compiled.action_masks == {"SALTO": 0x03, "DERECHA": 0x80}
+    start = NES_BUTTON_BITS["START"]
+    assert preset.compiled.programs["mixta"] == bytes((0x03 | 0x80 | start,)) * 2
+
+
+@pytest.mark.parametrize(
+    ("data", "message"),
+    [
+        (preset_data(buttons={"TURBO": "JUMP"}), "Botón NES desconocido: 'TURBO'"),
+        (preset_data(buttons={"A": " "}), "necesita un nombre de acción"),
+        (preset_data(sequences=[sequence(pattern="JUMP+VOLAR")]), "acción desconocida 'VOLAR'"),
+        (preset_data(sequences=[sequence(pattern="")]), "texto no vacío"),
+        (preset_data(sequences=[sequence(frames=0)]), "entre 1 y 3600"),
+        (preset_data(sequences=[sequence(frames=MAX_SEQUENCE_FRAMES + 1)]), "entre 1 y 3600"),
+        (preset_data(sequences=[sequence(frames=True)]), "entre 1 y 3600"),
+        (preset_data(sequences=[sequence(frames="10")]), "entre 1 y 3600"),
+        (preset_data(sequences=[sequence(name=" ")]), "necesita un nombre"),
+        (preset_data(sequences=[sequence(), sequence()]), "Secuencia duplicada: 'avance'"),
+        (preset_data(sequences=["avance"]), "debe ser un objeto"),
+        ({"buttons": {}}, "falta game_title"),
+    ],
+)
+def test_invalid_presets_are_rejected(data, message) -> None:
+    with pytest.raises(ValueError, match=message):
+        ControlPreset.from_dict(data)
+
+
+def test_longest_sequence_is_accepted_and_compilation_is_cached() -> None:
+    data = preset_data(sequences=[sequence(frames=MAX_SEQUENCE_FRAMES)])
+    first = ControlPreset.from_dict(data)
+    second = ControlPreset.from_dict(data)
+
+    assert len(first.compiled.programs["avance"]) == MAX_SEQUENCE_FRAMES
+    assert first.compiled is second.compiled
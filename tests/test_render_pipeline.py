@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import pytest
+
+from render_pipeline import ResultConsumer
+
+
+def test_close_reraises_a_handler_error() -> None:
+    handled = []
+
+    def handler(item: int) -> None:
+        if item == 2:
+            raise OSError("disco lleno")
+        handled.append(item)
+
+    consumer = ResultConsumer(handler)
+    for item in range(4):
+        consumer.put(item)
+    with pytest.raises(OSError, match="disco lleno"):
+        consumer.close()
+    assert handled == [0, 1]
+
+
+def test_put_reports_the_error_only_once() -> None:
+    consumer = ResultConsumer(lambda item: 1 / item)
+    consumer.put(0)
+    with pytest.raises(ZeroDivisionError):
+        while True:
+            consumer.put(1)
+    consumer.close()
+    assert consumer.handled == 0
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import json
+import os
+from multiprocessing import get_context
+
+from emulation import EmulatorSession
+from parallel import preset_payload, worker_session
+from presets import PresetLibrary
+from roms import rom_registry
+
+
+def write_rom(path) -> str:
+    path.write_bytes(b"NES\x1a\x01\x01" + bytes(10) + bytes(0x4000) + bytes(0x2000))
+    return str(path)
+
+
+def indexed_paths() -> set:
+    index_path = rom_registry().index_path
+    if not index_path.exists():
+        return set()
+    return set(json.loads(index_path.read_text(encoding="utf-8"))["roms"])
+
+
+def test_index_is_written_only_when_an_entry_changes(tmp_path, monkeypatch) -> None:
+    rom_path = write_rom(tmp_path / "nueva.nes")
+    replace = os.replace
+    writes = []
+
+    def counting_replace(source, target) -> None:
+        writes.append(target)
+        replace(source, target)
+
+    monkeypatch.setattr(os, "replace", counting_replace)
+    preset = PresetLibrary.default_super_mario_bros()
+    for _ in range(3):
+        EmulatorSession(rom_path, preset).close()
+
+    assert len(writes) == 1
+    assert str((tmp_path / "nueva.nes").resolve()) in indexed_paths()
+
+
+def test_worker_processes_never_write_the_index(tmp_path) -> None:
+    rom_path = write_rom(tmp_path / "worker.nes")
+    payload = preset_payload(PresetLibrary.default_super_mario_bros())
+    process = get_context("spawn").Process(target=worker_session, args=(rom_path, payload))
+    process.start()
+    process.join(timeout=60)
+
+    assert process.exitcode == 0
+    assert str((tmp_path / "worker.nes").resolve()) not in indexed_paths()
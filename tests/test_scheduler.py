@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+
+from presets import PresetLibrary
+from scheduler import (
+    EVENT_FINISHED,
+    EVENT_GENERATION,
+    POLICY_FAIR,
+    POLICY_PRIORITY,
+    REASON_GOAL,
+    REASON_MAX_GENERATIONS,
+    JobScheduler,
+    JobState,
+    TrainingJob,
+)
+
+
+class ShortGoalScheduler(JobScheduler):
+    def _start(self, state: JobState) -> None:
+        super()._start(state)
+        if state.job.stop_at_goal:
+            state.session.goal_distance = 1.0
+
+
+def make_job(tmp_path, job_id: str, **options) -> TrainingJob:
+    options.setdefault("bot_count", 20)
+    options.setdefault("max_generations", 3)
+    return TrainingJob(
+        job_id=job_id,
+        rom_path=str(tmp_path / f"{job_id}.nes"),
+        preset=PresetLibrary.default_super_mario_bros(),
+        **options,
+    )
+
+
+def events(output: io.StringIO) -> list:
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def generation_order(output: io.StringIO) -> list:
+    return [event["job"] for event in events(output) if event["event"] == EVENT_GENERATION]
+
+
+def test_fair_policy_picks_the_smallest_weighted_share(tmp_path) -> None:
+    scheduler = JobScheduler(io.StringIO(), policy=POLICY_FAIR)
+    scheduler.submit(make_job(tmp_path, "a"))
+    scheduler.submit(make_job(tmp_path, "b", weight=2.0))
+    scheduler.submit(make_job(tmp_path, "c"))
+    a, b, c = (scheduler.states[job_id] for job_id in "abc")
+
+    assert scheduler._next_job() is a
+    a.used_seconds, b.used_seconds, c.used_seconds = 2.0, 3.0, 2.0
+    assert scheduler._next_job() is b
+    b.running = True
+    assert scheduler._next_job() is a
+    a.finished = REASON_MAX_GENERATIONS
+    assert scheduler._next_job() is c
+    c.running = True
+    assert scheduler._next_job() is None
+
+
+def test_priority_policy_runs_the_highest_priority_first(tmp_path) -> None:
+    output = io.StringIO()
+    with JobScheduler(output, slots=1, policy=POLICY_PRIORITY) as scheduler:
+        scheduler.submit(make_job(tmp_path, "baja", stop_at_goal=False))
+        scheduler.submit(make_job(tmp_path, "alta", stop_at_goal=False, priority=5))
+        scheduler.submit(make_job(tmp_path, "media", stop_at_goal=False, priority=1))
+        states = scheduler.run()
+
+    assert generation_order(output) == ["alta"] * 3 + ["media"] * 3 + ["baja"] * 3
+    assert {state.finished for state in states.values()} == {REASON_MAX_GENERATIONS}
+
+
+@pytest.mark.parametrize("policy", [POLICY_FAIR, POLICY_PRIORITY])
+def test_goal_releases_the_slot_for_the_other_jobs(tmp_path, policy) -> None:
+    output = io.StringIO()
+    with ShortGoalScheduler(output, slots=1, policy=policy) as scheduler:
+        scheduler.submit(make_job(tmp_path, "meta", max_generations=0, priority=1))
+        scheduler.submit(make_job(tmp_path, "resto", stop_at_goal=False))
+        states = scheduler.run()
+
+    goal = states["meta"]
+    assert goal.finished == REASON_GOAL
+    assert goal.generation == 1
+    assert goal.session is None and goal.population is None
+    assert states["resto"].finished == REASON_MAX_GENERATIONS
+    assert generation_order(output) == ["meta"] + ["resto"] * 3
+    finished = [event for event in events(output) if event["event"] == EVENT_FINISHED]
+    assert [event["job"] for event in finished] == ["meta", "resto"]
+    assert finished[0]["reason"] == REASON_GOAL